@@ -1,12 +1,34 @@
 import os
 
 from celery import Celery
+from celery.signals import task_postrun
 from django.conf import settings
+from django.db import connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 
+# Set by docker/local/django/celery/worker/start.sh for the I/O-bound profiles.
+WORKER_POOL = os.environ.get('CELERY_WORKER_POOL', 'prefork')
+IO_POOLS = ('threads', 'gevent')
+
+if WORKER_POOL == 'gevent':
+  try:
+    from psycogreen.gevent import patch_psycopg
+  except ImportError:
+    raise RuntimeError('The gevent worker pool requires the gevent and psycogreen packages.')
+  patch_psycopg()
+
 app = Celery("nextgen_bank")
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
\ No newline at end of file
+app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+@task_postrun.connect
+def close_io_pool_db_connections(**kwargs) -> None:
+  # Thread and greenlet pools keep one DB connection per concurrent slot. I/O
+  # tasks spend most of their time waiting on the network, so hand the
+  # connection back instead of holding dozens of idle ones per worker.
+  if WORKER_POOL in IO_POOLS:
+    for connection in connections.all(initialized_only=True):
+      connection.close()
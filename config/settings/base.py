@@ -1,9 +1,12 @@
+import logging.config
+import random
 from pathlib import Path
 from dotenv import load_dotenv
 from os import getenv, path
 from loguru import logger
 from datetime import timedelta, date
 import cloudinary
+from kombu import Queue
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
@@ -51,6 +54,10 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "core_apps.common.middleware.RequestIDMiddleware",
+    "core_apps.common.middleware.RequestMetricsMiddleware",
+    "core_apps.common.middleware.RequestInstrumentationMiddleware",
+    "core_apps.common.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,14 +103,53 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "core_apps.common.instrumentation.InstrumentedRedisCache",
+        "LOCATION": getenv("REDIS_CACHE_URL") or "redis://redis:6379/1",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+        },
+    }
+}
+
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "core_apps.user_auth.hashers.TunablePBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
-    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
-    "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "core_apps.user_auth.hashers.TunableArgon2PasswordHasher",
+    "core_apps.user_auth.hashers.TunableBCryptSHA256PasswordHasher",
+    "core_apps.user_auth.hashers.TunableScryptPasswordHasher",
 ]
 
+# Per-algorithm overrides for the tunable hashers, see `manage.py tune_hashers`.
+# Changing a value makes existing hashes stale; they are upgraded on next login.
+PASSWORD_HASHER_PARAMS = {
+    "pbkdf2_sha256": {
+        "iterations": int(getenv("PBKDF2_ITERATIONS", "600000")),
+    },
+}
+
+AUTHENTICATION_BACKENDS = [
+    "core_apps.user_auth.backends.PooledHashingBackend",
+]
+
+PASSWORD_HASHING_POOL = {
+    "MAX_WORKERS": int(getenv("PASSWORD_HASHING_WORKERS", "4")),
+    "MAX_QUEUE": int(getenv("PASSWORD_HASHING_QUEUE", "32")),
+    "TIMEOUT": 10,
+}
+
+# Bulk customer onboarding, see core_apps.user_auth.imports. Rows are
+# validated and inserted CUSTOMER_IMPORT_BATCH_SIZE at a time; reports keep
+# the first CUSTOMER_IMPORT_MAX_ERRORS row errors.
+CUSTOMER_IMPORT_BATCH_SIZE = 500
+CUSTOMER_IMPORT_HASH_WORKERS = int(getenv("CUSTOMER_IMPORT_HASH_WORKERS") or 4)
+CUSTOMER_IMPORT_MAX_ERRORS = 1000
+CUSTOMER_IMPORT_REPORT_TTL = 7 * 24 * 60 * 60
+# Staged import files wait on the shared default queue, so their lease covers
+# a long backlog rather than the hour other staged uploads get.
+CUSTOMER_IMPORT_STAGING_LEASE = timedelta(hours=24)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -143,6 +189,8 @@ SITE_ID = 1
 
 STATIC_URL = "/static/"
 STATIC_ROOT = str(BASE_DIR / "staticfiles")
+MEDIA_URL = "/mediafiles/"
+MEDIA_ROOT = str(BASE_DIR / "mediafiles")
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -201,6 +249,7 @@ DJOSER = {
     'PASSWORD_RESET_CONFIRM_URL': 'password-reset/{uid}/{token}',
     'SERIALIZERS': {
         'user_create': 'core_apps.user_auth.serializers.UserCreateSerializer',
+        'token_create': 'core_apps.user_auth.serializers.TokenCreateSerializer',
     },
 }
 
@@ -219,7 +268,12 @@ if USE_TZ:
     CELERY_TIMEZONE = TIME_ZONE
 
 CELERY_BROKER_URL = getenv('CELERY_BROKER_URL')
-CELERY_RESULT_BACKEND = getenv('CELERY_RESULT_BACKEND')
+CELERY_RESULT_BACKEND_URL = getenv('CELERY_RESULT_BACKEND')
+CELERY_RESULT_BACKEND = (
+    f'core_apps.common.celery_backends:RedactingRedisBackend+{CELERY_RESULT_BACKEND_URL}'
+    if CELERY_RESULT_BACKEND_URL and CELERY_RESULT_BACKEND_URL.startswith('redis')
+    else CELERY_RESULT_BACKEND_URL
+)
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -227,10 +281,90 @@ CELERY_RESULT_BACKEND_MAXIMUM_RETRIES = 10
 CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_RESULT_EXTENDED = True
 CELERY_RESULT_BACKEND_ALWAYS_RETRY = True
+CELERY_RESULT_EXPIRES = timedelta(hours=1)
+CELERY_RESULT_ARGS_MAX_LENGTH = 256
+CELERY_RESULT_REDACT_KEYS = ['data', 'context', 'otp', 'password']
 CELERY_TASK_TIME_LIMIT = 300
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
+CELERY_BEAT_SCHEDULE = {
+    'sweep-upload-staging': {
+        'task': 'sweep_upload_staging',
+        'schedule': timedelta(minutes=5),
+    },
+}
+
+# Queue topology. Each queue is consumed by its own worker profile (see
+# docker/local/django/celery/worker/start.sh) so that bulk media uploads
+# never delay time-critical auth emails.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUE_MAX_PRIORITY = 10
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_QUEUES = (
+    Queue('auth-email', routing_key='auth-email'),
+    Queue('default', routing_key='default'),
+    Queue('media', routing_key='media'),
+    Queue('maintenance', routing_key='maintenance'),
+)
+CELERY_TASK_ROUTES = {
+    'send_templated_email': {'queue': 'auth-email', 'priority': 9},
+    'djcelery_email_send_multiple': {'queue': 'auth-email', 'priority': 7},
+    'send_templated_emails': {'queue': 'default', 'priority': 3},
+    'import_customers': {'queue': 'default', 'priority': 2},
+    'upload_photos_to_cloudinary': {'queue': 'media', 'priority': 5},
+    'celery.backend_cleanup': {'queue': 'maintenance', 'priority': 0},
+    'sweep_upload_staging': {'queue': 'maintenance', 'priority': 0},
+}
+# Auth emails are acknowledged on receipt: a lost OTP is cheaper than a
+# duplicate one. Media and maintenance work is re-delivered if a worker dies.
+CELERY_TASK_ANNOTATIONS = {
+    'upload_photos_to_cloudinary': {'acks_late': True, 'reject_on_worker_lost': True},
+    'celery.backend_cleanup': {'acks_late': True},
+    'sweep_upload_staging': {'acks_late': True},
+    'djcelery_email_send_multiple': {'ignore_result': True},
+}
+
+CELERY_EMAIL_BACKEND = "core_apps.common.mail.TracedSMTPBackend"
+
+# Templated emails are rendered by workers and delivered over pooled SMTP
+# connections, see core_apps.common.mail.
+EMAIL_BATCH_SIZE = 50
+EMAIL_POOL_MAX_MESSAGES = 500
+EMAIL_POOL_IDLE_TIMEOUT = 30
+EMAIL_TIMEOUT = 10
+
+# Circuit breakers and bulkheads around external dependencies, shared by all
+# workers through Redis, see core_apps.common.circuit_breaker. A circuit opens
+# for OPEN_SECONDS once at least MIN_CALLS calls in a WINDOW-second window
+# were made and FAILURE_RATE of them failed or took longer than SLOW_CALL_MS.
+# Tasks that hit an open circuit or a full bulkhead are retried with
+# exponential backoff instead of waiting on the dependency.
+CIRCUIT_BREAKERS = {
+    "media": {
+        "FAILURE_RATE": 0.5,
+        "MIN_CALLS": 10,
+        "WINDOW": 60,
+        "SLOW_CALL_MS": 20000,
+        "OPEN_SECONDS": 30,
+    },
+    "smtp": {
+        "FAILURE_RATE": 0.5,
+        "MIN_CALLS": 10,
+        "WINDOW": 60,
+        "SLOW_CALL_MS": 5000,
+        "OPEN_SECONDS": 30,
+    },
+}
+# Maximum concurrent calls per bulkhead across all workers. Bulk emails get
+# their own smaller share of SMTP so they cannot crowd out OTP emails.
+BULKHEADS = {
+    "media": 8,
+    "smtp": 12,
+    "smtp-bulk": 4,
+}
+DEPENDENCY_RETRY_BACKOFF = 5
+DEPENDENCY_RETRY_BACKOFF_MAX = 300
 
 CLOUDINARY_CLOUD_NAME = getenv('CLOUDINARY_CLOUD_NAME')
 CLOUDINARY_API_KEY = getenv('CLOUDINARY_API_KEY')
@@ -242,6 +376,89 @@ cloudinary.config(
     api_secret=CLOUDINARY_API_SECRET
 )
 
+# Where uploaded profile images are stored, see core_apps.common.media_storage.
+# Set MEDIA_STORAGE_BACKEND to core_apps.common.media_storage.LocalMediaStorage
+# to run the media path offline against the local stand-in, which simulates
+# the latency and failure rate in LOCAL_MEDIA_STORAGE.
+MEDIA_STORAGE = {
+    "BACKEND": getenv("MEDIA_STORAGE_BACKEND") or "core_apps.common.media_storage.CloudinaryMediaStorage",
+    "OPTIONS": {},
+}
+LOCAL_MEDIA_STORAGE = {
+    "LATENCY_MS": float(getenv("MEDIA_STORAGE_LATENCY_MS") or 0),
+    "JITTER_MS": float(getenv("MEDIA_STORAGE_JITTER_MS") or 0),
+    "FAILURE_RATE": float(getenv("MEDIA_STORAGE_FAILURE_RATE") or 0),
+}
+
+# Resumable chunked uploads are written straight to the staging area.
+UPLOAD_STAGING_ROOT = BASE_DIR / "staging"
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+UPLOAD_SESSION_MAX_SIZE = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 512 * 1024
+UPLOAD_CHUNK_MAX_SIZE = 5 * 1024 * 1024
+UPLOAD_STREAM_BLOCK_SIZE = 64 * 1024
+
+# Staged files are leased by modification time (see
+# core_apps.user_profile.staging): session files live as long as their
+# session, everything else for UPLOAD_STAGING_LEASE after its last write or
+# renewal. New uploads are refused once the area holds UPLOAD_STAGING_MAX_BYTES
+# or the volume has less than UPLOAD_STAGING_MIN_FREE_BYTES left.
+UPLOAD_STAGING_LEASE = timedelta(hours=1)
+UPLOAD_STAGING_MAX_BYTES = int(getenv("UPLOAD_STAGING_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+UPLOAD_STAGING_MIN_FREE_BYTES = int(getenv("UPLOAD_STAGING_MIN_FREE_BYTES", 512 * 1024 * 1024))
+UPLOAD_STAGING_SWEEP_BATCH_SIZE = 500
+UPLOAD_STAGING_SWEEP_MAX_BATCHES = 20
+
+# Photo upload tasks are retried this many times while media storage is
+# unavailable.
+UPLOAD_TASK_MAX_RETRIES = 5
+
+# How long the newest pending upload per profile field is remembered for
+# de-duplication and coalescing, see core_apps.user_profile.uploads. It
+# outlives a staged file's lease plus every retry delay, and each task run
+# refreshes it, so a key only runs out for an upload that can no longer be
+# processed.
+UPLOAD_DEDUP_TTL = int(UPLOAD_STAGING_LEASE.total_seconds()) + UPLOAD_TASK_MAX_RETRIES * (
+    DEPENDENCY_RETRY_BACKOFF_MAX + DEPENDENCY_RETRY_BACKOFF
+)
+
+UPLOAD_EVENTS_TIMEOUT = 120
+UPLOAD_EVENTS_POLL_INTERVAL = 1
+UPLOAD_EVENTS_KEEPALIVE = 15
+
+# Per-request SQL, cache and rendering timings in a Server-Timing header and
+# the request log, see core_apps.common.middleware.
+REQUEST_INSTRUMENTATION = getenv("REQUEST_INSTRUMENTATION", "True") == "True"
+
+# Prometheus metrics at /metrics, aggregated across processes in Redis, see
+# core_apps.common.metrics.
+METRICS = {
+    "ENABLED": getenv("METRICS_ENABLED", "True") == "True",
+    "FLUSH_INTERVAL": 1,
+    "TOKEN": getenv("METRICS_TOKEN") or None,
+}
+
+# Opt-in request profiling, see core_apps.common.middleware. Requests are
+# profiled when they carry a token from `manage.py profiles token`, when a
+# staff user adds ?profile, or at SAMPLE_RATE.
+REQUEST_PROFILING = {
+    "ENABLED": getenv("REQUEST_PROFILING", "False") == "True",
+    "SAMPLE_RATE": float(getenv("REQUEST_PROFILING_SAMPLE_RATE") or 0),
+    "QUERY_PARAM": "profile",
+    "TOKEN_MAX_AGE": 60 * 60,
+    "ROOT": BASE_DIR / "profiles",
+    "MAX_PROFILES": 500,
+}
+
+# Request IDs are bound to the log lines of a request and of the Celery
+# tasks it queues. Each hop (request, task publish, task run, SMTP, media
+# upload) is appended to FILE as a span; `manage.py trace` reassembles them.
+TRACING = {
+    "ENABLED": getenv("TRACING_ENABLED", "True") == "True",
+    "FILE": BASE_DIR / "logs/trace.jsonl",
+    "MAX_BYTES": 50 * 1024 * 1024,
+}
+
 COOKIE_NAME = 'access'
 COOKIE_SAMESITE = 'Lax'
 COOKIE_PATH = '/'
@@ -251,35 +468,101 @@ COOKIE_SECURE = getenv('COOKIE_SECURE', 'True') == 'True'
 
 LOGGING_CONFIG = None
 
-LOGURU_LOGGING = {
-    "handlers": [
-        {
-            "sink": BASE_DIR / "logs/debug.log",
-            "level": "DEBUG",
-            "filter": lambda record: record["level"].no <= logger.level("WARNING").no,
-            "format": "{time:YYYY-MM-DD:hh:mm:ss.SSS} | {level: <8} | {name}: {function}: {line} - {message}",
-            "rotation": "10MB",
-            "retention": "30 days",
-            "compression": "zip",
-        },
-        {
-            "sink": BASE_DIR / "logs/error.log",
-            "level": "ERROR",
-            "format": "{time:YYYY-MM-DD:hh:mm:ss.SSS} | {level: <8} | {name}: {function}: {line} - {message}",
-            "rotation": "10MB",
-            "retention": "30 days",
-            "compression": "zip",
-            "backtrace": True,
-            "diagnose": True
-        },
-    ]
-}
+# "sync" writes human-readable lines from the logging thread. "async" hands
+# records to a background writer (enqueue), so file I/O, rotation and
+# compression stay off the request path, serializes them as JSON lines and
+# keeps only LOG_SAMPLE_RATE of DEBUG and INFO records. WARNING and above
+# are always kept.
+LOG_MODE = getenv("LOG_MODE") or "sync"
+LOG_SAMPLE_RATE = float(getenv("LOG_SAMPLE_RATE") or 1)
+
+LOG_FORMAT = "{time:YYYY-MM-DD:hh:mm:ss.SSS} | {level: <8} | {extra[request_id]} | {name}: {function}: {line} - {message}"
+WARNING_LEVEL_NO = logger.level("WARNING").no
+
+
+def debug_log_filter(record) -> bool:
+    return record["level"].no <= WARNING_LEVEL_NO
+
+
+def sampled_debug_log_filter(record) -> bool:
+    no = record["level"].no
+    return no <= WARNING_LEVEL_NO and (no == WARNING_LEVEL_NO or random.random() < LOG_SAMPLE_RATE)
+
+
+if LOG_MODE == "async":
+    LOGURU_LOGGING = {
+        "handlers": [
+            {
+                "sink": BASE_DIR / "logs/debug.json",
+                "level": "DEBUG",
+                "filter": sampled_debug_log_filter,
+                "serialize": True,
+                "enqueue": True,
+                "rotation": "50MB",
+                "retention": "30 days",
+                "compression": "gz",
+            },
+            {
+                "sink": BASE_DIR / "logs/error.json",
+                "level": "ERROR",
+                "serialize": True,
+                "enqueue": True,
+                "rotation": "50MB",
+                "retention": "30 days",
+                "compression": "gz",
+                "backtrace": True,
+                "diagnose": False,
+            },
+        ],
+        "extra": {"request_id": "-"},
+    }
+else:
+    LOGURU_LOGGING = {
+        "handlers": [
+            {
+                "sink": BASE_DIR / "logs/debug.log",
+                "level": "DEBUG",
+                "filter": debug_log_filter,
+                "format": LOG_FORMAT,
+                "rotation": "10MB",
+                "retention": "30 days",
+                "compression": "zip",
+            },
+            {
+                "sink": BASE_DIR / "logs/error.log",
+                "level": "ERROR",
+                "format": LOG_FORMAT,
+                "rotation": "10MB",
+                "retention": "30 days",
+                "compression": "zip",
+                "backtrace": True,
+                "diagnose": True
+            },
+        ],
+        "extra": {"request_id": "-"},
+    }
 
 logger.configure(**LOGURU_LOGGING)
 
+# Noisy stdlib loggers are filtered by level before a LogRecord is even
+# created, so their debug output never reaches the loguru bridge.
+# django.db.backends logs every query at DEBUG.
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {"loguru": {"class": "interceptor.InterceptHandler"}},
     "root": {"handlers": ["loguru"], "level": "DEBUG"},
-}
\ No newline at end of file
+    "loggers": {
+        "django.db.backends": {"level": getenv("DJANGO_DB_LOG_LEVEL") or "INFO"},
+        "django.template": {"level": "INFO"},
+        "django.utils.autoreload": {"level": "INFO"},
+        "celery": {"level": "INFO"},
+        "amqp": {"level": "INFO"},
+        "kombu": {"level": "INFO"},
+        "urllib3": {"level": "INFO"},
+    },
+}
+
+# LOGGING_CONFIG is None so Django leaves logging alone; install the bridge
+# here.
+logging.config.dictConfig(LOGGING)
\ No newline at end of file
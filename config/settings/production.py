@@ -0,0 +1,70 @@
+from os import environ, getenv, path
+from pathlib import Path
+from dotenv import load_dotenv
+
+# base reads the environment and configures loguru on import, so the env file
+# and the production logging default have to be in place before it is loaded.
+production_env_file = path.join(Path(__file__).resolve(strict=True).parent.parent.parent, ".envs", ".env.production")
+
+if path.isfile(production_env_file):
+    load_dotenv(production_env_file)
+
+environ.setdefault("LOG_MODE", "async")
+
+from .base import *  # noqa
+from .base import CACHES, DATABASES, REST_FRAMEWORK, TRACING
+
+SECRET_KEY = getenv("SECRET_KEY")
+
+DEBUG = False
+
+SITE_NAME = getenv("SITE_NAME")
+
+ALLOWED_HOSTS = [host for host in (getenv("DJANGO_ALLOWED_HOSTS") or "").split(",") if host]
+
+ADMIN_URL = getenv("ADMIN_URL")
+
+EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
+EMAIL_HOST = getenv("EMAIL_HOST")
+EMAIL_PORT = getenv("EMAIL_PORT")
+DEFAULT_FROM_EMAIL = getenv("DEFAULT_FROM_EMAIL")
+DOMAIN = getenv("DOMAIN")
+
+MAX_UPLOAD_SIZE = 1 * 1024 * 1024
+
+CSRF_TRUSTED_ORIGINS = [origin for origin in (getenv("DJANGO_CSRF_TRUSTED_ORIGINS") or "").split(",") if origin]
+
+LOCKOUT_DURATION = timedelta(minutes=30)
+
+LOGIN_ATTEMPTS = 3
+
+OTP_EXPIRATION = timedelta(minutes=5)
+
+# Each worker keeps its database connection for CONN_MAX_AGE seconds instead
+# of connecting per request, and checks it is still usable before reusing it.
+DATABASES["default"]["CONN_MAX_AGE"] = int(getenv("CONN_MAX_AGE") or 60)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# One Redis connection pool per worker process, shared by all its threads.
+# Timeouts keep a stalled Redis from holding requests.
+CACHES["default"]["OPTIONS"].update({
+    "SOCKET_CONNECT_TIMEOUT": 2,
+    "SOCKET_TIMEOUT": 2,
+    "CONNECTION_POOL_KWARGS": {"max_connections": 50, "health_check_interval": 30},
+})
+
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# Request instrumentation (the Server-Timing header and its log line) and span
+# tracing are diagnostics: each costs every request work and, for tracing, a
+# synchronous file write. Turn them on per deployment when investigating.
+REQUEST_INSTRUMENTATION = getenv("REQUEST_INSTRUMENTATION", "False") == "True"
+TRACING["ENABLED"] = getenv("TRACING_ENABLED", "False") == "True"
+
+# The browsable API is a development aid.
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ["rest_framework.renderers.JSONRenderer"]
+
+# nginx terminates TLS.
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
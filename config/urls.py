@@ -1,6 +1,8 @@
 from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from core_apps.common.views import MetricsView
 from drf_spectacular.views import (
   SpectacularAPIView,
   SpectacularRedocView,
@@ -9,13 +11,14 @@ from drf_spectacular.views import (
 
 urlpatterns = [
     path(settings.ADMIN_URL, admin.site.urls),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('api/v1/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/v1/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/v1/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api/v1/auth/', include('djoser.urls')),
     path('api/v1/auth/', include('core_apps.user_auth.urls')),
     path('api/v1/profiles/', include('core_apps.user_profile.urls'))
-]
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 admin.site.site_header = 'NextGen Bank Admin'
 admin.site.site_title = 'NextGen Bank Admin Portal'
@@ -6,3 +6,6 @@ class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core_apps.common"
     verbose_name = _("Common")
+
+    def ready(self) -> None:
+        import core_apps.common.signals
@@ -0,0 +1,31 @@
+import copy
+from typing import Any
+
+from celery.backends.redis import RedisBackend
+from django.conf import settings
+
+REDACTED = '[redacted]'
+
+def redact(value: Any) -> Any:
+  max_length = settings.CELERY_RESULT_ARGS_MAX_LENGTH
+
+  if isinstance(value, dict):
+    return {
+      key: REDACTED if key in settings.CELERY_RESULT_REDACT_KEYS else redact(item)
+      for key, item in value.items()
+    }
+  if isinstance(value, (list, tuple)):
+    return [redact(item) for item in value]
+  if isinstance(value, str) and len(value) > max_length:
+    return f'{value[:max_length]}...[{len(value)} chars]'
+  return value
+
+class RedactingRedisBackend(RedisBackend):
+  # With result_extended every stored result repeats the task arguments,
+  # which for uploads include whole base64 images.
+  def _get_result_meta(self, result, state, traceback, request, *args: Any, **kwargs: Any) -> dict:
+    if request is not None:
+      request = copy.copy(request)
+      request.args = redact(getattr(request, 'args', None))
+      request.kwargs = redact(getattr(request, 'kwargs', None))
+    return super()._get_result_meta(result, state, traceback, request, *args, **kwargs)
@@ -0,0 +1,226 @@
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from loguru import logger
+
+class DependencyUnavailable(Exception):
+  def __init__(self, dependency: str, retry_after: float) -> None:
+    super().__init__(f'{dependency} is unavailable, retry in {retry_after:.0f}s')
+    self.dependency = dependency
+    self.retry_after = retry_after
+
+class CircuitOpen(DependencyUnavailable):
+  pass
+
+class BulkheadFull(DependencyUnavailable):
+  pass
+
+# Counts the call in the current window and opens the circuit once enough
+# calls failed. Failed and slow calls both count as failures.
+RECORD_SCRIPT = """
+local calls = redis.call('hincrby', KEYS[1], 'calls', 1)
+if calls == 1 then
+  redis.call('expire', KEYS[1], ARGV[2])
+end
+local failures = tonumber(redis.call('hget', KEYS[1], 'failures') or '0')
+if ARGV[1] == '1' then
+  failures = redis.call('hincrby', KEYS[1], 'failures', 1)
+end
+if calls >= tonumber(ARGV[3]) and failures / calls >= tonumber(ARGV[4]) then
+  redis.call('set', KEYS[2], '1', 'EX', ARGV[5])
+  redis.call('set', KEYS[3], '1', 'EX', ARGV[6])
+  redis.call('del', KEYS[1])
+  return 1
+end
+return 0
+"""
+
+# Takes one of `limit` slots. Slots are leased so that a worker killed while
+# holding one does not shrink the bulkhead for good.
+ACQUIRE_SCRIPT = """
+redis.call('zremrangebyscore', KEYS[1], '-inf', ARGV[1])
+if redis.call('zcard', KEYS[1]) < tonumber(ARGV[2]) then
+  redis.call('zadd', KEYS[1], ARGV[3], ARGV[4])
+  redis.call('expire', KEYS[1], ARGV[5])
+  return 1
+end
+return 0
+"""
+
+class CircuitBreaker:
+  # Shared across all workers through Redis. Closed: calls pass and are
+  # counted per window. Open: calls fail fast with CircuitOpen until
+  # `open_seconds` pass. Half-open: a single probe call is let through; its
+  # outcome closes the circuit or opens it again.
+  def __init__(
+    self,
+    name: str,
+    failure_rate: float,
+    min_calls: int,
+    window: int,
+    slow_call_ms: float,
+    open_seconds: int,
+  ) -> None:
+    self.name = name
+    self.failure_rate = failure_rate
+    self.min_calls = min_calls
+    self.window = window
+    self.slow_call_ms = slow_call_ms
+    self.open_seconds = open_seconds
+    self.stats_key = f'circuit:{name}:stats'
+    self.open_key = f'circuit:{name}:open'
+    self.tripped_key = f'circuit:{name}:tripped'
+    self.probe_key = f'circuit:{name}:probe'
+
+  @property
+  def redis(self):
+    return get_redis_connection('default')
+
+  def before_call(self) -> bool:
+    # Returns True when the call is the half-open probe.
+    pipeline = self.redis.pipeline()
+    pipeline.ttl(self.open_key)
+    pipeline.exists(self.tripped_key)
+    open_ttl, tripped = pipeline.execute()
+
+    if open_ttl and open_ttl > 0:
+      raise CircuitOpen(self.name, open_ttl)
+    if not tripped:
+      return False
+    if self.redis.set(self.probe_key, '1', nx=True, ex=self.open_seconds):
+      return True
+    raise CircuitOpen(self.name, self.open_seconds)
+
+  def record(self, failed: bool, probe: bool) -> None:
+    if probe:
+      if failed:
+        self.trip()
+      else:
+        self.redis.delete(self.tripped_key, self.probe_key, self.stats_key)
+        logger.info(f'Circuit {self.name} closed')
+      return
+
+    tripped = self.redis.eval(
+      RECORD_SCRIPT,
+      3,
+      self.stats_key,
+      self.open_key,
+      self.tripped_key,
+      int(failed),
+      self.window,
+      self.min_calls,
+      self.failure_rate,
+      self.open_seconds,
+      self.open_seconds * 4,
+    )
+    if tripped:
+      logger.warning(f'Circuit {self.name} opened for {self.open_seconds}s')
+
+  def trip(self) -> None:
+    pipeline = self.redis.pipeline()
+    pipeline.set(self.open_key, '1', ex=self.open_seconds)
+    pipeline.set(self.tripped_key, '1', ex=self.open_seconds * 4)
+    pipeline.delete(self.probe_key, self.stats_key)
+    pipeline.execute()
+    logger.warning(f'Circuit {self.name} re-opened for {self.open_seconds}s')
+
+  def state(self) -> str:
+    if self.redis.exists(self.open_key):
+      return 'open'
+    if self.redis.exists(self.tripped_key):
+      return 'half_open'
+    return 'closed'
+
+class Bulkhead:
+  def __init__(self, name: str, limit: int, lease_seconds: int) -> None:
+    self.name = name
+    self.limit = limit
+    self.lease_seconds = lease_seconds
+    self.key = f'bulkhead:{name}'
+
+  def acquire(self) -> str:
+    token = uuid.uuid4().hex
+    now = time.time()
+    acquired = get_redis_connection('default').eval(
+      ACQUIRE_SCRIPT,
+      1,
+      self.key,
+      now,
+      self.limit,
+      now + self.lease_seconds,
+      token,
+      self.lease_seconds,
+    )
+    if not acquired:
+      raise BulkheadFull(self.name, 1)
+    return token
+
+  def release(self, token: str) -> None:
+    get_redis_connection('default').zrem(self.key, token)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_bulkheads: Dict[str, Bulkhead] = {}
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+  if name not in _breakers:
+    config = settings.CIRCUIT_BREAKERS[name]
+    _breakers[name] = CircuitBreaker(
+      name,
+      failure_rate=config['FAILURE_RATE'],
+      min_calls=config['MIN_CALLS'],
+      window=config['WINDOW'],
+      slow_call_ms=config['SLOW_CALL_MS'],
+      open_seconds=config['OPEN_SECONDS'],
+    )
+  return _breakers[name]
+
+def get_bulkhead(name: str) -> Bulkhead:
+  if name not in _bulkheads:
+    _bulkheads[name] = Bulkhead(name, settings.BULKHEADS[name], settings.CELERY_TASK_TIME_LIMIT)
+  return _bulkheads[name]
+
+@contextmanager
+def dependency_guard(dependency: str, bulkhead: Optional[str]=None) -> Iterator[None]:
+  # Fails fast while the dependency's circuit is open or its bulkhead is
+  # full. If Redis itself is unreachable calls are let through unguarded.
+  breaker = get_circuit_breaker(dependency)
+  slots = get_bulkhead(bulkhead or dependency)
+  try:
+    probe = breaker.before_call()
+    try:
+      token = slots.acquire()
+    except BulkheadFull:
+      if probe:
+        breaker.redis.delete(breaker.probe_key)
+      raise
+  except RedisError as e:
+    logger.warning(f'Circuit breaker for {dependency} unavailable: {str(e)}')
+    token = None
+
+  if token is None:
+    yield
+    return
+
+  start = time.perf_counter()
+  failed = True
+  try:
+    yield
+    failed = (time.perf_counter() - start) * 1000 > breaker.slow_call_ms
+  finally:
+    try:
+      slots.release(token)
+      breaker.record(failed, probe)
+    except RedisError as e:
+      logger.warning(f'Failed to record {dependency} call outcome: {str(e)}')
+
+def retry_countdown(retries: int, error: Exception) -> float:
+  # Exponential backoff with jitter, never earlier than the circuit reopens.
+  backoff = min(settings.DEPENDENCY_RETRY_BACKOFF_MAX, 2 ** retries * settings.DEPENDENCY_RETRY_BACKOFF)
+  return max(getattr(error, 'retry_after', 0), backoff) + random.uniform(0, settings.DEPENDENCY_RETRY_BACKOFF)
@@ -0,0 +1,90 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django_redis.cache import RedisCache
+
+class RequestMetrics:
+  __slots__ = ('db_queries', 'db_ms', 'cache_hits', 'cache_misses', 'cache_ms', 'serialize_ms', 'view_ms')
+
+  def __init__(self) -> None:
+    self.db_queries = 0
+    self.db_ms = 0.0
+    self.cache_hits = 0
+    self.cache_misses = 0
+    self.cache_ms = 0.0
+    self.serialize_ms = 0.0
+    self.view_ms = 0.0
+
+  def sql_wrapper(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+    start = time.perf_counter()
+    try:
+      return execute(sql, params, many, context)
+    finally:
+      self.db_queries += 1
+      self.db_ms += (time.perf_counter() - start) * 1000
+
+  def server_timing(self) -> str:
+    return ', '.join([
+      f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"',
+      f'cache;dur={self.cache_ms:.1f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+      f'serialize;dur={self.serialize_ms:.1f}',
+      f'view;dur={self.view_ms:.1f}',
+    ])
+
+  def as_log_fields(self) -> Dict[str, Any]:
+    return {
+      'db_queries': self.db_queries,
+      'db_ms': round(self.db_ms, 1),
+      'cache_hits': self.cache_hits,
+      'cache_misses': self.cache_misses,
+      'cache_ms': round(self.cache_ms, 1),
+      'serialize_ms': round(self.serialize_ms, 1),
+      'view_ms': round(self.view_ms, 1),
+    }
+
+# Set by RequestInstrumentationMiddleware for the duration of a request.
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar('request_metrics', default=None)
+
+_MISSING = object()
+
+class InstrumentedRedisCache(RedisCache):
+  # Counts hits and misses for the current request. Outside an instrumented
+  # request this is a single context variable lookup per call.
+  def get(self, key: Any, default: Any=None, version: Optional[int]=None, client: Any=None) -> Any:
+    metrics = current_metrics.get()
+    if metrics is None:
+      return super().get(key, default=default, version=version, client=client)
+
+    start = time.perf_counter()
+    value = super().get(key, default=_MISSING, version=version, client=client)
+    metrics.cache_ms += (time.perf_counter() - start) * 1000
+    if value is _MISSING:
+      metrics.cache_misses += 1
+      return default
+    metrics.cache_hits += 1
+    return value
+
+  def get_many(self, keys: Iterable[Any], version: Optional[int]=None, client: Any=None) -> Dict[Any, Any]:
+    metrics = current_metrics.get()
+    if metrics is None:
+      return super().get_many(keys, version=version, client=client)
+
+    keys = list(keys)
+    start = time.perf_counter()
+    values = super().get_many(keys, version=version, client=client)
+    metrics.cache_ms += (time.perf_counter() - start) * 1000
+    metrics.cache_hits += len(values)
+    metrics.cache_misses += len(keys) - len(values)
+    return values
+
+  def set(self, *args: Any, **kwargs: Any) -> Any:
+    metrics = current_metrics.get()
+    if metrics is None:
+      return super().set(*args, **kwargs)
+
+    start = time.perf_counter()
+    try:
+      return super().set(*args, **kwargs)
+    finally:
+      metrics.cache_ms += (time.perf_counter() - start) * 1000
@@ -0,0 +1,93 @@
+import socketserver
+import threading
+from typing import List, Optional, Tuple
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+  def reply(self, line: str) -> None:
+    self.wfile.write(f'{line}\r\n'.encode())
+
+  def read_data(self) -> bytes:
+    lines = []
+    while True:
+      line = self.rfile.readline()
+      if not line or line in (b'.\r\n', b'.\n'):
+        break
+      if line.startswith(b'..'):
+        line = line[1:]
+      lines.append(line)
+    return b''.join(lines)
+
+  def handle(self) -> None:
+    self.reply('220 local-smtp ready')
+    sender, recipients = None, []
+
+    while True:
+      line = self.rfile.readline()
+      if not line:
+        break
+      command = line.decode(errors='replace').strip()
+      verb = command[:4].upper()
+
+      if verb == 'EHLO':
+        self.reply('250-local-smtp')
+        self.reply('250 HELP')
+      elif verb == 'HELO':
+        self.reply('250 local-smtp')
+      elif verb == 'MAIL':
+        sender, recipients = command[10:].strip(), []
+        self.reply('250 OK')
+      elif verb == 'RCPT':
+        recipients.append(command[8:].strip())
+        self.reply('250 OK')
+      elif verb == 'DATA':
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        self.server.record(sender, recipients, self.read_data())
+        self.reply('250 OK')
+      elif verb == 'RSET':
+        sender, recipients = None, []
+        self.reply('250 OK')
+      elif verb == 'NOOP':
+        self.reply('250 OK')
+      elif verb == 'QUIT':
+        self.reply('221 Bye')
+        break
+      else:
+        self.reply('502 Command not implemented')
+
+# Minimal SMTP sink used as a stand-in for the real server in benchmarks.
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self, host: str='127.0.0.1', port: int=0, keep_messages: bool=False) -> None:
+    super().__init__((host, port), SMTPHandler)
+    self.keep_messages = keep_messages
+    self.messages: List[Tuple[Optional[str], List[str], bytes]] = []
+    self.message_count = 0
+    self.connection_count = 0
+    self._lock = threading.Lock()
+    self._thread: Optional[threading.Thread] = None
+
+  @property
+  def port(self) -> int:
+    return self.server_address[1]
+
+  def process_request(self, request, client_address) -> None:
+    with self._lock:
+      self.connection_count += 1
+    super().process_request(request, client_address)
+
+  def record(self, sender: Optional[str], recipients: List[str], data: bytes) -> None:
+    with self._lock:
+      self.message_count += 1
+      if self.keep_messages:
+        self.messages.append((sender, recipients, data))
+
+  def start(self) -> 'LocalSMTPServer':
+    self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self) -> None:
+    self.shutdown()
+    self.server_close()
@@ -0,0 +1,99 @@
+import smtplib
+import threading
+import time
+from typing import List
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.smtp import EmailBackend
+
+from loguru import logger
+
+from .circuit_breaker import dependency_guard
+from .tracing import span
+
+_local = threading.local()
+
+class PartialDelivery(smtplib.SMTPException):
+  # Delivery stopped after the first `sent` messages were accepted, so only
+  # the rest may be retried.
+  def __init__(self, sent: int, error: Exception) -> None:
+    super().__init__(f'{sent} messages sent before: {str(error)}')
+    self.sent = sent
+
+class TracedSMTPBackend(EmailBackend):
+  # Records the SMTP handshake and each delivery as spans of the request that
+  # queued the email, for templated emails and djcelery_email alike.
+  def open(self) -> bool:
+    if self.connection:
+      return False
+    with span('smtp_connect', host=self.host):
+      return super().open()
+
+  def send_messages(self, email_messages: List[EmailMessage]) -> int:
+    with span('smtp_send', messages=len(email_messages)):
+      return super().send_messages(email_messages)
+
+def get_delivery_backend() -> str:
+  return getattr(settings, 'CELERY_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+
+def close_pooled_connection() -> None:
+  connection = getattr(_local, 'connection', None)
+  _local.connection = None
+  if connection is not None:
+    try:
+      connection.close()
+    except Exception as e:
+      logger.warning(f'Failed to close pooled email connection: {str(e)}')
+
+def get_pooled_connection():
+  # One open connection per worker thread, recycled after EMAIL_POOL_MAX_MESSAGES
+  # messages or EMAIL_POOL_IDLE_TIMEOUT seconds without use.
+  connection = getattr(_local, 'connection', None)
+  now = time.monotonic()
+
+  if connection is not None and (
+    now - _local.last_used > settings.EMAIL_POOL_IDLE_TIMEOUT
+    or _local.sent >= settings.EMAIL_POOL_MAX_MESSAGES
+  ):
+    close_pooled_connection()
+    connection = None
+
+  if connection is None:
+    connection = get_connection(backend=get_delivery_backend(), fail_silently=False)
+    connection.open()
+    _local.connection = connection
+    _local.sent = 0
+
+  _local.last_used = now
+  return connection
+
+def deliver_messages(messages: List[EmailMessage], bulkhead: str='smtp') -> int:
+  if not messages:
+    return 0
+
+  sent = 0
+  with dependency_guard('smtp', bulkhead):
+    connection = get_pooled_connection()
+    index = 0
+    retried = False
+    # Messages go out one at a time so a failure shows which were accepted.
+    while index < len(messages):
+      try:
+        sent += connection.send_messages([messages[index]]) or 0
+      except Exception as e:
+        close_pooled_connection()
+        # The server dropped an idle pooled connection. Retry once on a fresh
+        # one, but only before anything went out; resending accepted
+        # messages would deliver duplicates.
+        if index == 0 and not retried and isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)):
+          retried = True
+          connection = get_pooled_connection()
+          continue
+        if index == 0:
+          raise
+        raise PartialDelivery(index, e) from e
+      index += 1
+
+  _local.sent += sent
+  return sent
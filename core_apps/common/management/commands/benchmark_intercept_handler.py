@@ -0,0 +1,61 @@
+import logging
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from loguru import logger
+
+from interceptor import InterceptHandler
+
+class FrameWalkingInterceptHandler(logging.Handler):
+  # The previous handler: resolves the level and walks the stack to find the
+  # caller on every record.
+  def emit(self, record: logging.LogRecord) -> None:
+    try:
+      level = logger.level(record.levelname).name
+    except ValueError:
+      level = record.levelno
+
+    frame, depth = logging.currentframe(), 2
+    while frame.f_code.co_filename == logging.__file__:
+      frame = frame.f_back
+      depth += 1
+
+    logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+class Command(BaseCommand):
+  help = 'Measure the cost per record of bridging stdlib logging into loguru.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--records', type=int, default=50_000)
+
+  def measure(self, handler: logging.Handler, level: int, records: int) -> float:
+    # A query log line as django.db.backends emits it.
+    bench_logger = logging.getLogger('benchmark.intercept')
+    bench_logger.handlers = [handler]
+    bench_logger.propagate = False
+    bench_logger.setLevel(level)
+
+    start = time.perf_counter()
+    for i in range(records):
+      bench_logger.debug('(%.3f) %s; args=%s; alias=%s', 0.001, 'SELECT "user_auth_user"."id" FROM "user_auth_user"', (i,), 'default')
+    return (time.perf_counter() - start) / records * 1_000_000
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    records = options['records']
+    # A sink that drops messages keeps file I/O out of the measurement, but
+    # records are still formatted.
+    logger.configure(handlers=[{'sink': lambda message: None, 'level': 'DEBUG', 'format': settings.LOG_FORMAT}])
+    try:
+      self.stdout.write(f'{records} DEBUG records per handler')
+      frame_walking = self.measure(FrameWalkingInterceptHandler(), logging.DEBUG, records)
+      cached = self.measure(InterceptHandler(), logging.DEBUG, records)
+      filtered = self.measure(InterceptHandler(), logging.INFO, records)
+      self.stdout.write(f'  frame walking        {frame_walking:8.2f} us/record')
+      self.stdout.write(f'  cached, LogRecord    {cached:8.2f} us/record ({frame_walking / cached:.1f}x)')
+      self.stdout.write(f'  filtered at INFO     {filtered:8.2f} us/record ({frame_walking / filtered:.0f}x)')
+    finally:
+      logging.getLogger('benchmark.intercept').handlers = []
+      logger.configure(**settings.LOGURU_LOGGING)
@@ -0,0 +1,104 @@
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from loguru import logger
+
+# Roughly the level mix of the API's request logs.
+LEVELS = ['DEBUG'] * 15 + ['INFO'] * 80 + ['WARNING'] * 5
+
+def percentile(values: List[float], pct: float) -> float:
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+class Command(BaseCommand):
+  help = 'Measure log calls per second from concurrent request threads in the sync and async logging modes.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent logging threads.')
+    parser.add_argument('--messages', type=int, default=5000, help='Log calls per thread.')
+    parser.add_argument('--sample-rate', type=float, default=settings.LOG_SAMPLE_RATE, help='DEBUG/INFO sample rate in async mode.')
+    parser.add_argument('--rotation', default='5 MB', help='Small enough to rotate, and compress, during the run.')
+
+  def handlers(self, root: Path, options: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    warning = logger.level('WARNING').no
+    rate = options['sample_rate']
+    return {
+      'sync': [{
+        'sink': root / 'sync' / 'debug.log',
+        'level': 'DEBUG',
+        'format': settings.LOG_FORMAT,
+        'rotation': options['rotation'],
+        'compression': 'zip',
+      }],
+      'async': [{
+        'sink': root / 'async' / 'debug.json',
+        'level': 'DEBUG',
+        'filter': lambda record: record['level'].no >= warning or random.random() < rate,
+        'serialize': True,
+        'enqueue': True,
+        'rotation': options['rotation'],
+        'compression': 'gz',
+      }],
+    }
+
+  def log_from_thread(self, count: int, barrier: threading.Barrier) -> List[float]:
+    levels = [random.choice(LEVELS) for _ in range(count)]
+    request_logger = logger.bind(request_id=threading.get_ident())
+    samples = []
+    barrier.wait()
+    for i, level in enumerate(levels):
+      start = time.perf_counter()
+      request_logger.log(level, f'GET /api/v1/profiles/my-profile/ 200 db_queries=4 db_ms=3.2 iteration={i}')
+      samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+  def run(self, mode: str, handlers: List[Dict[str, Any]], options: Dict[str, Any]) -> None:
+    logger.configure(handlers=handlers)
+    barrier = threading.Barrier(options['threads'])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+      results = list(executor.map(
+        lambda _: self.log_from_thread(options['messages'], barrier),
+        range(options['threads']),
+      ))
+    elapsed = time.perf_counter() - start
+
+    # Wait for the background writer, so the drain time shows how far it
+    # fell behind the callers.
+    drain_start = time.perf_counter()
+    logger.complete()
+    drain = time.perf_counter() - drain_start
+    logger.remove()
+
+    samples = [sample for thread_samples in results for sample in thread_samples]
+    files = list(Path(handlers[0]['sink']).parent.iterdir())
+    self.stdout.write(
+      f'{mode:<6} {len(samples) / elapsed:>10.0f} calls/s  p50 {percentile(samples, 50):7.1f} us  '
+      f'p99 {percentile(samples, 99):8.1f} us  max {max(samples):10.1f} us  '
+      f'drain {drain:6.2f}s  {len(files)} files'
+    )
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    root = Path(tempfile.mkdtemp(prefix='log-bench-'))
+    self.stdout.write(
+      f'{options["threads"]} threads x {options["messages"]} log calls, '
+      f'async sample rate {options["sample_rate"]}, rotation {options["rotation"]}'
+    )
+    try:
+      for mode, handlers in self.handlers(root, options).items():
+        self.run(mode, handlers, options)
+    finally:
+      logger.configure(**settings.LOGURU_LOGGING)
+      shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,105 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from config.celery_app import app
+from core_apps.common.tasks import benchmark_cpu_task, benchmark_io_task
+
+BENCHMARK_QUEUE = 'benchmark'
+
+def process_tree_rss_kb(pid: int) -> int:
+  total, pids = 0, [pid]
+  while pids:
+    current = pids.pop()
+    try:
+      with open(f'/proc/{current}/status') as status:
+        for line in status:
+          if line.startswith('VmRSS:'):
+            total += int(line.split()[1])
+      for task in os.listdir(f'/proc/{current}/task'):
+        with open(f'/proc/{current}/task/{task}/children') as children:
+          pids.extend(int(child) for child in children.read().split())
+    except (FileNotFoundError, ProcessLookupError):
+      continue
+  return total
+
+class Command(BaseCommand):
+  help = 'Measure tasks/second and memory footprint of Celery worker pools for I/O and CPU bound tasks.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--pools', nargs='+', default=['prefork', 'threads'])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--io-delay', type=float, default=0.2, help='Seconds each I/O task blocks.')
+    parser.add_argument('--cpu-rounds', type=int, default=200_000)
+
+  def start_worker(self, pool: str, concurrency: int) -> tuple:
+    nodename = f'bench-{pool}@{socket.gethostname()}'
+    env = {**os.environ, 'CELERY_WORKER_POOL': pool}
+    process = subprocess.Popen(
+      [
+        sys.executable, '-m', 'celery', '-A', 'config.celery_app', 'worker',
+        '-P', pool, '-c', str(concurrency), '-Q', BENCHMARK_QUEUE, '-n', nodename,
+        '-l', 'WARNING', '--without-gossip', '--without-mingle', '--without-heartbeat',
+      ],
+      env=env,
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+      if app.control.ping(destination=[nodename], timeout=1):
+        return process, nodename
+      if process.poll() is not None:
+        break
+    process.terminate()
+    raise CommandError(f'Worker with {pool} pool did not start')
+
+  def run_batch(self, process: subprocess.Popen, signatures: List[Any]) -> tuple:
+    peak_rss = [process_tree_rss_kb(process.pid)]
+    done = threading.Event()
+
+    def sample() -> None:
+      while not done.wait(0.2):
+        peak_rss.append(process_tree_rss_kb(process.pid))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    results = [signature.apply_async(queue=BENCHMARK_QUEUE) for signature in signatures]
+    for result in results:
+      result.get(timeout=600)
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    sampler.join()
+    return len(results) / elapsed, max(peak_rss) / 1024
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    count = options['tasks']
+    workloads = {
+      'io': [benchmark_io_task.s(options['io_delay']) for _ in range(count)],
+      'cpu': [benchmark_cpu_task.s(options['cpu_rounds']) for _ in range(count)],
+    }
+
+    self.stdout.write(f'{"pool":<10} {"workload":<8} {"tasks/s":>9} {"peak RSS MB":>12} {"tasks/s per 100MB":>18}')
+    for pool in options['pools']:
+      process, nodename = self.start_worker(pool, options['concurrency'])
+      try:
+        for workload, signatures in workloads.items():
+          rate, rss_mb = self.run_batch(process, signatures)
+          self.stdout.write(
+            f'{pool:<10} {workload:<8} {rate:9.1f} {rss_mb:12.1f} {rate * 100 / rss_mb:18.2f}'
+          )
+      finally:
+        app.control.shutdown(destination=[nodename])
+        try:
+          process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+          process.kill()
@@ -0,0 +1,278 @@
+import io
+import random
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.crypto import RANDOM_STRING_CHARS
+
+from core_apps.common.models import ContentView
+from core_apps.user_profile.models import NextOfKin, Profile
+
+User = get_user_model()
+
+EMAIL_DOMAIN = 'synthetic.example'
+# Timestamps are offsets from a fixed reference time, not the wall clock, so
+# the same seed always produces the same rows.
+DEFAULT_NOW = '2026-01-01T00:00:00+00:00'
+
+FIRST_NAMES = [
+  'Amina', 'Brian', 'Chloe', 'David', 'Esther', 'Felix', 'Grace', 'Hassan', 'Irene', 'James',
+  'Kofi', 'Lucy', 'Mohammed', 'Naomi', 'Otieno', 'Priya', 'Quentin', 'Rosa', 'Samuel', 'Tanya',
+  'Umar', 'Vera', 'Wanjiru', 'Xavier', 'Yusuf', 'Zainab',
+]
+LAST_NAMES = [
+  'Achieng', 'Baker', 'Chen', 'Diallo', 'Evans', 'Fernandez', 'Garcia', 'Hughes', 'Ibrahim', 'Johnson',
+  'Kamau', 'Lopez', 'Mensah', 'Nguyen', 'Okafor', 'Patel', 'Quinn', 'Rossi', 'Smith', 'Tanaka',
+  'Usman', 'Volkov', 'Wambui', 'Xu', 'Yamamoto', 'Zulu',
+]
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Lagos', 'Accra', 'London', 'New York', 'Toronto', 'Mumbai', 'Berlin']
+RELATIONSHIPS = ['Spouse', 'Parent', 'Sibling', 'Child', 'Cousin', 'Friend']
+
+def encode(value: Any) -> str:
+  # Postgres COPY text format.
+  if value is None:
+    return r'\N'
+  if isinstance(value, bool):
+    return 't' if value else 'f'
+  if isinstance(value, (datetime, date)):
+    return value.isoformat()
+  text = str(value)
+  if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+    text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+  return text
+
+def uuid4_hex(bits: int) -> str:
+  # The same value as str(uuid.UUID(int=bits, version=4)), without building a
+  # UUID object per row; Postgres accepts UUIDs without hyphens.
+  return '%032x' % (bits & ~(0xf000 << 64) & ~(0xc000 << 48) | 4 << 76 | 0x8000 << 48)
+
+def password_salt(seed: int) -> str:
+  # make_password() draws a random salt; derive it from the seed instead so
+  # the password column is reproducible too. 22 characters is what the
+  # hashers require for a full-strength salt.
+  rng = random.Random(seed)
+  return ''.join(rng.choices(RANDOM_STRING_CHARS, k=22))
+
+def reference_time(value: str) -> datetime:
+  parsed = datetime.fromisoformat(value)
+  return parsed if timezone.is_aware(parsed) else parsed.replace(tzinfo=dt_timezone.utc)
+
+class TableWriter:
+  # Encodes the columns that are the same for every row once, so each row
+  # only formats its varying values.
+  def __init__(self, model: type, varying: List[str], constants: Dict[str, Any]) -> None:
+    self.model = model
+    self.copy = connection.vendor == 'postgresql'
+    self.columns = []
+    self.constants = {}
+    parts = []
+    for field in model._meta.concrete_fields:
+      self.columns.append(connection.ops.quote_name(field.column))
+      if field.attname in varying:
+        parts.append('{%s}' % field.attname)
+        continue
+      value = constants[field.attname] if field.attname in constants else field.get_default()
+      self.constants[field.attname] = value
+      parts.append(encode(field.get_db_prep_save(value, connection)).replace('{', '{{').replace('}', '}}'))
+    self.template = '\t'.join(parts) + '\n'
+    self.buffer = io.StringIO()
+    self.instances = []
+    self.count = 0
+
+  def add(self, values: Dict[str, Any]) -> None:
+    # Generated values never contain COPY's special characters or None, so
+    # they are written as they are instead of going through encode().
+    self.count += 1
+    if self.copy:
+      self.buffer.write(self.template.format_map(values))
+    else:
+      self.instances.append(self.model(**self.constants, **values))
+
+  def flush(self) -> None:
+    if self.copy:
+      self.buffer.seek(0)
+      with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+          f'COPY {connection.ops.quote_name(self.model._meta.db_table)} '
+          f'({", ".join(self.columns)}) FROM STDIN WITH (FORMAT text)',
+          self.buffer,
+        )
+      self.buffer = io.StringIO()
+    else:
+      self.model.objects.bulk_create(self.instances, batch_size=1000)
+      self.instances = []
+
+class Command(BaseCommand):
+  help = 'Generate deterministic synthetic users, profiles, next of kin and profile views at scale.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--start', type=int, default=0, help='Index of the first generated user, to append to an earlier run.')
+    parser.add_argument('--kin-per-profile', type=int, default=2)
+    parser.add_argument('--views-per-profile', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=20_000, help='Users per COPY batch and transaction.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--password', default='Synthetic-Pass-123')
+    parser.add_argument('--now', type=reference_time, default=DEFAULT_NOW, help='Reference time generated timestamps count back from (ISO 8601).')
+    parser.add_argument('--clear', action='store_true', help=f'Delete previously generated @{EMAIL_DOMAIN} data first.')
+
+  def clear(self) -> None:
+    user_table = connection.ops.quote_name(User._meta.db_table)
+    profile_table = connection.ops.quote_name(Profile._meta.db_table)
+    synthetic_users = f"SELECT id FROM {user_table} WHERE email LIKE %s"
+    synthetic_profiles = f'SELECT id FROM {profile_table} WHERE user_id IN ({synthetic_users})'
+    pattern = f'%@{EMAIL_DOMAIN}'
+    with transaction.atomic(), connection.cursor() as cursor:
+      cursor.execute(
+        f'DELETE FROM {connection.ops.quote_name(ContentView._meta.db_table)} '
+        f'WHERE object_id IN ({synthetic_profiles}) OR user_id IN ({synthetic_users})',
+        [pattern, pattern],
+      )
+      cursor.execute(
+        f'DELETE FROM {connection.ops.quote_name(NextOfKin._meta.db_table)} WHERE profile_id IN ({synthetic_profiles})',
+        [pattern],
+      )
+      cursor.execute(f'DELETE FROM {profile_table} WHERE user_id IN ({synthetic_users})', [pattern])
+      cursor.execute(f'DELETE FROM {user_table} WHERE email LIKE %s', [pattern])
+      self.stdout.write(f'Removed {cursor.rowcount} synthetic users and their data')
+
+  def generate(self, writers: Dict[str, TableWriter], batch: range, options: Dict[str, Any]) -> None:
+    now = options['now']
+    today = now.date()
+    content_type_id = ContentType.objects.get_for_model(Profile).id
+    # Choices are rebuilt on every access to .values, so look them up once.
+    genders = Profile.Gender.values
+    security_questions = User.SecurityQuestions.values
+    marital_statuses = Profile.MaritalStatus.values
+    employment_statuses = Profile.EmploymentStatus.values
+    # Seeding per user keeps users, profiles and next of kin reproducible
+    # regardless of batch size or where a run starts. The user ID is the first
+    # draw, so viewers' IDs are worked out up front. Draws use random() rather
+    # than randrange() and choice(), which cost several times more per call.
+    rng = random.Random()
+    draw = rng.random
+    bits = rng.getrandbits
+    seed = options['seed'] * 1_000_003
+    user_ids = []
+    for index in batch:
+      rng.seed(seed + index)
+      user_ids.append(uuid4_hex(bits(128)))
+
+    kin_per_profile = options['kin_per_profile']
+    views_per_profile = min(options['views_per_profile'], len(batch) - 1)
+    for position, (index, user_id) in enumerate(zip(batch, user_ids)):
+      rng.seed(seed + index)
+      bits(128)
+      profile_id = uuid4_hex(bits(128))
+      last_name = LAST_NAMES[int(draw() * len(LAST_NAMES))]
+      gender = genders[int(draw() * len(genders))]
+
+      writers['user'].add({
+        'id': user_id,
+        'username': f'SY-{index:09d}',
+        'email': f'user{index}@{EMAIL_DOMAIN}',
+        'first_name': FIRST_NAMES[int(draw() * len(FIRST_NAMES))],
+        'last_name': last_name,
+        'id_no': 100_000_000 + index,
+        'security_question': security_questions[int(draw() * len(security_questions))],
+        'date_joined': now - timedelta(seconds=int(draw() * 3650 * 86400)),
+      })
+      income = int(draw() * 20_000_000)
+      writers['profile'].add({
+        'id': profile_id,
+        'user_id': user_id,
+        'title': Profile.Salutation.MR.value if gender == Profile.Gender.MALE else ('mrs', 'miss')[int(draw() * 2)],
+        'gender': gender,
+        'date_of_birth': today - timedelta(days=18 * 365 + int(draw() * 62 * 365)),
+        'marital_status': marital_statuses[int(draw() * len(marital_statuses))],
+        'phone_number': f'+2547{int(draw() * 10 ** 8):08d}',
+        'city': CITIES[int(draw() * len(CITIES))],
+        'employment_status': employment_statuses[int(draw() * len(employment_statuses))],
+        'annual_income': f'{income // 100}.{income % 100:02d}',
+      })
+      for k in range(kin_per_profile):
+        writers['kin'].add({
+          'id': uuid4_hex(bits(128)),
+          'profile_id': profile_id,
+          'first_name': FIRST_NAMES[int(draw() * len(FIRST_NAMES))],
+          'last_name': last_name,
+          'date_of_birth': today - timedelta(days=365 + int(draw() * 89 * 365)),
+          'relationship': RELATIONSHIPS[int(draw() * len(RELATIONSHIPS))],
+          'email_address': f'kin{k}.user{index}@{EMAIL_DOMAIN}',
+          'phone_number': f'+2547{int(draw() * 10 ** 8):08d}',
+          'is_primary': k == 0,
+        })
+      for k in range(views_per_profile):
+        # Viewers come from the same batch so their rows are committed
+        # together, and are distinct per profile to keep (content type,
+        # object, user, ip) unique.
+        writers['view'].add({
+          'id': uuid4_hex(bits(128)),
+          'content_type_id': content_type_id,
+          'object_id': profile_id,
+          'user_id': user_ids[(position + 1 + k) % len(batch)],
+          'viewer_ip': f'10.{int(draw() * 256)}.{int(draw() * 256)}.{1 + int(draw() * 254)}',
+          'last_viewed': now - timedelta(seconds=int(draw() * 90 * 86400)),
+        })
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    if options['clear']:
+      self.clear()
+
+    now = options['now']
+    timestamps = {'created_at': now, 'updated_at': now}
+    writers = {
+      'user': TableWriter(
+        User,
+        ['id', 'username', 'email', 'first_name', 'last_name', 'id_no', 'security_question', 'date_joined'],
+        {'password': make_password(options['password'], salt=password_salt(options['seed'])), 'security_answer': 'synthetic', 'is_active': True},
+      ),
+      'profile': TableWriter(
+        Profile,
+        ['id', 'user_id', 'title', 'gender', 'date_of_birth', 'marital_status', 'phone_number', 'city', 'employment_status', 'annual_income'],
+        timestamps,
+      ),
+      'kin': TableWriter(
+        NextOfKin,
+        ['id', 'profile_id', 'first_name', 'last_name', 'date_of_birth', 'relationship', 'email_address', 'phone_number', 'is_primary'],
+        {**timestamps, 'address': 'Unknown', 'city': 'Nairobi', 'country': 'KE'},
+      ),
+      'view': TableWriter(
+        ContentView,
+        ['id', 'content_type_id', 'object_id', 'user_id', 'viewer_ip', 'last_viewed'],
+        timestamps,
+      ),
+    }
+
+    method = 'COPY' if connection.vendor == 'postgresql' else 'bulk_create'
+    self.stdout.write(f'Generating {options["users"]} users with seed {options["seed"]} using {method}')
+    start = time.perf_counter()
+    end = options['start'] + options['users']
+    generating = 0.0
+
+    for batch_start in range(options['start'], end, options['batch_size']):
+      batch = range(batch_start, min(batch_start + options['batch_size'], end))
+      generate_start = time.perf_counter()
+      self.generate(writers, batch, options)
+      generating += time.perf_counter() - generate_start
+      # Users go first so the later tables' foreign keys resolve.
+      with transaction.atomic():
+        for writer in writers.values():
+          writer.flush()
+
+      rows = sum(writer.count for writer in writers.values())
+      elapsed = time.perf_counter() - start
+      self.stdout.write(
+        f'  {batch.stop - options["start"]:>10} users, {rows:>11} rows, {rows / elapsed:>9.0f} rows/s '
+        f'({generating:.1f}s generating, {elapsed - generating:.1f}s writing)'
+      )
+
+    counts = ', '.join(f'{writer.count} {name}' for name, writer in writers.items())
+    self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - start:.1f}s: {counts}'))
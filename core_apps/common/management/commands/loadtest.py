@@ -0,0 +1,375 @@
+import json
+import random
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from config.celery_app import app
+from core_apps.common.local_smtp import LocalSMTPServer
+from core_apps.common.mail import close_pooled_connection
+from core_apps.user_profile.models import Profile
+
+User = get_user_model()
+
+PASSWORD = 'Loadtest-Pass-7315'
+LOCAL_MEDIA_BACKEND = 'core_apps.common.media_storage.LocalMediaStorage'
+
+def percentile(values: List[float], pct: float) -> float:
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+def error_rate(stats: Dict[str, Any]) -> float:
+  return sum(stats['errors'].values()) / stats['count'] if stats['count'] else 0.0
+
+def find_id(data: Any) -> Optional[str]:
+  # Responses are wrapped by GenericJSONRenderer, so look for the id at any depth.
+  if isinstance(data, dict):
+    if 'id' in data:
+      return data['id']
+    for value in data.values():
+      found = find_id(value)
+      if found:
+        return found
+  return None
+
+class ClientSession:
+  # Drives the API in-process through the Django test client.
+  def __init__(self, address: str) -> None:
+    self.client = Client(SERVER_NAME='localhost', HTTP_X_FORWARDED_FOR=address)
+
+  def request(self, method: str, path: str, payload: Any=None) -> Tuple[int, bytes]:
+    if payload is None:
+      response = getattr(self.client, method)(path)
+    else:
+      response = getattr(self.client, method)(path, data=payload, content_type='application/json')
+    return response.status_code, response.content
+
+class HTTPSession:
+  # Drives a running server over HTTP, keeping its auth cookies.
+  def __init__(self, base_url: str, address: str) -> None:
+    self.base_url = base_url.rstrip('/')
+    self.address = address
+    self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+  def request(self, method: str, path: str, payload: Any=None) -> Tuple[int, bytes]:
+    request = Request(
+      f'{self.base_url}{path}',
+      data=None if payload is None else json.dumps(payload).encode(),
+      method=method.upper(),
+      headers={'Content-Type': 'application/json', 'X-Forwarded-For': self.address},
+    )
+    try:
+      with self.opener.open(request, timeout=30) as response:
+        return response.status, response.read()
+    except HTTPError as e:
+      return e.code, e.read()
+
+class Recorder:
+  # Latencies are only kept for responses with the expected status, so fast
+  # failures do not pull the percentiles down; they are counted as errors.
+  def __init__(self) -> None:
+    self.counts: Dict[str, int] = {}
+    self.samples: Dict[str, List[float]] = {}
+    self.errors: Dict[str, Dict[str, int]] = {}
+    self.enabled = False
+    self._lock = threading.Lock()
+
+  def record(self, name: str, elapsed_ms: float, status: int, expected: int) -> None:
+    if not self.enabled:
+      return
+    with self._lock:
+      self.counts[name] = self.counts.get(name, 0) + 1
+      samples = self.samples.setdefault(name, [])
+      if status == expected:
+        samples.append(elapsed_ms)
+      else:
+        errors = self.errors.setdefault(name, {})
+        errors[str(status)] = errors.get(str(status), 0) + 1
+
+  def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+    return {
+      name: {
+        'count': self.counts[name],
+        'errors': self.errors.get(name, {}),
+        'rps': len(values) / elapsed,
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+        'max_ms': max(values, default=0.0),
+      }
+      for name, values in sorted(self.samples.items())
+    }
+
+class Command(BaseCommand):
+  help = (
+    'Load test the API end to end: login, OTP verify, profile reads and updates, next of kin CRUD '
+    'and branch manager list/search. Reports per-endpoint latency and throughput and compares '
+    'them against a saved baseline.'
+  )
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--customers', type=int, default=20, help='Concurrent customer sessions.')
+    parser.add_argument('--managers', type=int, default=2, help='Concurrent branch manager sessions.')
+    parser.add_argument('--iterations', type=int, default=10, help='Scenario runs per session.')
+    parser.add_argument('--warmup', type=int, default=1, help='Unrecorded scenario runs per session.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument(
+      '--base-url',
+      help='Drive a running server over HTTP instead of in-process. It must share this database and '
+           'cache, send mail to a local SMTP sink and set COOKIE_SECURE=False.'
+    )
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=20.0, help='Allowed p95 and throughput regression in percent.')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Ignore p95 regressions smaller than this.')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='Allowed unexpected statuses per endpoint in percent.')
+
+  def create_users(self, run_id: str, customers: int, managers: int) -> List[Any]:
+    id_base = random.randint(10_000, 200_000) * 10_000
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create([
+      User(
+        username=f'LT{run_id[:6].upper()}{i}',
+        email=f'loadtest-{run_id}-{i}@example.com',
+        password=password,
+        first_name=f'Load{i}',
+        last_name=f'Test{run_id[:6]}',
+        id_no=id_base + i,
+        security_question=User.SecurityQuestions.MAIDEN_NAME,
+        security_answer='loadtest',
+        role=User.RoleChoices.BRANCH_MANAGER if i < managers else User.RoleChoices.CUSTOMER,
+      )
+      for i in range(customers + managers)
+    ])
+    Profile.objects.bulk_create([Profile(user=user) for user in users])
+    return users
+
+  def call(self, session: Any, recorder: Recorder, name: str, method: str, path: str, payload: Any=None, expected: int=200) -> Any:
+    start = time.perf_counter()
+    status, content = session.request(method, path, payload)
+    recorder.record(name, (time.perf_counter() - start) * 1000, status, expected)
+    if status != expected:
+      return None
+    try:
+      return json.loads(content) if content else {}
+    except ValueError:
+      return {}
+
+  def login(self, session: Any, recorder: Recorder, user: Any) -> bool:
+    if self.call(session, recorder, 'login:post', 'post', reverse('login'), {'email': user.email, 'password': PASSWORD}) is None:
+      return False
+    otp = User.objects.filter(pk=user.pk).values_list('otp', flat=True).first()
+    return self.call(session, recorder, 'verify_otp:post', 'post', reverse('verify_otp'), {'otp': otp}) is not None
+
+  def customer_scenario(self, session: Any, recorder: Recorder, user: Any, rng: random.Random) -> None:
+    self.call(session, recorder, 'profile_detail', 'get', reverse('profile_detail'))
+    self.call(session, recorder, 'profile_detail:patch', 'patch', reverse('profile_detail'), {
+      'city': rng.choice(['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru']),
+    })
+    created = self.call(session, recorder, 'next-of-kin-list:post', 'post', reverse('next-of-kin-list'), {
+      'first_name': 'Kin',
+      'last_name': user.last_name,
+      'date_of_birth': '1985-05-05',
+      'relationship': rng.choice(['Sibling', 'Parent', 'Spouse']),
+      'email_address': f'kin-{uuid.uuid4().hex[:8]}@example.com',
+      'phone_number': f'+2547{rng.randrange(10 ** 8):08d}',
+      'address': '1 Loadtest Street',
+      'city': 'Nairobi',
+      'country': 'KE',
+      'is_primary': False,
+    }, expected=201)
+    self.call(session, recorder, 'next-of-kin-list', 'get', reverse('next-of-kin-list'))
+    kin_id = find_id(created)
+    if kin_id is None:
+      return
+    path = reverse('next-of-kin-detail', kwargs={'pk': kin_id})
+    self.call(session, recorder, 'next-of-kin-detail', 'get', path)
+    self.call(session, recorder, 'next-of-kin-detail:patch', 'patch', path, {'city': 'Kisumu'})
+    self.call(session, recorder, 'next-of-kin-detail:delete', 'delete', path, expected=204)
+
+  def manager_scenario(self, session: Any, recorder: Recorder, user: Any, rng: random.Random) -> None:
+    path = reverse('all_profiles')
+    self.call(session, recorder, 'all_profiles', 'get', path)
+    self.call(session, recorder, 'all_profiles', 'get', f'{path}?page={rng.randint(1, 3)}')
+    self.call(session, recorder, 'all_profiles:search', 'get', f'{path}?search={user.last_name}')
+    self.call(session, recorder, 'all_profiles:filtered', 'get', f'{path}?user__last_name={user.last_name}')
+
+  def run_session(self, user: Any, index: int, recorder: Recorder, options: Dict[str, Any], barrier: threading.Barrier) -> None:
+    address = f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}'
+    if options['base_url']:
+      session = HTTPSession(options['base_url'], address)
+    else:
+      session = ClientSession(address)
+    rng = random.Random(None if options['seed'] is None else options['seed'] * 1_000_003 + index)
+    scenario = self.manager_scenario if user.role == User.RoleChoices.BRANCH_MANAGER else self.customer_scenario
+
+    try:
+      for iteration in range(options['warmup'] + options['iterations']):
+        if iteration == options['warmup']:
+          barrier.wait()
+        # The load test is not meant to measure the API's daily rate limits.
+        cache.delete_many([f'throttle_anon_{address}', f'throttle_user_{user.pk}'])
+        if self.login(session, recorder, user):
+          scenario(session, recorder, user, rng)
+    except Exception:
+      # Release the other sessions instead of leaving them at the barrier.
+      barrier.abort()
+      raise
+    finally:
+      connection.close()
+
+  def report(self, results: Dict[str, Any]) -> None:
+    self.stdout.write(
+      f'{"endpoint":<28} {"count":>7} {"errors":>7} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}'
+    )
+    for name, stats in results['endpoints'].items():
+      self.stdout.write(
+        f'{name:<28} {stats["count"]:>7} {sum(stats["errors"].values()):>7} {stats["rps"]:>8.1f} '
+        f'{stats["p50_ms"]:>9.1f} {stats["p95_ms"]:>9.1f} {stats["p99_ms"]:>9.1f} {stats["max_ms"]:>9.1f}'
+      )
+    total = results['total']
+    self.stdout.write(f'{total["requests"]} requests in {total["elapsed_s"]:.1f}s ({total["rps"]:.1f} req/s), {total["errors"]} errors')
+
+  def check_errors(self, results: Dict[str, Any], options: Dict[str, Any]) -> List[str]:
+    return [
+      f'{name}: {error_rate(stats):.1%} unexpected statuses {stats["errors"]}'
+      for name, stats in results['endpoints'].items()
+      if error_rate(stats) * 100 > options['max_error_rate']
+    ]
+
+  def compare(self, results: Dict[str, Any], baseline: Dict[str, Any], options: Dict[str, Any]) -> List[str]:
+    limit = 1 + options['threshold'] / 100
+    regressions = []
+    for name, stats in results['endpoints'].items():
+      before = baseline['endpoints'].get(name)
+      if before is None:
+        continue
+      if stats['p95_ms'] > before['p95_ms'] * limit and stats['p95_ms'] - before['p95_ms'] > options['min_delta_ms']:
+        regressions.append(f'{name}: p95 {before["p95_ms"]:.1f} ms -> {stats["p95_ms"]:.1f} ms')
+      if stats['rps'] * limit < before['rps']:
+        regressions.append(f'{name}: throughput {before["rps"]:.1f} -> {stats["rps"]:.1f} req/s')
+      if error_rate(stats) > error_rate(before):
+        regressions.append(f'{name}: error rate {error_rate(before):.1%} -> {error_rate(stats):.1%}')
+    return regressions
+
+  def git_commit(self) -> Optional[str]:
+    try:
+      return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+      return None
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    baseline = None
+    if options['baseline']:
+      try:
+        with open(options['baseline']) as f:
+          baseline = json.load(f)
+      except (OSError, ValueError) as e:
+        raise CommandError(f'Cannot read baseline: {str(e)}')
+
+    run_id = uuid.uuid4().hex
+    recorder = Recorder()
+    server = LocalSMTPServer().start()
+    always_eager = app.conf.task_always_eager
+    app.conf.task_always_eager = not options['base_url']
+    users = []
+
+    try:
+      # In-process runs deliver OTP mail to the local SMTP sink and keep media
+      # uploads on the local stand-in.
+      with override_settings(
+        CELERY_EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+        EMAIL_HOST=server.server_address[0],
+        EMAIL_PORT=server.port,
+        EMAIL_HOST_USER='',
+        EMAIL_HOST_PASSWORD='',
+        EMAIL_USE_TLS=False,
+        EMAIL_USE_SSL=False,
+        MEDIA_STORAGE={'BACKEND': LOCAL_MEDIA_BACKEND, 'OPTIONS': {}},
+      ):
+        users = self.create_users(run_id, options['customers'], options['managers'])
+        mode = options['base_url'] or 'in-process'
+        self.stdout.write(
+          f'{options["customers"]} customers and {options["managers"]} managers x '
+          f'{options["iterations"]} iterations against {mode}'
+        )
+
+        # Sessions warm up independently; measurement starts for all of them
+        # once the slowest is done.
+        timer = {}
+
+        def start_measuring() -> None:
+          recorder.enabled = True
+          timer['start'] = time.perf_counter()
+
+        barrier = threading.Barrier(len(users), action=start_measuring)
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+          futures = [
+            executor.submit(self.run_session, user, index, recorder, options, barrier)
+            for index, user in enumerate(users)
+          ]
+          for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - timer['start']
+        close_pooled_connection()
+    finally:
+      app.conf.task_always_eager = always_eager
+      server.stop()
+      User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    endpoints = recorder.summary(elapsed)
+    requests = sum(stats['count'] for stats in endpoints.values())
+    results = {
+      'meta': {
+        'timestamp': timezone.now().isoformat(),
+        'commit': self.git_commit(),
+        'mode': 'http' if options['base_url'] else 'in-process',
+        'customers': options['customers'],
+        'managers': options['managers'],
+        'iterations': options['iterations'],
+      },
+      'endpoints': endpoints,
+      'total': {
+        'requests': requests,
+        'errors': sum(sum(stats['errors'].values()) for stats in endpoints.values()),
+        'elapsed_s': elapsed,
+        'rps': sum(len(values) for values in recorder.samples.values()) / elapsed,
+      },
+    }
+    self.report(results)
+
+    if options['output']:
+      with open(options['output'], 'w') as f:
+        json.dump(results, f, indent=2)
+      self.stdout.write(f'Results written to {options["output"]}')
+
+    failures = self.check_errors(results, options)
+    regressions = [] if baseline is None else self.compare(results, baseline, options)
+    for problem in failures + regressions:
+      self.stderr.write(problem)
+    reasons = []
+    if failures:
+      reasons.append(f'{len(failures)} endpoints above {options["max_error_rate"]}% unexpected statuses')
+    if regressions:
+      reasons.append(f'{len(regressions)} regressions beyond {options["threshold"]}% against {options["baseline"]}')
+    if reasons:
+      raise CommandError('; '.join(reasons))
+    if baseline is not None:
+      self.stdout.write(self.style.SUCCESS(f'No regressions beyond {options["threshold"]}% against {options["baseline"]}'))
@@ -0,0 +1,71 @@
+import base64
+import os
+import uuid
+from typing import Any
+
+from celery.app.task import Context
+from celery.backends.redis import RedisBackend
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from config.celery_app import app
+from core_apps.common.celery_backends import RedactingRedisBackend
+
+def sample_requests(image_bytes: int) -> list:
+  image = base64.b64encode(os.urandom(image_bytes)).decode('utf-8')
+  return [
+    Context(
+      id=str(uuid.uuid4()),
+      task='upload_photos_to_cloudinary',
+      args=[str(uuid.uuid4()), {'photo': {'type': 'base64', 'data': image}}],
+      kwargs={},
+      hostname='bench@localhost',
+      retries=0,
+      delivery_info={'routing_key': 'media'},
+    ),
+    Context(
+      id=str(uuid.uuid4()),
+      task='send_templated_email',
+      args=['otp', ['user@example.com'], {'otp': '123456', 'expiry_time': 1}],
+      kwargs={},
+      hostname='bench@localhost',
+      retries=0,
+      delivery_info={'routing_key': 'auth-email'},
+    ),
+  ]
+
+class Command(BaseCommand):
+  help = 'Measure result backend memory per stored task result with and without argument redaction.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--results', type=int, default=100)
+    parser.add_argument('--image-bytes', type=int, default=512 * 1024)
+
+  def measure(self, backend: RedisBackend, count: int, image_bytes: int) -> tuple:
+    keys = []
+    before = backend.client.info('memory')['used_memory']
+    for _ in range(count):
+      for request in sample_requests(image_bytes):
+        task_id = str(uuid.uuid4())
+        backend.store_result(task_id, None, 'SUCCESS', request=request)
+        keys.append(backend.get_key_for_task(task_id))
+    after = backend.client.info('memory')['used_memory']
+    key_bytes = sum(backend.client.memory_usage(key) or 0 for key in keys)
+    backend.client.delete(*keys)
+    return key_bytes, after - before
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    url = settings.CELERY_RESULT_BACKEND_URL
+    if not url or not url.startswith('redis'):
+      raise CommandError('CELERY_RESULT_BACKEND must point at Redis.')
+
+    count = options['results']
+    self.stdout.write(f'{count} upload + {count} email results, {options["image_bytes"]} byte images')
+    for label, backend_class in (('full args', RedisBackend), ('redacted', RedactingRedisBackend)):
+      key_bytes, used_delta = self.measure(backend_class(app=app, url=url), count, options['image_bytes'])
+      self.stdout.write(
+        f'{label:<10} keys {key_bytes / 1024 / 1024:8.2f} MB  '
+        f'used_memory delta {used_delta / 1024 / 1024:8.2f} MB  '
+        f'{key_bytes / (2 * count) / 1024:8.1f} KB/result'
+      )
+    self.stdout.write(f'{"ignored":<10} keys {0:8.2f} MB  (tasks with ignore_result=True store nothing)')
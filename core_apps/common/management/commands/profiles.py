@@ -0,0 +1,75 @@
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ...profiling import list_profiles, load_stats, profile_token, sql_seconds
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+class Command(BaseCommand):
+  help = 'List, inspect and summarize captured request profiles, or print a profiling token.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    actions = parser.add_subparsers(dest='action', required=True)
+
+    list_parser = actions.add_parser('list', help='List captured profiles, newest first.')
+    list_parser.add_argument('--path', help='Only profiles whose URL path contains this.')
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    show_parser = actions.add_parser('show', help='Show the top functions of one profile.')
+    show_parser.add_argument('profile_id')
+    show_parser.add_argument('--top', type=int, default=25)
+    show_parser.add_argument('--sort', choices=SORT_KEYS, default='cumulative')
+
+    summary_parser = actions.add_parser('summary', help='Merge matching profiles and show where the time goes.')
+    summary_parser.add_argument('--path', help='Only profiles whose URL path contains this.')
+    summary_parser.add_argument('--top', type=int, default=25)
+    summary_parser.add_argument('--sort', choices=SORT_KEYS, default='tottime')
+
+    actions.add_parser('token', help='Print a signed value for the X-Profile-Token header.')
+
+  def write_profiles(self, profiles: List[Dict[str, Any]]) -> None:
+    self.stdout.write(f'{"id":<24} {"method":<7} {"status":>6} {"role":<18} {"trigger":<7} {"ms":>9} {"sql %":>6}  path')
+    for meta in profiles:
+      share = meta['sql_ms'] / meta['duration_ms'] * 100 if meta['duration_ms'] else 0
+      self.stdout.write(
+        f'{meta["id"]:<24} {meta["method"]:<7} {meta["status"]:>6} {meta["role"]:<18} {meta["trigger"]:<7} '
+        f'{meta["duration_ms"]:>9.1f} {share:>6.1f}  {meta["path"]}'
+      )
+
+  def write_stats(self, profile_ids: List[str], sort: str, top: int) -> None:
+    stats = load_stats(profile_ids, stream=self.stdout)
+    total = stats.total_tt
+    sql = sql_seconds(stats)
+    share = sql / total * 100 if total else 0
+    self.stdout.write(f'Profiled time {total * 1000:.1f} ms, SQL {sql * 1000:.1f} ms ({share:.1f}%)')
+    stats.sort_stats(sort).print_stats(top)
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    action = options['action']
+
+    if action == 'token':
+      self.stdout.write(profile_token())
+      return
+
+    if action == 'show':
+      profile = next((meta for meta in list_profiles() if meta['id'] == options['profile_id']), None)
+      if profile is None:
+        raise CommandError(f'No profile {options["profile_id"]}')
+      self.write_profiles([profile])
+      self.write_stats([profile['id']], options['sort'], options['top'])
+      return
+
+    profiles = list_profiles(options['path'])
+    if not profiles:
+      raise CommandError('No matching profiles captured')
+
+    if action == 'list':
+      self.write_profiles(profiles[:options['limit']])
+      return
+
+    durations = [meta['duration_ms'] for meta in profiles]
+    self.stdout.write(
+      f'{len(profiles)} profiles, mean {sum(durations) / len(durations):.1f} ms, max {max(durations):.1f} ms'
+    )
+    self.write_stats([meta['id'] for meta in profiles], options['sort'], options['top'])
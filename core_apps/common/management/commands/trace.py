@@ -0,0 +1,68 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ...tracing import read_spans, summarize_trace
+
+# Span fields shown in the details column.
+SPAN_CORE_FIELDS = ('request_id', 'span', 'start', 'duration_ms', 'pid')
+
+class Command(BaseCommand):
+  help = 'List recent traces or show the per-hop timeline of one request ID.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    actions = parser.add_subparsers(dest='action', required=True)
+
+    list_parser = actions.add_parser('list', help='List traces, slowest end-to-end first.')
+    list_parser.add_argument('--path', help='Only requests whose URL path contains this.')
+    list_parser.add_argument('--min-ms', type=float, default=0, help='Only traces taking at least this long.')
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    show_parser = actions.add_parser('show', help='Show every span of one request ID in start order.')
+    show_parser.add_argument('request_id')
+
+  def list_traces(self, options: Dict[str, Any]) -> None:
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span in read_spans():
+      traces[span['request_id']].append(span)
+
+    summaries = [summarize_trace(spans) for spans in traces.values()]
+    summaries = [
+      summary for summary in summaries
+      if summary['total_ms'] >= options['min_ms'] and (not options['path'] or options['path'] in summary['path'])
+    ]
+    if not summaries:
+      raise CommandError('No matching traces recorded')
+
+    summaries.sort(key=lambda summary: summary['total_ms'], reverse=True)
+    self.stdout.write(f'{"request id":<32} {"started":<19} {"spans":>5} {"total ms":>10}  request')
+    for summary in summaries[:options['limit']]:
+      started = datetime.fromtimestamp(summary['start']).strftime('%Y-%m-%d %H:%M:%S')
+      self.stdout.write(
+        f'{summary["request_id"]:<32} {started:<19} {summary["spans"]:>5} {summary["total_ms"]:>10.1f}  '
+        f'{summary["method"]} {summary["path"]} {summary["status"]}'
+      )
+
+  def show_trace(self, request_id: str) -> None:
+    spans = sorted(read_spans(request_id), key=lambda span: span['start'])
+    if not spans:
+      raise CommandError(f'No spans recorded for {request_id}')
+
+    summary = summarize_trace(spans)
+    self.stdout.write(f'{request_id}: {summary["total_ms"]:.1f} ms end to end across {len(spans)} spans')
+    self.stdout.write(f'{"offset ms":>10} {"duration ms":>12} {"pid":>7}  {"span":<14} details')
+    for span in spans:
+      offset = (span['start'] - summary['start']) * 1000
+      details = ' '.join(
+        f'{name}={value}' for name, value in span.items()
+        if name not in SPAN_CORE_FIELDS and value is not None
+      )
+      self.stdout.write(f'{offset:>10.1f} {span["duration_ms"]:>12.1f} {span["pid"]:>7}  {span["span"]:<14} {details}')
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    if options['action'] == 'show':
+      self.show_trace(options['request_id'])
+    else:
+      self.list_traces(options)
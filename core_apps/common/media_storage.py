@@ -0,0 +1,80 @@
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+import cloudinary.exceptions
+import cloudinary.uploader
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# Raised for failures worth retrying: the storage was unreachable, failed or
+# rate limited the request.
+class MediaStorageError(Exception):
+  pass
+
+class MediaStorage:
+  def upload(self, file: BinaryIO) -> Dict[str, str]:
+    # Returns the stored object's `public_id` and `url`.
+    raise NotImplementedError
+
+class CloudinaryMediaStorage(MediaStorage):
+  def __init__(self, **upload_options: str) -> None:
+    self.upload_options = upload_options
+
+  def upload(self, file: BinaryIO) -> Dict[str, str]:
+    try:
+      response = cloudinary.uploader.upload(file, **self.upload_options)
+    except (cloudinary.exceptions.GeneralError, cloudinary.exceptions.RateLimited) as e:
+      raise MediaStorageError(str(e)) from e
+    return {'public_id': response['public_id'], 'url': response['url']}
+
+# Offline stand-in for Cloudinary: files are written under MEDIA_ROOT and
+# served from MEDIA_URL, with simulated network latency and failures.
+class LocalMediaStorage(MediaStorage):
+  def __init__(
+    self,
+    root: Optional[str]=None,
+    base_url: Optional[str]=None,
+    latency_ms: Optional[float]=None,
+    jitter_ms: Optional[float]=None,
+    failure_rate: Optional[float]=None,
+  ) -> None:
+    simulation = settings.LOCAL_MEDIA_STORAGE
+    self.root = Path(root or settings.MEDIA_ROOT)
+    self.base_url = base_url or settings.MEDIA_URL
+    self.latency_ms = simulation['LATENCY_MS'] if latency_ms is None else latency_ms
+    self.jitter_ms = simulation['JITTER_MS'] if jitter_ms is None else jitter_ms
+    self.failure_rate = simulation['FAILURE_RATE'] if failure_rate is None else failure_rate
+
+  def upload(self, file: BinaryIO) -> Dict[str, str]:
+    delay_ms = self.latency_ms + random.uniform(0, self.jitter_ms)
+    if delay_ms > 0:
+      time.sleep(delay_ms / 1000)
+    if random.random() < self.failure_rate:
+      raise MediaStorageError('Simulated media storage failure')
+
+    public_id = uuid.uuid4().hex
+    self.root.mkdir(parents=True, exist_ok=True)
+    with open(self.root / public_id, 'wb') as stored:
+      for chunk in iter(lambda: file.read(settings.UPLOAD_STREAM_BLOCK_SIZE), b''):
+        stored.write(chunk)
+    return {'public_id': public_id, 'url': f'{self.base_url}{public_id}'}
+
+_media_storage: Optional[MediaStorage] = None
+
+def get_media_storage() -> MediaStorage:
+  global _media_storage
+  if _media_storage is None:
+    backend = import_string(settings.MEDIA_STORAGE['BACKEND'])
+    _media_storage = backend(**settings.MEDIA_STORAGE.get('OPTIONS', {}))
+  return _media_storage
+
+@receiver(setting_changed)
+def reset_media_storage(setting: str, **kwargs) -> None:
+  global _media_storage
+  if setting in ('MEDIA_STORAGE', 'LOCAL_MEDIA_STORAGE'):
+    _media_storage = None
@@ -0,0 +1,230 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from loguru import logger
+
+# Metric values live in Redis hashes (one per metric, one field per label
+# set) so every gunicorn and Celery worker process adds to the same series.
+# Each process buffers its increments and flushes them in one pipeline at
+# most every METRICS['FLUSH_INTERVAL'] seconds.
+KEY_PREFIX = 'metrics:'
+
+def escape(value: str) -> str:
+  return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+def format_labels(labels: Dict[str, str]) -> str:
+  return ','.join(f'{name}="{escape(value)}"' for name, value in sorted(labels.items()))
+
+def format_value(value: float) -> str:
+  return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class MetricsBuffer:
+  def __init__(self) -> None:
+    self.values: Dict[Tuple[str, str], float] = defaultdict(float)
+    self.last_flush = time.monotonic()
+    self._lock = threading.Lock()
+
+  def add(self, name: str, field: str, amount: float) -> None:
+    with self._lock:
+      self.values[(name, field)] += amount
+      due = time.monotonic() - self.last_flush >= settings.METRICS['FLUSH_INTERVAL']
+    if due:
+      self.flush()
+
+  def flush(self) -> None:
+    with self._lock:
+      values, self.values = self.values, defaultdict(float)
+      self.last_flush = time.monotonic()
+    if not values:
+      return
+    try:
+      pipeline = get_redis_connection('default').pipeline(transaction=False)
+      for (name, field), amount in values.items():
+        pipeline.hincrbyfloat(f'{KEY_PREFIX}{name}', field, amount)
+      pipeline.execute()
+    except RedisError as e:
+      logger.warning(f'Dropped {len(values)} metric updates: {str(e)}')
+
+buffer = MetricsBuffer()
+atexit.register(buffer.flush)
+
+class Metric:
+  kind = 'untyped'
+
+  def __init__(self, name: str, documentation: str, labelnames: Iterable[str]=()) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+    REGISTRY[name] = self
+
+  def label_field(self, labels: Dict[str, str]) -> str:
+    if set(labels) != set(self.labelnames):
+      raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+    return format_labels(labels)
+
+  def samples(self, values: Dict[str, float]) -> List[str]:
+    return [
+      f'{self.name}{{{field}}} {format_value(value)}' if field else f'{self.name} {format_value(value)}'
+      for field, value in sorted(values.items())
+    ]
+
+class Counter(Metric):
+  kind = 'counter'
+
+  def inc(self, amount: float=1, **labels: str) -> None:
+    if settings.METRICS['ENABLED']:
+      buffer.add(self.name, self.label_field(labels), amount)
+
+class Histogram(Metric):
+  kind = 'histogram'
+
+  def __init__(self, name: str, documentation: str, labelnames: Iterable[str]=(), buckets: Iterable[float]=()) -> None:
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+
+  def observe(self, value: float, **labels: str) -> None:
+    if not settings.METRICS['ENABLED']:
+      return
+    field = self.label_field(labels)
+    # Only the first bucket the value falls in is counted; buckets are made
+    # cumulative when rendered.
+    bucket = next((bound for bound in self.buckets if value <= bound), '+Inf')
+    buffer.add(self.name, f'{field}|bucket|{bucket}', 1)
+    buffer.add(self.name, f'{field}|sum', value)
+    buffer.add(self.name, f'{field}|count', 1)
+
+  def samples(self, values: Dict[str, float]) -> List[str]:
+    series: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for field, value in values.items():
+      labels, kind = field.split('|', 1)
+      series[labels][kind] = value
+
+    lines = []
+    for labels, parts in sorted(series.items()):
+      prefix = f'{labels},' if labels else ''
+      cumulative = 0.0
+      for bound in [*self.buckets, '+Inf']:
+        cumulative += parts.get(f'bucket|{bound}', 0)
+        lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {format_value(cumulative)}')
+      suffix = f'{{{labels}}}' if labels else ''
+      lines.append(f'{self.name}_sum{suffix} {format_value(parts.get("sum", 0))}')
+      lines.append(f'{self.name}_count{suffix} {format_value(parts.get("count", 0))}')
+    return lines
+
+REGISTRY: Dict[str, Metric] = {}
+# Gauges are read when scraped: name -> (help, function returning samples).
+GAUGES: Dict[str, Tuple[str, Callable[[], List[Tuple[Dict[str, str], float]]]]] = {}
+
+def gauge(name: str, documentation: str) -> Callable:
+  def register(fn: Callable[[], List[Tuple[Dict[str, str], float]]]) -> Callable:
+    GAUGES[name] = (documentation, fn)
+    return fn
+  return register
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300)
+
+http_request_duration = Histogram(
+  'http_request_duration_seconds',
+  'API request latency by URL name.',
+  ['view', 'method', 'status'],
+  LATENCY_BUCKETS,
+)
+login_failures = Counter('auth_login_failures_total', 'Failed login attempts.')
+account_lockouts = Counter('auth_account_lockouts_total', 'Accounts locked after too many failed logins.')
+otp_sent = Counter('auth_otp_sent_total', 'Login OTP emails queued.')
+hashing_rejections = Counter(
+  'password_hashing_rejections_total',
+  'Password hashes refused because the hashing pool was full or too slow.',
+  ['reason'],
+)
+hashing_wait = Histogram(
+  'password_hashing_wait_seconds',
+  'Time a password hash waited for a hashing thread.',
+  buckets=LATENCY_BUCKETS,
+)
+celery_task_duration = Histogram(
+  'celery_task_duration_seconds',
+  'Celery task runtime by task name and final state.',
+  ['task', 'state'],
+  TASK_BUCKETS,
+)
+
+@gauge('cache_hit_ratio', 'Keyspace hit ratio of the Redis cache since it started.')
+def cache_hit_ratio() -> List[Tuple[Dict[str, str], float]]:
+  stats = get_redis_connection('default').info('stats')
+  lookups = stats['keyspace_hits'] + stats['keyspace_misses']
+  return [({}, stats['keyspace_hits'] / lookups if lookups else 0)]
+
+@gauge('celery_queue_messages', 'Messages waiting in each Celery queue, including media uploads.')
+def celery_queue_messages() -> List[Tuple[Dict[str, str], float]]:
+  from config.celery_app import app
+
+  samples = []
+  with app.connection_for_read() as connection:
+    connection.ensure_connection(max_retries=1, timeout=2)
+    channel = connection.default_channel
+    for queue in settings.CELERY_TASK_QUEUES:
+      declared = channel.queue_declare(queue=queue.name, passive=True)
+      samples.append(({'queue': queue.name}, declared.message_count))
+  return samples
+
+@gauge('upload_staging_bytes', 'Bytes held in the upload staging area at the last sweep.')
+def upload_staging_bytes() -> List[Tuple[Dict[str, str], float]]:
+  from core_apps.user_profile.tasks import STAGING_USAGE_KEY
+
+  usage = cache.get(STAGING_USAGE_KEY)
+  return [({}, usage['bytes'])] if usage else []
+
+@gauge('upload_staging_files', 'Files held in the upload staging area at the last sweep.')
+def upload_staging_files() -> List[Tuple[Dict[str, str], float]]:
+  from core_apps.user_profile.tasks import STAGING_USAGE_KEY
+
+  usage = cache.get(STAGING_USAGE_KEY)
+  return [({}, usage['files'])] if usage else []
+
+# The hashing pool is per process, so these describe the process that
+# serves the scrape; rejections and waits above are aggregated.
+@gauge('password_hashing_queue_depth', 'Password hashes waiting for a hashing thread in this process.')
+def password_hashing_queue_depth() -> List[Tuple[Dict[str, str], float]]:
+  from core_apps.user_auth.hashing import get_hashing_pool
+
+  return [({}, get_hashing_pool().stats()['queue_depth'])]
+
+@gauge('password_hashing_running', 'Password hashes running in this process.')
+def password_hashing_running() -> List[Tuple[Dict[str, str], float]]:
+  from core_apps.user_auth.hashing import get_hashing_pool
+
+  return [({}, get_hashing_pool().stats()['running'])]
+
+def render_metrics() -> str:
+  lines = []
+  pipeline = get_redis_connection('default').pipeline(transaction=False)
+  for metric in REGISTRY.values():
+    pipeline.hgetall(f'{KEY_PREFIX}{metric.name}')
+
+  for metric, values in zip(REGISTRY.values(), pipeline.execute()):
+    lines.append(f'# HELP {metric.name} {metric.documentation}')
+    lines.append(f'# TYPE {metric.name} {metric.kind}')
+    lines += metric.samples({field.decode(): float(value) for field, value in values.items()})
+
+  for name, (documentation, collect) in GAUGES.items():
+    try:
+      samples = collect()
+    except Exception as e:
+      logger.warning(f'Failed to collect {name}: {str(e)}')
+      continue
+    lines.append(f'# HELP {name} {documentation}')
+    lines.append(f'# TYPE {name} gauge')
+    for labels, value in samples:
+      label_string = f'{{{format_labels(labels)}}}' if labels else ''
+      lines.append(f'{name}{label_string} {format_value(value)}')
+  return '\n'.join(lines) + '\n'
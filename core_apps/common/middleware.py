@@ -0,0 +1,196 @@
+import cProfile
+import random
+import threading
+import time
+from contextlib import ExitStack
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from loguru import logger
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from .cookie_auth import CookieAuthentication
+from .instrumentation import RequestMetrics, current_metrics
+from .metrics import http_request_duration
+from .profiling import is_valid_token, store_profile
+from .tracing import REQUEST_ID_HEADER, clean_request_id, current_request_id, new_request_id, record_span
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+class RequestIDMiddleware:
+  # Takes the request ID from nginx (or the client) or generates one, binds
+  # it to every log line of the request and to the Celery tasks it queues,
+  # and records the request as the first span of its trace.
+  def __init__(self, get_response: Callable) -> None:
+    self.get_response = get_response
+
+  def __call__(self, request: HttpRequest) -> HttpResponse:
+    request_id = clean_request_id(request.headers.get(REQUEST_ID_HEADER)) or new_request_id()
+    token = current_request_id.set(request_id)
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+      with logger.contextualize(request_id=request_id):
+        response = self.get_response(request)
+    finally:
+      current_request_id.reset(token)
+
+    match = request.resolver_match
+    record_span(
+      'request',
+      started_at,
+      (time.perf_counter() - start) * 1000,
+      request_id=request_id,
+      method=request.method,
+      path=request.path,
+      view=match.view_name if match else 'unmatched',
+      status=response.status_code,
+    )
+    response[REQUEST_ID_HEADER] = request_id
+    return response
+
+class RequestInstrumentationMiddleware:
+  # Records SQL, cache, response rendering and view time per request and
+  # reports them in a Server-Timing header and the request log line. Removed
+  # from the stack entirely when REQUEST_INSTRUMENTATION is off.
+  def __init__(self, get_response: Callable) -> None:
+    if not settings.REQUEST_INSTRUMENTATION:
+      raise MiddlewareNotUsed()
+    self.get_response = get_response
+
+  def __call__(self, request: HttpRequest) -> HttpResponse:
+    metrics = RequestMetrics()
+    token = current_metrics.set(metrics)
+    try:
+      with ExitStack() as stack:
+        for connection in connections.all():
+          stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+        start = time.perf_counter()
+        response = self.get_response(request)
+        metrics.view_ms = (time.perf_counter() - start) * 1000
+    finally:
+      current_metrics.reset(token)
+
+    response['Server-Timing'] = metrics.server_timing()
+    fields = metrics.as_log_fields()
+    logger.bind(**fields).info(
+      f'{request.method} {request.path} {response.status_code} '
+      + ' '.join(f'{name}={value}' for name, value in fields.items())
+    )
+    return response
+
+  def process_template_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    # DRF responses are rendered right after this hook; the post-render
+    # callback closes the serialization span.
+    metrics = current_metrics.get()
+    if metrics is None:
+      return response
+    start = time.perf_counter()
+
+    def rendered(response: HttpResponse) -> None:
+      metrics.serialize_ms += (time.perf_counter() - start) * 1000
+
+    response.add_post_render_callback(rendered)
+    return response
+
+class RequestMetricsMiddleware:
+  # Observes request latency per URL name for the /metrics endpoint.
+  def __init__(self, get_response: Callable) -> None:
+    if not settings.METRICS['ENABLED']:
+      raise MiddlewareNotUsed()
+    self.get_response = get_response
+
+  def __call__(self, request: HttpRequest) -> HttpResponse:
+    start = time.perf_counter()
+    response = self.get_response(request)
+    match = request.resolver_match
+    http_request_duration.observe(
+      time.perf_counter() - start,
+      view=match.view_name if match else 'unmatched',
+      method=request.method,
+      status=str(response.status_code),
+    )
+    return response
+
+class RequestProfilingMiddleware:
+  # Profiles a request with cProfile when it carries a signed X-Profile-Token
+  # header, when a staff user adds the profiling query parameter, or when it
+  # is sampled. Profiles are written to REQUEST_PROFILING['ROOT'] and read
+  # with the `profiles` management command.
+  def __init__(self, get_response: Callable) -> None:
+    config = settings.REQUEST_PROFILING
+    if not config['ENABLED']:
+      raise MiddlewareNotUsed()
+    self.get_response = get_response
+    self.sample_rate = config['SAMPLE_RATE']
+    self.query_param = config['QUERY_PARAM']
+    # Only one profiler can be active per process at a time.
+    self.lock = threading.Lock()
+
+  def is_staff(self, request: HttpRequest) -> bool:
+    # Runs before the view, so the JWT is checked here; anyone else asking
+    # for a profile is served normally without taking the profiler.
+    try:
+      authenticated = CookieAuthentication().authenticate(request)
+    except AuthenticationFailed:
+      return False
+    return authenticated is not None and authenticated[0].is_staff
+
+  def trigger(self, request: HttpRequest) -> Optional[str]:
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+      if is_valid_token(token):
+        return 'header'
+      logger.warning(f'Invalid profiling token for {request.path}')
+    if self.query_param in request.GET and self.is_staff(request):
+      return 'staff'
+    if self.sample_rate and random.random() < self.sample_rate:
+      return 'sample'
+    return None
+
+  def __call__(self, request: HttpRequest) -> HttpResponse:
+    trigger = self.trigger(request)
+    if trigger is None or not self.lock.acquire(blocking=False):
+      return self.get_response(request)
+
+    profiler = cProfile.Profile()
+    try:
+      try:
+        profiler.enable()
+      except ValueError:
+        # Another profiler or debugger holds the interpreter's hooks.
+        return self.get_response(request)
+      start = time.perf_counter()
+      try:
+        response = self.get_response(request)
+      finally:
+        profiler.disable()
+      duration_ms = (time.perf_counter() - start) * 1000
+    finally:
+      self.lock.release()
+
+    # DRF sets the user on the request while handling the view.
+    user = getattr(request, 'user', None)
+    is_authenticated = bool(user and user.is_authenticated)
+
+    try:
+      profile_id = store_profile(profiler, {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'role': user.role if is_authenticated else 'anonymous',
+        'trigger': trigger,
+        'duration_ms': round(duration_ms, 1),
+      })
+    except OSError as e:
+      logger.error(f'Failed to store request profile: Error {str(e)}')
+      return response
+
+    logger.info(f'Profiled {request.method} {request.path} as {profile_id} ({trigger})')
+    response['X-Profile-Id'] = profile_id
+    return response
@@ -0,0 +1,74 @@
+import json
+import pstats
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+TOKEN_SALT = 'request-profiling'
+TOKEN_VALUE = 'profile'
+
+def profiles_root() -> Path:
+  return Path(settings.REQUEST_PROFILING['ROOT'])
+
+def profile_token() -> str:
+  return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+def is_valid_token(token: str) -> bool:
+  try:
+    value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+      token, max_age=settings.REQUEST_PROFILING['TOKEN_MAX_AGE']
+    )
+  except signing.BadSignature:
+    return False
+  return value == TOKEN_VALUE
+
+def sql_seconds(stats: pstats.Stats) -> float:
+  # Every query passes through CursorWrapper._execute_with_wrappers exactly
+  # once, so its cumulative time is the request's SQL time.
+  return sum(
+    cumulative
+    for (filename, _, name), (_, _, _, cumulative, _) in stats.stats.items()
+    if name == '_execute_with_wrappers' and filename.endswith('django/db/backends/utils.py')
+  )
+
+def store_profile(profiler: Any, meta: Dict[str, Any]) -> str:
+  root = profiles_root()
+  root.mkdir(parents=True, exist_ok=True)
+  profile_id = f'{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}'
+  stats = pstats.Stats(profiler)
+  stats.dump_stats(root / f'{profile_id}.prof')
+
+  meta = {
+    'id': profile_id,
+    'created_at': timezone.now().isoformat(),
+    'sql_ms': round(sql_seconds(stats) * 1000, 1),
+    **meta,
+  }
+  (root / f'{profile_id}.json').write_text(json.dumps(meta))
+  prune_profiles(root, settings.REQUEST_PROFILING['MAX_PROFILES'])
+  return profile_id
+
+def prune_profiles(root: Path, keep: int) -> None:
+  for meta_path in sorted(root.glob('*.json'), reverse=True)[keep:]:
+    meta_path.unlink(missing_ok=True)
+    meta_path.with_suffix('.prof').unlink(missing_ok=True)
+
+def list_profiles(path: Optional[str]=None) -> List[Dict[str, Any]]:
+  # Newest first; ids start with their capture time.
+  profiles = []
+  for meta_path in sorted(profiles_root().glob('*.json'), reverse=True):
+    try:
+      meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+      continue
+    if path is None or path in meta.get('path', ''):
+      profiles.append(meta)
+  return profiles
+
+def load_stats(profile_ids: List[str], stream: Any=None) -> pstats.Stats:
+  root = profiles_root()
+  return pstats.Stats(*[str(root / f'{profile_id}.prof') for profile_id in profile_ids], stream=stream)
@@ -0,0 +1,87 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from celery.signals import after_task_publish, before_task_publish, task_postrun, task_prerun
+
+from loguru import logger
+
+from .metrics import celery_task_duration
+from .tracing import (
+  TASK_PUBLISHED_AT_HEADER,
+  TASK_REQUEST_ID_HEADER,
+  clean_request_id,
+  current_request_id,
+  new_request_id,
+  record_span,
+)
+
+_task_started_at: Dict[str, float] = {}
+# task id -> (context token, loguru context, wall-clock start, start).
+_task_traces: Dict[str, Tuple[Any, Any, float, float]] = {}
+
+def task_header(task: Any, name: str) -> Optional[Any]:
+  # Custom message headers show up on the request context, or under
+  # request.headers depending on the Celery version that published them.
+  value = getattr(task.request, name, None)
+  if value is None:
+    value = (getattr(task.request, 'headers', None) or {}).get(name)
+  return value
+
+@before_task_publish.connect
+def add_request_id_header(headers: Dict[str, Any], **kwargs: Any) -> None:
+  request_id = current_request_id.get()
+  if request_id is not None:
+    headers.setdefault(TASK_REQUEST_ID_HEADER, request_id)
+  # Wall-clock time, so the worker can tell how long the task was queued.
+  headers[TASK_PUBLISHED_AT_HEADER] = time.time()
+
+@after_task_publish.connect
+def record_task_publish(sender: str, headers: Dict[str, Any], routing_key: str, **kwargs: Any) -> None:
+  published_at = headers.get(TASK_PUBLISHED_AT_HEADER)
+  if published_at is not None:
+    record_span('publish', published_at, (time.time() - published_at) * 1000, task=sender, queue=routing_key)
+
+@task_prerun.connect
+def record_task_start(task_id: str, **kwargs: Any) -> None:
+  _task_started_at[task_id] = time.perf_counter()
+
+@task_prerun.connect
+def bind_task_request_id(task_id: str, task: Any, **kwargs: Any) -> None:
+  # Tasks queued outside a request (beat, the shell) get their own ID.
+  request_id = (
+    clean_request_id(task_header(task, TASK_REQUEST_ID_HEADER))
+    or current_request_id.get()
+    or new_request_id()
+  )
+  context = logger.contextualize(request_id=request_id)
+  context.__enter__()
+  _task_traces[task_id] = (current_request_id.set(request_id), context, time.time(), time.perf_counter())
+
+@task_postrun.connect
+def record_task_duration(task_id: str, task: Any, state: Optional[str]=None, **kwargs: Any) -> None:
+  started_at = _task_started_at.pop(task_id, None)
+  if started_at is not None:
+    celery_task_duration.observe(time.perf_counter() - started_at, task=task.name, state=state or 'UNKNOWN')
+
+@task_postrun.connect
+def record_task_span(task_id: str, task: Any, state: Optional[str]=None, **kwargs: Any) -> None:
+  trace = _task_traces.pop(task_id, None)
+  if trace is None:
+    return
+  token, context, started_at, start = trace
+  request_id = current_request_id.get()
+  duration_ms = (time.perf_counter() - start) * 1000
+  context.__exit__(None, None, None)
+  current_request_id.reset(token)
+
+  published_at = task_header(task, TASK_PUBLISHED_AT_HEADER)
+  record_span(
+    'task',
+    started_at,
+    duration_ms,
+    request_id=request_id,
+    task=task.name,
+    state=state or 'UNKNOWN',
+    retries=task.request.retries or 0,
+    queue_wait_ms=round((started_at - published_at) * 1000, 2) if published_at else None,
+  )
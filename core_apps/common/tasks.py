@@ -0,0 +1,14 @@
+import hashlib
+import time
+
+from celery import shared_task
+
+@shared_task(name='benchmark_io_task')
+def benchmark_io_task(delay: float) -> None:
+  time.sleep(delay)
+
+@shared_task(name='benchmark_cpu_task')
+def benchmark_cpu_task(rounds: int) -> None:
+  digest = b''
+  for _ in range(rounds):
+    digest = hashlib.sha256(digest).digest()
@@ -0,0 +1,196 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from typing import Any, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.test import Client, TestCase, override_settings
+from django.urls import URLPattern, URLResolver
+from django.utils import timezone
+
+from django_redis import get_redis_connection
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.celery_app import app
+from core_apps.common.models import ContentView
+from core_apps.user_profile.models import NextOfKin, Profile, UploadJob
+
+User = get_user_model()
+
+PASSWORD = 'Budget-Check-9431'
+
+CLIENT_ADDRESS = '10.0.0.1'
+
+TEST_CACHE_DB = 15
+
+def url_names(patterns: List[Any], namespace: Optional[str]=None) -> set:
+  names = set()
+  for pattern in patterns:
+    if isinstance(pattern, URLResolver):
+      names |= url_names(pattern.url_patterns, pattern.namespace or namespace)
+    elif isinstance(pattern, URLPattern) and pattern.name:
+      names.add(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+  return names
+
+def tiny_jpeg() -> bytes:
+  buffer = io.BytesIO()
+  Image.new('RGB', (8, 8), (120, 80, 40)).save(buffer, format='JPEG')
+  return buffer.getvalue()
+
+def isolated_cache_location() -> str:
+  location = urlsplit(settings.CACHES['default']['LOCATION'])
+  return urlunsplit(location._replace(path=f'/{TEST_CACHE_DB}'))
+
+class QueryBudgetTestCase(TestCase):
+  # Each test pins the number of queries one request runs. Redis state
+  # (throttles, upload claims, metrics) lives in its own database that is
+  # flushed around every test, and staged and stored files go to temporary
+  # directories removed with the class.
+  covered_urls: set = set()
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    cls.media_root = tempfile.mkdtemp(prefix='query-budget-media-')
+    cls.staging_root = tempfile.mkdtemp(prefix='query-budget-staging-')
+    cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+    cls.addClassCleanup(shutil.rmtree, cls.staging_root, ignore_errors=True)
+
+    overrides = override_settings(
+      CACHES={**settings.CACHES, 'default': {**settings.CACHES['default'], 'LOCATION': isolated_cache_location()}},
+      PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+      CELERY_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+      MEDIA_STORAGE={
+        'BACKEND': 'core_apps.common.media_storage.LocalMediaStorage',
+        'OPTIONS': {'root': cls.media_root, 'base_url': 'http://localhost/media/'},
+      },
+      LOCAL_MEDIA_STORAGE={'LATENCY_MS': 0, 'JITTER_MS': 0, 'FAILURE_RATE': 0},
+      UPLOAD_STAGING_ROOT=cls.staging_root,
+      TRACING={**settings.TRACING, 'ENABLED': False},
+    )
+    overrides.enable()
+    cls.addClassCleanup(overrides.disable)
+
+    always_eager = app.conf.task_always_eager
+    app.conf.task_always_eager = True
+    cls.addClassCleanup(setattr, app.conf, 'task_always_eager', always_eager)
+    super().setUpClass()
+
+  @classmethod
+  def setUpTestData(cls) -> None:
+    cls.password = make_password(PASSWORD, salt='QueryBudgetFixtureSalt')
+    cls.manager = cls.create_user(0, role=User.RoleChoices.BRANCH_MANAGER)
+    cls.admin = cls.create_user(1, is_staff=True, is_superuser=True)
+    cls.customer = cls.create_user(2)
+    cls.profile = cls.customer.profile
+    cls.kin = cls.create_kin(0, 5)
+    cls.grow_from = 3
+    cls.add_rows(5)
+
+  @classmethod
+  def create_user(cls, index: int, **fields: Any) -> Any:
+    return User.objects.create(
+      username=f'QB{index:04d}',
+      email=f'budget-{index}@example.com',
+      password=cls.password,
+      first_name=f'Budget{index}',
+      last_name='Check',
+      id_no=90_000_000 + index,
+      security_question=User.SecurityQuestions.MAIDEN_NAME,
+      security_answer='budget',
+      **fields,
+    )
+
+  @classmethod
+  def create_kin(cls, start: int, count: int) -> List[NextOfKin]:
+    return NextOfKin.objects.bulk_create([
+      NextOfKin(
+        profile=cls.profile,
+        first_name=f'Kin{i}',
+        last_name='Budget',
+        date_of_birth=date(1980, 1, 1),
+        relationship='Sibling',
+        email_address=f'kin{i}@example.com',
+        phone_number='+254700000000',
+        address='1 Budget Street',
+        city='Nairobi',
+        country='KE',
+        is_primary=i == 0,
+      )
+      for i in range(start, start + count)
+    ])
+
+  @classmethod
+  def add_rows(cls, count: int) -> None:
+    start = cls.grow_from
+    users = User.objects.bulk_create([
+      User(
+        username=f'QB{i:04d}',
+        email=f'budget-{i}@example.com',
+        password=cls.password,
+        first_name=f'Budget{i}',
+        last_name='Check',
+        id_no=90_000_000 + i,
+        security_question=User.SecurityQuestions.MAIDEN_NAME,
+        security_answer='budget',
+      )
+      for i in range(start, start + count)
+    ])
+    Profile.objects.bulk_create([Profile(user=user) for user in users])
+    content_type = ContentType.objects.get_for_model(Profile)
+    ContentView.objects.bulk_create([
+      ContentView(content_type=content_type, object_id=cls.profile.id, user=user, viewer_ip=CLIENT_ADDRESS, last_viewed=timezone.now())
+      for user in users
+    ])
+    UploadJob.objects.bulk_create([
+      UploadJob(profile=cls.profile, field=UploadJob.Field.choices[i % 3][0], status=UploadJob.Status.DONE)
+      for i in range(count)
+    ])
+    cls.create_kin(start + 100, count)
+    cls.grow_from = start + count
+
+  def setUp(self) -> None:
+    redis = get_redis_connection('default')
+    assert redis.connection_pool.connection_kwargs['db'] == TEST_CACHE_DB
+    redis.flushdb()
+    self.addCleanup(redis.flushdb)
+    # Content types and sites are cached per process; start every test cold
+    # so a count does not depend on which test ran first.
+    ContentType.objects.clear_cache()
+    Site.objects.clear_cache()
+
+  def client_for(self, user: Optional[Any]=None) -> Client:
+    client = Client(REMOTE_ADDR=CLIENT_ADDRESS)
+    if user is not None:
+      client.cookies['access'] = str(AccessToken.for_user(user))
+    return client
+
+  def request(self, client: Client, method: str, path: str, data: Any=None, **extra: Any) -> Any:
+    if data is None:
+      return getattr(client, method)(path, **extra)
+    if isinstance(data, bytes):
+      return getattr(client, method)(path, data=data, content_type='application/octet-stream', **extra)
+    return getattr(client, method)(path, data=data, content_type='application/json', **extra)
+
+  def assertQueryBudget(self, queries: int, client: Client, method: str, path: str, data: Any=None, status: int=200, **extra: Any) -> Any:
+    with self.assertNumQueries(queries):
+      response = self.request(client, method, path, data, **extra)
+    self.assertEqual(response.status_code, status, response.content[:500])
+    return response
+
+  def assertFlatQueryBudget(self, queries: int, client: Client, path: str, status: int=200) -> None:
+    # The same read after the fixtures grow must run the same queries; a
+    # count that follows the data size is an N+1. An unmeasured first read
+    # leaves the state a read changes (recorded views) as it is for both.
+    self.request(client, 'get', path)
+    for size in (0, 20):
+      self.add_rows(size)
+      ContentType.objects.clear_cache()
+      Site.objects.clear_cache()
+      self.assertQueryBudget(queries, client, 'get', path, status=status)
@@ -0,0 +1,63 @@
+from django.urls import get_resolver, reverse
+
+from core_apps.common.testing import QueryBudgetTestCase, url_names
+from core_apps.user_auth.tests import AuthQueryBudgetTests
+from core_apps.user_profile.tests import ProfileQueryBudgetTests
+
+# Named URLs that are deliberately not exercised.
+EXEMPT = {
+  'customer_imports': 'queues a background import; the import itself is measured by import_customers',
+  'upload_events': 'long-lived event stream; runs one query per status change, not per request',
+  'user-set-username': 'same lookup and save path as user-set-password',
+  'user-reset-username': 'same lookup path as user-reset-password',
+  'user-reset-username-confirm': 'same lookup and save path as user-reset-password-confirm',
+}
+
+class CommonQueryBudgetTests(QueryBudgetTestCase):
+  covered_urls = {'metrics', 'schema', 'swagger-ui', 'redoc', 'api-root'}
+
+  def test_metrics(self) -> None:
+    self.assertQueryBudget(0, self.client_for(), 'get', reverse('metrics'))
+
+  def test_schema(self) -> None:
+    self.assertQueryBudget(0, self.client_for(), 'get', reverse('schema'))
+
+  def test_swagger_ui(self) -> None:
+    self.assertQueryBudget(0, self.client_for(), 'get', reverse('swagger-ui'))
+
+  def test_redoc(self) -> None:
+    self.assertQueryBudget(0, self.client_for(), 'get', reverse('redoc'))
+
+  def test_api_root(self) -> None:
+    self.assertQueryBudget(1, self.client_for(self.customer), 'get', reverse('api-root'))
+
+  def test_every_endpoint_has_a_budget(self) -> None:
+    covered = set().union(*(
+      case.covered_urls
+      for case in (CommonQueryBudgetTests, AdminQueryBudgetTests, AuthQueryBudgetTests, ProfileQueryBudgetTests)
+    ))
+    uncovered = sorted(
+      name for name in url_names(get_resolver().url_patterns)
+      if name not in covered and name not in EXEMPT and not name.startswith('admin:')
+    )
+    self.assertEqual(uncovered, [], 'Endpoints without a query budget test')
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+  covered_urls = {'admin:index'}
+
+  def setUp(self) -> None:
+    super().setUp()
+    self.admin_client = self.client_for()
+    self.admin_client.force_login(self.admin)
+
+  def test_index(self) -> None:
+    self.assertQueryBudget(3, self.admin_client, 'get', reverse('admin:index'))
+
+  def test_profile_changelist(self) -> None:
+    self.assertFlatQueryBudget(5, self.admin_client, reverse('admin:user_profile_profile_changelist'))
+
+  def test_next_of_kin_changelist(self) -> None:
+    self.assertFlatQueryBudget(6, self.admin_client, reverse('admin:user_profile_nextofkin_changelist'))
+
+  def test_upload_job_changelist(self) -> None:
+    self.assertFlatQueryBudget(5, self.admin_client, reverse('admin:user_profile_uploadjob_changelist'))
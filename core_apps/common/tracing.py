@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from loguru import logger
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Celery message headers carrying the request ID and the publish time to the
+# worker.
+TASK_REQUEST_ID_HEADER = 'x_request_id'
+TASK_PUBLISHED_AT_HEADER = 'x_published_at'
+
+# IDs passed in by nginx or a client are only trusted when they look like one.
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+# Set for the duration of a request by RequestIDMiddleware and of a task by
+# the task_prerun signal.
+current_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+def new_request_id() -> str:
+  return uuid.uuid4().hex
+
+def clean_request_id(value: Optional[str]) -> Optional[str]:
+  if value and REQUEST_ID_PATTERN.match(value):
+    return value
+  return None
+
+def trace_file() -> Path:
+  return Path(settings.TRACING['FILE'])
+
+class TraceWriter:
+  # Appends one JSON line per span. Web and worker processes share the file;
+  # each line goes out in a single O_APPEND write so lines never interleave.
+  def __init__(self) -> None:
+    self.fd: Optional[int] = None
+    self.pid: Optional[int] = None
+    self._lock = threading.Lock()
+
+  def open(self, path: Path) -> int:
+    # Reopen after a fork, and after another process rotated the file.
+    if self.fd is not None:
+      try:
+        if self.pid == os.getpid() and os.stat(path).st_ino == os.fstat(self.fd).st_ino:
+          return self.fd
+      except OSError:
+        pass
+      os.close(self.fd)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    self.pid = os.getpid()
+    return self.fd
+
+  def write(self, span: Dict[str, Any]) -> None:
+    path = trace_file()
+    line = (json.dumps(span, default=str) + '\n').encode()
+    with self._lock:
+      try:
+        fd = self.open(path)
+        os.write(fd, line)
+        if os.fstat(fd).st_size >= settings.TRACING['MAX_BYTES']:
+          # Keep one previous file.
+          os.replace(path, path.with_name(f'{path.name}.1'))
+      except OSError as e:
+        logger.warning(f'Failed to write trace span {span["span"]}: {str(e)}')
+
+writer = TraceWriter()
+
+def record_span(name: str, started_at: float, duration_ms: float, request_id: Optional[str]=None, **fields: Any) -> None:
+  # started_at is wall-clock time so spans from different processes line up.
+  request_id = request_id or current_request_id.get()
+  if not settings.TRACING['ENABLED'] or request_id is None:
+    return
+  writer.write({
+    'request_id': request_id,
+    'span': name,
+    'start': round(started_at, 6),
+    'duration_ms': round(duration_ms, 2),
+    'pid': os.getpid(),
+    **fields,
+  })
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[None]:
+  # Times the block as a span of the current request. Outside a request or
+  # task this is a single context variable lookup.
+  if current_request_id.get() is None:
+    yield
+    return
+  started_at = time.time()
+  start = time.perf_counter()
+  error = None
+  try:
+    yield
+  except BaseException as e:
+    error = type(e).__name__
+    raise
+  finally:
+    if error:
+      fields['error'] = error
+    record_span(name, started_at, (time.perf_counter() - start) * 1000, **fields)
+
+def read_spans(request_id: Optional[str]=None) -> List[Dict[str, Any]]:
+  path = trace_file()
+  spans = []
+  for source in (path.with_name(f'{path.name}.1'), path):
+    try:
+      lines = source.read_text().splitlines()
+    except OSError:
+      continue
+    for line in lines:
+      try:
+        span = json.loads(line)
+      except ValueError:
+        continue
+      if request_id is None or span.get('request_id') == request_id:
+        spans.append(span)
+  return spans
+
+def summarize_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+  # End-to-end latency runs from the first span's start to the last span's
+  # end, across all hops.
+  start = min(span['start'] for span in spans)
+  end = max(span['start'] + span['duration_ms'] / 1000 for span in spans)
+  request = next((span for span in spans if span['span'] == 'request'), {})
+  return {
+    'request_id': spans[0]['request_id'],
+    'start': start,
+    'total_ms': round((end - start) * 1000, 2),
+    'spans': len(spans),
+    'method': request.get('method', ''),
+    'path': request.get('path', ''),
+    'status': request.get('status', ''),
+  }
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+
+from .metrics import render_metrics
+
+class MetricsView(View):
+  # Prometheus scrape target. nginx does not proxy it, so it is only reachable
+  # from inside the stack; METRICS_TOKEN additionally requires a bearer token.
+  def get(self, request: HttpRequest) -> HttpResponse:
+    token = settings.METRICS['TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+      return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,57 @@
+from typing import Any, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.http import HttpRequest
+
+from loguru import logger
+
+from .hashing import HashingPoolSaturated, pooled_make_password, pooled_verify_password
+
+User = get_user_model()
+
+class PooledHashingBackend(ModelBackend):
+  def authenticate(
+    self,
+    request: Optional[HttpRequest],
+    username: Optional[str]=None,
+    password: Optional[str]=None,
+    raise_if_saturated: bool=False,
+    **kwargs: Any
+  ) -> Optional[User]:
+    # Only the API login turns a saturated pool into a 503; other callers
+    # (the admin, session auth) treat it as a failed login instead of a 500.
+    try:
+      return self.verify(username, password, **kwargs)
+    except HashingPoolSaturated:
+      if raise_if_saturated:
+        raise
+      logger.warning('Password hashing pool saturated, rejecting login')
+      return None
+
+  def verify(self, username: Optional[str], password: Optional[str], **kwargs: Any) -> Optional[User]:
+    if username is None:
+      username = kwargs.get(User.USERNAME_FIELD)
+    if username is None or password is None:
+      return None
+
+    try:
+      user = User._default_manager.get_by_natural_key(username)
+    except User.DoesNotExist:
+      # Run the default hasher once to keep the timing of unknown and known
+      # users indistinguishable.
+      pooled_make_password(password)
+      return None
+
+    is_correct, needs_rehash = pooled_verify_password(password, user.password)
+    if not is_correct:
+      return None
+
+    if needs_rehash:
+      user.password = pooled_make_password(password)
+      user.save(update_fields=['password'])
+      logger.info(f'Password hash upgraded for user: {user.email}')
+
+    if self.user_can_authenticate(user):
+      return user
+    return None
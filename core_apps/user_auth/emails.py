@@ -1,46 +1,31 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.utils.translation import gettext_lazy as _
 from loguru import logger
 
+from core_apps.common.metrics import otp_sent
+
+from .tasks import send_templated_email
+
 def send_otp_email(email, otp):
-  subject = _('Your OTP code for Login')
-  from_email = settings.DEFAULT_FROM_EMAIL
-  recipient_list = [email]
   context = {
     'otp': otp,
-    'expiry_time': settings.OTP_EXPIRATION,
-    'site_name': settings.SITE_NAME
+    'expiry_time': int(settings.OTP_EXPIRATION.total_seconds() // 60),
   }
-  html_email = render_to_string("emails/otp_email.html", context)
-  plain_email = strip_tags(html_email)
-  email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-  email.attach_alternative(html_email, 'text/html')
 
   try:
-    email.send()
-    logger.info(f'OTP email sent successfully to: {email}')
+    send_templated_email.delay('otp', [email], context)
+    otp_sent.inc()
+    logger.info(f'OTP email queued for: {email}')
   except Exception as e:
-    logger.error(f'Failed to send OTP email to {email}: Error {str(e)}')
+    logger.error(f'Failed to queue OTP email to {email}: Error {str(e)}')
 
 def send_account_locked(self):
-  subject = _('Your account has been locked')
-  from_email = settings.DEFAULT_FROM_EMAIL
-  recipient_list = [self.email]
   context = {
-    'user': self,
+    'user': {'full_name': self.full_name},
     'lockout_duration': int(settings.LOCKOUT_DURATION.total_seconds() // 60),
-    'site_name': settings.SITE_NAME
   }
-  html_email = render_to_string("emails/account_locked.html", context)
-  plain_email = strip_tags(html_email)
-  email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-  email.attach_alternative(html_email, 'text/html')
 
   try:
-    email.send()
-    logger.info(f'Account locked email sent successfully to: {self.email}')
+    send_templated_email.delay('account_locked', [self.email], context)
+    logger.info(f'Account locked email queued for: {self.email}')
   except Exception as e:
-    logger.error(f'Failed to send account locked email to {self.email}: Error {str(e)}')
\ No newline at end of file
+    logger.error(f'Failed to queue account locked email to {self.email}: Error {str(e)}')
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+  Argon2PasswordHasher,
+  BCryptSHA256PasswordHasher,
+  PBKDF2PasswordHasher,
+  ScryptPasswordHasher,
+)
+
+def get_hasher_params(algorithm: str) -> Dict[str, Any]:
+  return getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(algorithm, {})
+
+class TunableHasherMixin:
+  tunable_params = ()
+
+  def __init__(self) -> None:
+    super().__init__()
+    for param, value in get_hasher_params(self.algorithm).items():
+      if param in self.tunable_params:
+        setattr(self, param, value)
+
+class TunablePBKDF2PasswordHasher(TunableHasherMixin, PBKDF2PasswordHasher):
+  tunable_params = ('iterations',)
+
+class TunableArgon2PasswordHasher(TunableHasherMixin, Argon2PasswordHasher):
+  tunable_params = ('time_cost', 'memory_cost', 'parallelism')
+
+class TunableBCryptSHA256PasswordHasher(TunableHasherMixin, BCryptSHA256PasswordHasher):
+  tunable_params = ('rounds',)
+
+class TunableScryptPasswordHasher(TunableHasherMixin, ScryptPasswordHasher):
+  tunable_params = ('work_factor', 'block_size', 'parallelism', 'maxmem')
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from loguru import logger
+
+from core_apps.common.metrics import hashing_rejections, hashing_wait
+
+class HashingPoolSaturated(Exception):
+  pass
+
+class HashingPool:
+  def __init__(self, max_workers: int, max_queue: int, timeout: float) -> None:
+    self.max_workers = max_workers
+    self.max_queue = max_queue
+    self.timeout = timeout
+    self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+    self._lock = threading.Lock()
+    self._executor: Optional[ThreadPoolExecutor] = None
+    self._pid: Optional[int] = None
+    self._queued = 0
+    self._running = 0
+    self._counters = {
+      'submitted': 0,
+      'completed': 0,
+      'rejected': 0,
+      'timed_out': 0,
+      'max_queue_depth': 0,
+      'wait_ms_total': 0.0,
+      'hash_ms_total': 0.0,
+    }
+
+  def _get_executor(self) -> ThreadPoolExecutor:
+    # Worker threads do not survive a fork (e.g. gunicorn --preload), so the
+    # executor is created lazily per process.
+    pid = os.getpid()
+    if self._executor is None or self._pid != pid:
+      with self._lock:
+        if self._executor is None or self._pid != pid:
+          self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='password-hashing',
+          )
+          self._pid = pid
+    return self._executor
+
+  def _wrap(self, fn: Callable, queued_at: float) -> Callable:
+    def job(*args: Any, **kwargs: Any) -> Any:
+      started_at = time.perf_counter()
+      with self._lock:
+        self._queued -= 1
+        self._running += 1
+        self._counters['wait_ms_total'] += (started_at - queued_at) * 1000
+      hashing_wait.observe(started_at - queued_at)
+      try:
+        return fn(*args, **kwargs)
+      finally:
+        with self._lock:
+          self._running -= 1
+          self._counters['completed'] += 1
+          self._counters['hash_ms_total'] += (time.perf_counter() - started_at) * 1000
+        self._slots.release()
+    return job
+
+  def run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    if not self._slots.acquire(blocking=False):
+      with self._lock:
+        self._counters['rejected'] += 1
+      hashing_rejections.inc(reason='saturated')
+      logger.warning('Password hashing pool saturated, rejecting request')
+      raise HashingPoolSaturated()
+
+    with self._lock:
+      self._queued += 1
+      self._counters['submitted'] += 1
+      self._counters['max_queue_depth'] = max(self._counters['max_queue_depth'], self._queued)
+
+    future = self._get_executor().submit(self._wrap(fn, time.perf_counter()), *args, **kwargs)
+
+    try:
+      return future.result(timeout=self.timeout)
+    except FutureTimeoutError:
+      with self._lock:
+        self._counters['timed_out'] += 1
+      hashing_rejections.inc(reason='timeout')
+      logger.warning(f'Password hashing did not complete within {self.timeout}s')
+      raise HashingPoolSaturated()
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      return {
+        'max_workers': self.max_workers,
+        'max_queue': self.max_queue,
+        'queue_depth': self._queued,
+        'running': self._running,
+        **self._counters,
+      }
+
+_pool: Optional[HashingPool] = None
+_pool_lock = threading.Lock()
+
+def get_hashing_pool() -> HashingPool:
+  global _pool
+  if _pool is None:
+    with _pool_lock:
+      if _pool is None:
+        config = getattr(settings, 'PASSWORD_HASHING_POOL', {})
+        _pool = HashingPool(
+          max_workers=config.get('MAX_WORKERS', 4),
+          max_queue=config.get('MAX_QUEUE', 32),
+          timeout=config.get('TIMEOUT', 10),
+        )
+  return _pool
+
+def verify_password(password: str, encoded: str) -> tuple[bool, bool]:
+  needs_rehash = []
+  is_correct = check_password(password, encoded, setter=lambda raw: needs_rehash.append(True))
+  return is_correct, bool(needs_rehash)
+
+def pooled_verify_password(password: str, encoded: str) -> tuple[bool, bool]:
+  return get_hashing_pool().run(verify_password, password, encoded)
+
+def pooled_make_password(password: str) -> str:
+  return get_hashing_pool().run(make_password, password)
@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from loguru import logger
+
+from config.celery_app import WORKER_POOL
+
+from .managers import validate_email_address
+
+User = get_user_model()
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_FIELDS = [
+  'email',
+  'first_name',
+  'middle_name',
+  'last_name',
+  'id_no',
+  'security_question',
+  'security_answer',
+  'password',
+]
+OPTIONAL_FIELDS = ('middle_name', 'password')
+MAX_ID_NO = 2_147_483_647
+
+Row = Tuple[int, Optional[Dict[str, Any]]]
+RowError = Dict[str, Any]
+
+def detect_format(filename: str) -> Optional[str]:
+  extension = filename.rsplit('.', 1)[-1].lower()
+  if extension in ('ndjson', 'jsonl'):
+    return 'ndjson'
+  if extension == 'csv':
+    return 'csv'
+  return None
+
+def read_rows(stream: BinaryIO, file_format: str) -> Iterator[Row]:
+  # Yields (line number, row) one at a time so files of any size are read
+  # incrementally. Unparseable NDJSON lines are yielded as None.
+  text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+  if file_format == 'csv':
+    reader = csv.DictReader(text)
+    for row in reader:
+      yield reader.line_num, row
+    return
+
+  for line_no, line in enumerate(text, start=1):
+    if not line.strip():
+      continue
+    try:
+      row = json.loads(line)
+    except ValueError:
+      row = None
+    yield line_no, row if isinstance(row, dict) else None
+
+def clean_row(row: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+  cleaned = {}
+  errors = {}
+  for field in IMPORT_FIELDS:
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if not value:
+      if field not in OPTIONAL_FIELDS:
+        errors[field] = 'This field is required.'
+      cleaned[field] = None
+      continue
+    max_length = User._meta.get_field(field).max_length if field != 'password' else None
+    if max_length and len(value) > max_length:
+      errors[field] = f'Ensure this field has no more than {max_length} characters.'
+    cleaned[field] = value
+
+  if cleaned['email']:
+    cleaned['email'] = User.objects.normalize_email(cleaned['email'])
+    try:
+      validate_email_address(cleaned['email'])
+    except ValidationError:
+      errors['email'] = 'Enter a valid email address.'
+
+  if cleaned['id_no']:
+    try:
+      cleaned['id_no'] = int(cleaned['id_no'])
+      if not 0 < cleaned['id_no'] <= MAX_ID_NO:
+        raise ValueError()
+    except ValueError:
+      errors['id_no'] = 'Enter a valid ID number.'
+
+  if cleaned['security_question'] and cleaned['security_question'] not in User.SecurityQuestions.values:
+    errors['security_question'] = f'"{cleaned["security_question"]}" is not a valid choice.'
+  return cleaned, errors
+
+def validate_batch(rows: List[Row], seen_emails: Set[str], seen_id_nos: Set[int]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[RowError]]:
+  # Field checks run per row; uniqueness against the database is one query
+  # for the whole batch.
+  candidates = []
+  errors = []
+  for line_no, row in rows:
+    if row is None:
+      errors.append({'line': line_no, 'errors': {'row': 'Not a valid JSON object.'}})
+      continue
+    cleaned, row_errors = clean_row(row)
+    email = (cleaned['email'] or '').lower()
+    if email and email in seen_emails:
+      row_errors['email'] = 'Duplicate email address in this import.'
+    if isinstance(cleaned['id_no'], int) and cleaned['id_no'] in seen_id_nos:
+      row_errors['id_no'] = 'Duplicate ID number in this import.'
+    if email:
+      seen_emails.add(email)
+    if isinstance(cleaned['id_no'], int):
+      seen_id_nos.add(cleaned['id_no'])
+
+    if row_errors:
+      errors.append({'line': line_no, 'errors': row_errors})
+    else:
+      candidates.append((line_no, cleaned))
+
+  if not candidates:
+    return [], errors
+
+  emails = [row['email'].lower() for _, row in candidates]
+  id_nos = [row['id_no'] for _, row in candidates]
+  existing = (
+    User.objects
+    .annotate(email_lower=Lower('email'))
+    .filter(Q(email_lower__in=emails) | Q(id_no__in=id_nos))
+    .values_list('email_lower', 'id_no')
+  )
+  existing_emails = {email for email, _ in existing}
+  existing_id_nos = {id_no for _, id_no in existing}
+
+  valid = []
+  for line_no, row in candidates:
+    row_errors = {}
+    if row['email'].lower() in existing_emails:
+      row_errors['email'] = 'A user with this email already exists.'
+    if row['id_no'] in existing_id_nos:
+      row_errors['id_no'] = 'A user with this ID number already exists.'
+    if row_errors:
+      errors.append({'line': line_no, 'errors': row_errors})
+    else:
+      valid.append((line_no, row))
+  return valid, errors
+
+def hashing_executor(workers: int) -> Executor:
+  # PBKDF2 is CPU bound, so passwords are hashed in a process pool. Celery's
+  # prefork children are daemonic and may not start processes of their own,
+  # and gevent workers cannot run one alongside the hub; there a thread pool
+  # is used instead, hashlib releases the GIL while hashing.
+  if multiprocessing.current_process().daemon or WORKER_POOL == 'gevent':
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-hashing')
+  # Children come from a fork server started without this process's threads,
+  # locks or database connections, so a threaded worker can use the pool too.
+  return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+
+def create_customers(valid: List[Tuple[int, Dict[str, Any]]], executor: Executor) -> Tuple[int, List[RowError]]:
+  Profile = apps.get_model('user_profile', 'Profile')
+  passwords = [row.pop('password') for _, row in valid]
+  # Rows without a password get an unusable one and set theirs through the
+  # password reset flow.
+  hashes = list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // 64)))
+  users = [
+    User(username=username, password=password, is_active=True, **row)
+    for (_, row), username, password in zip(valid, User.objects.allocate_usernames(len(valid)), hashes)
+  ]
+
+  try:
+    with transaction.atomic():
+      User.objects.bulk_create(users)
+      Profile.objects.bulk_create([Profile(user=user) for user in users])
+    return len(users), []
+  except IntegrityError:
+    # A concurrent signup took an email or ID number since the batch was
+    # validated; insert row by row to isolate the conflicts.
+    logger.warning(f'Customer import chunk of {len(users)} conflicted, retrying row by row')
+
+  created = 0
+  errors = []
+  for (line_no, _), user in zip(valid, users):
+    try:
+      with transaction.atomic():
+        User.objects.bulk_create([user])
+        Profile.objects.bulk_create([Profile(user=user)])
+      created += 1
+    except IntegrityError:
+      errors.append({'line': line_no, 'errors': {'row': 'Conflicts with an existing user.'}})
+  return created, errors
+
+def run_import(
+  stream: BinaryIO,
+  file_format: str,
+  batch_size: int,
+  workers: int,
+  max_errors: int,
+  on_progress: Optional[Callable[[Dict[str, Any]], None]]=None,
+) -> Dict[str, Any]:
+  report = {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+  seen_emails: Set[str] = set()
+  seen_id_nos: Set[int] = set()
+  rows = read_rows(stream, file_format)
+
+  with hashing_executor(workers) as executor:
+    while batch := list(islice(rows, batch_size)):
+      valid, errors = validate_batch(batch, seen_emails, seen_id_nos)
+      if valid:
+        created, create_errors = create_customers(valid, executor)
+        report['created'] += created
+        errors += create_errors
+
+      report['rows'] += len(batch)
+      report['failed'] += len(errors)
+      errors.sort(key=lambda error: error['line'])
+      report['errors'] += errors[:max(0, max_errors - len(report['errors']))]
+      if on_progress:
+        on_progress(report)
+
+  logger.info(f'Customer import finished: {report["created"]} created, {report["failed"]} failed of {report["rows"]} rows')
+  return report
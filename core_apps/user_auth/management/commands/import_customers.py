@@ -0,0 +1,56 @@
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ...imports import IMPORT_FIELDS, IMPORT_FORMATS, detect_format, run_import
+
+class Command(BaseCommand):
+  help = 'Bulk import customers and their profiles from a CSV or NDJSON file.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('path', help=f'File with the columns: {", ".join(IMPORT_FIELDS)}.')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension.')
+    parser.add_argument('--batch-size', type=int, default=settings.CUSTOMER_IMPORT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=settings.CUSTOMER_IMPORT_HASH_WORKERS, help='Password hashing processes.')
+    parser.add_argument('--max-errors', type=int, default=settings.CUSTOMER_IMPORT_MAX_ERRORS, help='Row errors to list.')
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    file_format = options['format'] or detect_format(options['path'])
+    if file_format is None:
+      raise CommandError('Cannot tell the file format from its extension, pass --format.')
+
+    start = time.perf_counter()
+
+    def on_progress(report: Dict[str, Any]) -> None:
+      elapsed = time.perf_counter() - start
+      self.stdout.write(
+        f'  {report["rows"]:>9} rows, {report["created"]:>9} created, '
+        f'{report["failed"]:>7} failed, {report["rows"] / elapsed:>7.0f} rows/s'
+      )
+
+    try:
+      with open(options['path'], 'rb') as stream:
+        report = run_import(
+          stream,
+          file_format,
+          options['batch_size'],
+          options['workers'],
+          options['max_errors'],
+          on_progress=on_progress,
+        )
+    except OSError as e:
+      raise CommandError(str(e))
+
+    for error in report['errors']:
+      details = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+      self.stderr.write(f'line {error["line"]}: {details}')
+    if report['failed'] > len(report['errors']):
+      self.stderr.write(f'... and {report["failed"] - len(report["errors"])} more')
+
+    summary = f'Created {report["created"]} of {report["rows"]} customers in {time.perf_counter() - start:.1f}s'
+    if report['failed']:
+      self.stdout.write(self.style.WARNING(f'{summary}, {report["failed"]} rows rejected'))
+    else:
+      self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,85 @@
+import math
+import statistics
+import time
+from pprint import pformat
+from typing import Any, Dict
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, get_hashers
+from django.core.management.base import BaseCommand, CommandParser
+
+BENCHMARK_PASSWORD = 'benchmark-Passw0rd!'
+
+def time_hasher(hasher: BasePasswordHasher, rounds: int) -> float:
+  samples = []
+  for _ in range(rounds):
+    salt = hasher.salt()
+    start = time.perf_counter()
+    hasher.encode(BENCHMARK_PASSWORD, salt)
+    samples.append((time.perf_counter() - start) * 1000)
+  return statistics.median(samples)
+
+def recommend_params(hasher: BasePasswordHasher, measured_ms: float, target_ms: float) -> Dict[str, Any]:
+  ratio = target_ms / measured_ms
+  if 'iterations' in hasher.tunable_params:
+    return {'iterations': max(10_000, round(hasher.iterations * ratio, -4))}
+  if 'time_cost' in hasher.tunable_params:
+    return {'time_cost': max(1, round(hasher.time_cost * ratio))}
+  if 'rounds' in hasher.tunable_params:
+    return {'rounds': min(31, max(4, hasher.rounds + round(math.log2(ratio))))}
+  if 'work_factor' in hasher.tunable_params:
+    work_factor = 2 ** max(1, round(math.log2(hasher.work_factor) + math.log2(ratio)))
+    # hashlib.scrypt refuses to use more than maxmem (32MB by default).
+    return {
+      'work_factor': work_factor,
+      'maxmem': max(hasher.maxmem, 2 * 128 * hasher.block_size * work_factor),
+    }
+  return {}
+
+class Command(BaseCommand):
+  help = 'Benchmark the configured password hashers and recommend parameters for a target latency.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--target-ms', type=float, default=250.0, help='Target time for a single hash.')
+    parser.add_argument('--rounds', type=int, default=5, help='Hashes per measurement.')
+
+  def measure(self, hasher_class: type, params: Dict[str, Any], rounds: int) -> float:
+    hasher = hasher_class()
+    for param, value in params.items():
+      setattr(hasher, param, value)
+    return time_hasher(hasher, rounds)
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    target_ms = options['target_ms']
+    rounds = options['rounds']
+    workers = settings.PASSWORD_HASHING_POOL['MAX_WORKERS']
+    recommendations = {}
+
+    self.stdout.write(f'Target: {target_ms:.0f} ms per hash, {rounds} rounds per measurement\n')
+
+    for hasher in get_hashers():
+      name = hasher.algorithm
+      if hasher.library:
+        try:
+          hasher._load_library()
+        except ValueError:
+          self.stdout.write(f'{name:<16} unavailable (missing {hasher.library!r})')
+          continue
+
+      current_ms = time_hasher(hasher, rounds)
+      line = f'{name:<16} current {current_ms:8.1f} ms  ~{workers * 1000 / current_ms:7.1f} logins/s'
+
+      if not getattr(hasher, 'tunable_params', ()):
+        self.stdout.write(f'{line}  (not tunable)')
+        continue
+
+      params = recommend_params(hasher, current_ms, target_ms)
+      tuned_ms = self.measure(type(hasher), params, rounds)
+      recommendations[name] = params
+      self.stdout.write(
+        f'{line}  -> {params} {tuned_ms:8.1f} ms  ~{workers * 1000 / tuned_ms:7.1f} logins/s'
+      )
+
+    self.stdout.write(f'\nThroughput assumes PASSWORD_HASHING_POOL MAX_WORKERS={workers}.')
+    self.stdout.write('Suggested settings:\n')
+    self.stdout.write(f'PASSWORD_HASHER_PARAMS = {pformat(recommendations)}')
@@ -1,23 +1,39 @@
 import random
 import string
 from os import getenv
-from typing import Any, Optional
+from typing import Any, List, Optional, Set
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import connections, router
 from django.utils.translation import gettext_lazy as _
 
-def generate_username() -> str:
-  bank_name = getenv('BANK_NAME')
+USERNAME_LENGTH = 12
+USERNAME_ALPHABET = string.ascii_uppercase + string.digits
+USERNAME_SEQUENCE = 'user_auth_username_seq'
+# Odd and not a multiple of 3, so multiplying by it is a bijection modulo
+# 36 ** n: scrambled sequence numbers stay unique without looking sequential.
+USERNAME_MULTIPLIER = 1_743_541_808_669
+
+def generate_username(number: Optional[int]=None) -> str:
+  bank_name = getenv('BANK_NAME') or ''
   words = bank_name.split()
   prefix = ''.join([word[0] for word in words]).upper()
-  remaining_length = 12 - len(prefix) - 1
-  random_characters = ''.join(
-    random.choices(string.ascii_uppercase + string.digits, k=remaining_length)
-  )
-  username = f'{prefix}-{random_characters}'
+  remaining_length = USERNAME_LENGTH - len(prefix) - 1
+  if number is None:
+    random_characters = ''.join(
+      random.choices(USERNAME_ALPHABET, k=remaining_length)
+    )
+    return f'{prefix}-{random_characters}'
+
+  value = number * USERNAME_MULTIPLIER % len(USERNAME_ALPHABET) ** remaining_length
+  characters = []
+  for digit in range(remaining_length):
+    value, index = divmod(value, len(USERNAME_ALPHABET))
+    characters.append(USERNAME_ALPHABET[index])
+  username = f'{prefix}-{"".join(reversed(characters))}'
   return username
 
 def validate_email_address(email: str) -> None:
@@ -27,6 +43,32 @@ def validate_email_address(email: str) -> None:
     raise ValidationError(_('Enter a valid email address'))
 
 class UserManager(DjangoUserManager):
+  def reserve_username_numbers(self, count: int) -> Optional[List[int]]:
+    # Takes a block of numbers from the username sequence in one round trip.
+    connection = connections[self._db or router.db_for_write(self.model)]
+    if connection.vendor != 'postgresql':
+      return None
+    with connection.cursor() as cursor:
+      cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [USERNAME_SEQUENCE, count])
+      return [row[0] for row in cursor.fetchall()]
+
+  def allocate_usernames(self, count: int) -> List[str]:
+    # Sequence-backed usernames never collide with each other, but may with
+    # randomly drawn ones from before the sequence existed; those are skipped
+    # after a single indexed lookup per block.
+    usernames: Set[str] = set()
+    while len(usernames) < count:
+      numbers = self.reserve_username_numbers(count - len(usernames))
+      if numbers is None:
+        candidates = {generate_username() for attempt in range(count - len(usernames))}
+      else:
+        candidates = {generate_username(number) for number in numbers}
+      taken = set(
+        self.filter(username__in=candidates).values_list('username', flat=True)
+      )
+      usernames |= candidates - taken
+    return list(usernames)
+
   def _create_user(self, email:str, password:str, **extra_fields: Any):
     if not email:
       raise ValueError(_('An email address must be provided.'))
@@ -34,9 +76,9 @@ class UserManager(DjangoUserManager):
     if not password:
       raise ValueError(_('A password address must be provided.'))
     
-    username = generate_username()
     email = self.normalize_email(email)
     validate_email_address(email)
+    username = self.allocate_usernames(1)[0]
 
     user = self.model(
       username=username,
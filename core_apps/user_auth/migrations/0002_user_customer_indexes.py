@@ -0,0 +1,31 @@
+# Generated by Django 4.2.15 on 2026-10-19 11:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user_auth", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_staff", False), ("is_superuser", False)),
+                fields=["first_name", "last_name"],
+                name="user_customer_name_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_staff", False), ("is_superuser", False)),
+                fields=["last_name"],
+                name="user_customer_last_name_idx",
+            ),
+        ),
+    ]
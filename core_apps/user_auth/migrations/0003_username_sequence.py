@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-19 11:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_auth", "0002_user_customer_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE IF NOT EXISTS user_auth_username_seq",
+            reverse_sql="DROP SEQUENCE IF EXISTS user_auth_username_seq",
+        ),
+    ]
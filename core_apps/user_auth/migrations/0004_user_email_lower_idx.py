@@ -0,0 +1,23 @@
+# Generated by Django 4.2.15 on 2026-10-19 11:07
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user_auth", "0003_username_sequence"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Lower("email"),
+                name="user_email_lower_idx",
+            ),
+        ),
+    ]
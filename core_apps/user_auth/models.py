@@ -1,11 +1,14 @@
 import uuid
 
 from django.db import models
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from core_apps.common.metrics import account_lockouts
+
 from .emails import send_account_locked
 from .managers import UserManager
 
@@ -98,6 +101,7 @@ class User(AbstractUser):
     if self.failed_login_attempts >= settings.LOGIN_ATTEMPTS:
       self.account_status = self.AccountStatus.LOCKED
       self.save()
+      account_lockouts.inc()
       send_account_locked(self)
     
     self.save()
@@ -133,6 +137,21 @@ class User(AbstractUser):
     verbose_name = _('User')
     verbose_name_plural = _('Users')
     ordering = ['-date_joined']
+    # Partial indexes for the customer-only profile list and its filters.
+    indexes = [
+      models.Index(
+        fields=['first_name', 'last_name'],
+        condition=models.Q(is_staff=False, is_superuser=False),
+        name='user_customer_name_idx',
+      ),
+      models.Index(
+        fields=['last_name'],
+        condition=models.Q(is_staff=False, is_superuser=False),
+        name='user_customer_last_name_idx',
+      ),
+      # Customer imports match existing emails case-insensitively.
+      models.Index(Lower('email'), name='user_email_lower_idx'),
+    ]
 
   def has_role(self, role_name: str) -> bool:
     return hasattr(self, 'role') and self.role == role_name
@@ -1,4 +1,6 @@
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
+from djoser.conf import settings as djoser_settings
+from djoser.serializers import TokenCreateSerializer as DjoserTokenCreateSerializer
 from djoser.serializers import UserCreateSerializer as DjoserUserCreateSerializer
 
 User = get_user_model()
@@ -19,4 +21,17 @@ class UserCreateSerializer(DjoserUserCreateSerializer):
   
   def create(self, validated_data):
     user = User.objects.create_user(**validated_data)
-    return user
\ No newline at end of file
+    return user
+
+class TokenCreateSerializer(DjoserTokenCreateSerializer):
+  def validate(self, attrs):
+    # Djoser falls back to a second check_password on the request thread when
+    # authenticate() fails; the pooled backend already verified the password.
+    # The login view answers a saturated hashing pool with a 503.
+    params = {djoser_settings.LOGIN_FIELD: attrs.get(djoser_settings.LOGIN_FIELD)}
+    self.user = authenticate(
+      request=self.context.get('request'), **params, password=attrs.get('password'), raise_if_saturated=True
+    )
+    if self.user and self.user.is_active:
+      return attrs
+    self.fail('invalid_credentials')
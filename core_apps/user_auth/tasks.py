@@ -0,0 +1,153 @@
+import smtplib
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from celery import shared_task
+from celery.utils.time import get_exponential_backoff_interval
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from django.utils.translation import gettext_lazy as _
+
+from loguru import logger
+
+from core_apps.common.circuit_breaker import DependencyUnavailable, retry_countdown
+from core_apps.common.mail import PartialDelivery, deliver_messages
+from core_apps.common.tracing import span
+from core_apps.user_profile.staging import get_staging_area
+
+EMAIL_TEMPLATES = {
+  'otp': {
+    'subject': _('Your OTP code for Login'),
+    'template': 'emails/otp_email.html',
+  },
+  'account_locked': {
+    'subject': _('Your account has been locked'),
+    'template': 'emails/account_locked.html',
+  },
+}
+
+@lru_cache(maxsize=None)
+def get_email_template(template_id: str):
+  return get_template(EMAIL_TEMPLATES[template_id]['template'])
+
+def build_email(template_id: str, recipients: List[str], context: Dict[str, Any]) -> EmailMultiAlternatives:
+  html_email = get_email_template(template_id).render(
+    {**context, 'site_name': settings.SITE_NAME}
+  )
+  plain_email = strip_tags(html_email)
+  email = EmailMultiAlternatives(
+    str(EMAIL_TEMPLATES[template_id]['subject']),
+    plain_email,
+    settings.DEFAULT_FROM_EMAIL,
+    recipients,
+  )
+  email.attach_alternative(html_email, 'text/html')
+  return email
+
+@shared_task(
+  bind=True,
+  name='send_templated_email',
+  ignore_result=True,
+  autoretry_for=(smtplib.SMTPException, ConnectionError),
+  retry_backoff=True,
+  max_retries=3,
+)
+def send_templated_email(self, template_id: str, recipients: List[str], context: Dict[str, Any]) -> None:
+  with span('render_email', template=template_id):
+    email = build_email(template_id, recipients, context)
+  try:
+    deliver_messages([email])
+  except DependencyUnavailable as e:
+    logger.warning(f'Deferring {template_id} email: {str(e)}')
+    raise self.retry(exc=e, countdown=retry_countdown(self.request.retries, e))
+  logger.info(f'{template_id} email sent successfully to: {", ".join(recipients)}')
+
+@shared_task(bind=True, name='send_templated_emails', ignore_result=True, max_retries=5)
+def send_templated_emails(self, payloads: List[Dict[str, Any]]) -> int:
+  rendered = []
+  for payload in payloads:
+    try:
+      rendered.append((payload, build_email(**payload)))
+    except Exception as e:
+      logger.error(f'Failed to render {payload.get("template_id")} email: Error {str(e)}')
+
+  sent = 0
+  batch_size = settings.EMAIL_BATCH_SIZE
+  for start in range(0, len(rendered), batch_size):
+    batch = rendered[start:start + batch_size]
+    try:
+      sent += deliver_messages([message for _, message in batch], bulkhead='smtp-bulk')
+    except DependencyUnavailable as e:
+      # Hand the undelivered rest back to the broker instead of holding the
+      # worker while SMTP is unavailable.
+      remaining = [payload for payload, _ in rendered[start:]]
+      logger.warning(f'Deferring {len(remaining)} templated emails: {str(e)}')
+      raise self.retry(args=[remaining], exc=e, countdown=retry_countdown(self.request.retries, e))
+    except (smtplib.SMTPException, ConnectionError) as e:
+      # Retry only the messages the server has not accepted yet.
+      accepted = e.sent if isinstance(e, PartialDelivery) else 0
+      sent += accepted
+      remaining = [payload for payload, _ in rendered[start + accepted:]]
+      logger.warning(f'Retrying {len(remaining)} templated emails after {sent} were sent: {str(e)}')
+      raise self.retry(
+        args=[remaining],
+        exc=e,
+        countdown=get_exponential_backoff_interval(
+          settings.DEPENDENCY_RETRY_BACKOFF, self.request.retries, settings.DEPENDENCY_RETRY_BACKOFF_MAX
+        ),
+      )
+    except Exception as e:
+      logger.error(f'Failed to deliver email batch: Error {str(e)}')
+
+  logger.info(f'Delivered {sent} of {len(payloads)} templated emails')
+  return sent
+
+def import_report_key(import_id: str) -> str:
+  return f'customer_import:{import_id}'
+
+@shared_task(name='import_customers', ignore_result=True)
+def import_customers(import_id: str, path: str, file_format: str) -> None:
+  # The user model imports this module, so the importer is loaded lazily.
+  from .imports import run_import
+
+  key = import_report_key(import_id)
+  staging = get_staging_area()
+
+  def on_progress(report: Dict[str, Any]) -> None:
+    # Long imports keep their staged file leased while they run.
+    staging.renew(path)
+    cache.set(key, {'id': import_id, 'status': 'running', **report}, settings.CUSTOMER_IMPORT_REPORT_TTL)
+
+  if not staging.renew(path):
+    # The lease ran out while the task was queued and the sweeper removed
+    # the staged file.
+    logger.warning(f'Staged customer import {import_id} expired before processing')
+    report = cache.get(key) or {}
+    cache.set(
+      key,
+      {**report, 'id': import_id, 'status': 'failed', 'error': 'Staged file expired before processing.'},
+      settings.CUSTOMER_IMPORT_REPORT_TTL,
+    )
+    return
+
+  try:
+    with open(path, 'rb') as stream:
+      report = run_import(
+        stream,
+        file_format,
+        settings.CUSTOMER_IMPORT_BATCH_SIZE,
+        settings.CUSTOMER_IMPORT_HASH_WORKERS,
+        settings.CUSTOMER_IMPORT_MAX_ERRORS,
+        on_progress=on_progress,
+      )
+    cache.set(key, {'id': import_id, 'status': 'done', **report}, settings.CUSTOMER_IMPORT_REPORT_TTL)
+  except Exception as e:
+    logger.error(f'Customer import {import_id} failed: Error {str(e)}')
+    report = cache.get(key) or {}
+    cache.set(key, {**report, 'id': import_id, 'status': 'failed', 'error': str(e)}, settings.CUSTOMER_IMPORT_REPORT_TTL)
+  finally:
+    staging.release(path)
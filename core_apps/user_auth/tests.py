@@ -0,0 +1,110 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+
+from djoser.utils import encode_uid
+
+from core_apps.common.testing import PASSWORD, QueryBudgetTestCase
+
+User = get_user_model()
+
+class AuthQueryBudgetTests(QueryBudgetTestCase):
+  covered_urls = {
+    'user-list',
+    'user-activation',
+    'user-resend-activation',
+    'user-me',
+    'user-detail',
+    'user-reset-password',
+    'user-reset-password-confirm',
+    'user-set-password',
+    'login',
+    'verify_otp',
+    'refresh',
+    'logout',
+    'customer_import_detail',
+  }
+
+  def register(self) -> None:
+    self.assertQueryBudget(19, self.client_for(), 'post', reverse('user-list'), {
+      'email': 'budget-new@example.com',
+      'username': 'QBNEW',
+      'password': PASSWORD,
+      're_password': PASSWORD,
+      'first_name': 'Budget',
+      'last_name': 'New',
+      'id_no': 90_099_999,
+      'security_question': User.SecurityQuestions.MAIDEN_NAME,
+      'security_answer': 'budget',
+    }, status=201)
+
+  def log_in(self, client) -> None:
+    self.assertQueryBudget(10, client, 'post', reverse('login'), {'email': self.customer.email, 'password': PASSWORD})
+
+  def verify_otp(self, client) -> None:
+    otp = User.objects.get(pk=self.customer.pk).otp
+    self.assertQueryBudget(6, client, 'post', reverse('verify_otp'), {'otp': otp})
+
+  def test_register(self) -> None:
+    self.register()
+
+  def test_activation(self) -> None:
+    self.register()
+    user = User.objects.get(email='budget-new@example.com')
+    self.assertQueryBudget(6, self.client_for(), 'post', reverse('user-activation'), {
+      'uid': encode_uid(user.pk),
+      'token': default_token_generator.make_token(user),
+    }, status=204)
+
+  def test_resend_activation(self) -> None:
+    self.assertQueryBudget(1, self.client_for(), 'post', reverse('user-resend-activation'), {'email': self.customer.email}, status=204)
+
+  def test_me(self) -> None:
+    self.assertQueryBudget(1, self.client_for(self.customer), 'get', reverse('user-me'))
+
+  def test_user_list(self) -> None:
+    self.assertFlatQueryBudget(3, self.client_for(self.customer), reverse('user-list'))
+
+  def test_user_detail(self) -> None:
+    self.assertQueryBudget(2, self.client_for(self.customer), 'get', reverse('user-detail', kwargs={'id': self.customer.id}))
+
+  def test_reset_password(self) -> None:
+    self.assertQueryBudget(2, self.client_for(), 'post', reverse('user-reset-password'), {'email': self.customer.email}, status=204)
+
+  def test_reset_password_confirm(self) -> None:
+    self.assertQueryBudget(6, self.client_for(), 'post', reverse('user-reset-password-confirm'), {
+      'uid': encode_uid(self.customer.pk),
+      'token': default_token_generator.make_token(self.customer),
+      'new_password': PASSWORD,
+      're_new_password': PASSWORD,
+    }, status=204)
+
+  def test_set_password(self) -> None:
+    self.assertQueryBudget(6, self.client_for(self.customer), 'post', reverse('user-set-password'), {
+      'current_password': PASSWORD,
+      'new_password': PASSWORD,
+      're_new_password': PASSWORD,
+    }, status=204)
+
+  def test_login(self) -> None:
+    self.log_in(self.client_for())
+
+  def test_verify_otp(self) -> None:
+    client = self.client_for()
+    self.log_in(client)
+    self.verify_otp(client)
+
+  def test_refresh(self) -> None:
+    client = self.client_for()
+    self.log_in(client)
+    self.verify_otp(client)
+    self.assertQueryBudget(1, client, 'post', reverse('refresh'), {})
+
+  def test_logout(self) -> None:
+    self.assertQueryBudget(1, self.client_for(self.customer), 'post', reverse('logout'), {}, status=204)
+
+  def test_customer_import_detail(self) -> None:
+    path = reverse('customer_import_detail', kwargs={'pk': uuid.UUID(int=1)})
+    self.assertQueryBudget(1, self.client_for(self.manager), 'get', path, status=404)
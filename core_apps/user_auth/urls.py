@@ -1,10 +1,19 @@
 from django.urls import path
 
-from .views import CustomTokenCreateView, CustomTokenRefreshView, LogoutAPIView, OTPVerifyView
+from .views import (
+  CustomerImportAPIView,
+  CustomerImportDetailAPIView,
+  CustomTokenCreateView,
+  CustomTokenRefreshView,
+  LogoutAPIView,
+  OTPVerifyView,
+)
 
 urlpatterns = [
   path('login/', CustomTokenCreateView.as_view(), name='login'),
   path('verify-otp/', OTPVerifyView.as_view(), name='verify_otp'),
   path('refresh/', CustomTokenRefreshView.as_view(), name='refresh'),
   path('logout/', LogoutAPIView.as_view(), name='logout'),
+  path('imports/', CustomerImportAPIView.as_view(), name='customer_imports'),
+  path('imports/<uuid:pk>/', CustomerImportDetailAPIView.as_view(), name='customer_import_detail'),
 ]
\ No newline at end of file
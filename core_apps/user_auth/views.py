@@ -1,7 +1,9 @@
+import uuid
 from typing import Any, Optional
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
 
 from djoser.views import TokenCreateView
@@ -10,6 +12,7 @@ from djoser.views import User
 from loguru import logger
 
 from rest_framework import permissions, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
@@ -17,7 +20,14 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from core_apps.common.metrics import login_failures
+from core_apps.common.permissions import IsBranchManager
+from core_apps.user_profile.staging import StagingAreaFull, get_staging_area
+
 from .emails import send_otp_email
+from .hashing import HashingPoolSaturated
+from .imports import IMPORT_FORMATS, detect_format
+from .tasks import import_customers, import_report_key
 from .utils import generate_otp
 
 User = get_user_model()
@@ -74,7 +84,16 @@ class CustomTokenCreateView(TokenCreateView):
 
     try:
       serializer.is_valid(raise_exception=True)
+    except HashingPoolSaturated:
+      return Response(
+        {
+          'error': 'The service is busy. Please try again shortly.',
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+      )
     except Exception:
+      login_failures.inc()
       email = request.data.get('email')
       user = User.objects.filter(email=email).first()
 
@@ -188,4 +207,80 @@ class LogoutAPIView(APIView):
     response.delete_cookie('access')
     response.delete_cookie('logged_in')
 
-    return response
\ No newline at end of file
+    return response
+
+class CustomerImportAPIView(APIView):
+  permission_classes = [permissions.IsAdminUser | IsBranchManager]
+  parser_classes = [MultiPartParser]
+
+  def post(self, request: Request) -> Response:
+    uploaded = request.FILES.get('file')
+    if not uploaded:
+      return Response(
+        {
+          'error': 'A CSV or NDJSON file is required',
+        },
+        status=status.HTTP_400_BAD_REQUEST
+      )
+
+    file_format = request.data.get('format') or detect_format(uploaded.name)
+    if file_format not in IMPORT_FORMATS:
+      return Response(
+        {
+          'error': f'Unsupported import format, use one of: {", ".join(IMPORT_FORMATS)}',
+        },
+        status=status.HTTP_400_BAD_REQUEST
+      )
+
+    import_id = str(uuid.uuid4())
+    staging = get_staging_area()
+    try:
+      path = staging.allocate('import', import_id)
+    except StagingAreaFull:
+      return Response(
+        {
+          'error': 'The service is busy. Please try again shortly.',
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '60'},
+      )
+
+    with open(path, 'wb') as staged:
+      for chunk in uploaded.chunks(settings.UPLOAD_STREAM_BLOCK_SIZE):
+        staged.write(chunk)
+
+    report = {'id': import_id, 'status': 'queued', 'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    cache.set(import_report_key(import_id), report, settings.CUSTOMER_IMPORT_REPORT_TTL)
+    try:
+      import_customers.delay(import_id, path, file_format)
+    except Exception as e:
+      logger.error(f'Failed to queue customer import {import_id}: Error {str(e)}')
+      staging.release(path)
+      cache.set(
+        import_report_key(import_id),
+        {**report, 'status': 'failed', 'error': 'The import could not be queued'},
+        settings.CUSTOMER_IMPORT_REPORT_TTL,
+      )
+      return Response(
+        {
+          'error': 'The service is busy. Please try again shortly.',
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '60'},
+      )
+    logger.info(f'Customer import {import_id} queued by {request.user.email}')
+    return Response(report, status=status.HTTP_202_ACCEPTED)
+
+class CustomerImportDetailAPIView(APIView):
+  permission_classes = [permissions.IsAdminUser | IsBranchManager]
+
+  def get(self, request: Request, pk: uuid.UUID) -> Response:
+    report = cache.get(import_report_key(str(pk)))
+    if report is None:
+      return Response(
+        {
+          'error': 'Import not found',
+        },
+        status=status.HTTP_404_NOT_FOUND
+      )
+    return Response(report, status=status.HTTP_200_OK)
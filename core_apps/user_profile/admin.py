@@ -5,7 +5,7 @@ from django.utils.translation import gettext_lazy as _
 
 from cloudinary.forms import CloudinaryFileField
 
-from .models import NextOfKin, Profile
+from .models import NextOfKin, Profile, UploadJob
 
 class ProfileAdminForm(forms.ModelForm):
   photo = CloudinaryFileField(
@@ -61,6 +61,9 @@ class ProfileAdmin(admin.ModelAdmin):
   readonly_fields = [
     'user'
   ]
+  list_select_related = [
+    'user'
+  ]
   fieldsets = (
     (
       _('Personal Information'),
@@ -153,9 +156,43 @@ class NextOfKinAdmin(admin.ModelAdmin):
     'last_name',
     'profile__user__email',
   ]
+  list_select_related = [
+    'profile__user',
+  ]
 
   def full_name(self, obj) -> str:
     return f"{obj.first_name} {obj.last_name}"
   
   full_name.short_description = _('Full name')
-  
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+  list_display = [
+    'profile',
+    'field',
+    'status',
+    'queued_at',
+    'started_at',
+    'finished_at',
+  ]
+  list_filter = [
+    'field',
+    'status',
+  ]
+  search_fields = [
+    'profile__user__email',
+  ]
+  list_select_related = [
+    'profile__user',
+  ]
+  readonly_fields = [
+    'profile',
+    'field',
+    'status',
+    'content_hash',
+    'url',
+    'error',
+    'queued_at',
+    'started_at',
+    'finished_at',
+  ]
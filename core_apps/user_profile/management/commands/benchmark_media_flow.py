@@ -0,0 +1,179 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.celery_app import app
+
+from ...models import Profile, UploadJob
+
+User = get_user_model()
+
+LOCAL_BACKEND = 'core_apps.common.media_storage.LocalMediaStorage'
+
+def random_jpeg(size: int) -> bytes:
+  # Noise keeps every image distinct so uploads are never de-duplicated.
+  image = Image.frombytes('RGB', (size, size), os.urandom(size * size * 3))
+  buffer = io.BytesIO()
+  image.save(buffer, format='JPEG', quality=85)
+  return buffer.getvalue()
+
+def percentile(values: List[float], pct: float) -> float:
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+class Command(BaseCommand):
+  help = 'Drive profile photo uploads end to end (PATCH, upload task, URL populated) against the local media stand-in.'
+
+  def add_arguments(self, parser: CommandParser) -> None:
+    parser.add_argument('--users', type=int, default=8, help='Concurrent users, each uploading sequentially.')
+    parser.add_argument('--uploads', type=int, default=5, help='Uploads per user.')
+    parser.add_argument('--image-size', type=int, default=256, help='Edge length of the generated images in pixels.')
+    parser.add_argument('--latency-ms', type=float, default=150)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for each upload job.')
+    parser.add_argument(
+      '--workers',
+      action='store_true',
+      help='Hand tasks to running media workers instead of executing them in-process. '
+           'Workers must be started with MEDIA_STORAGE_BACKEND set to the local stand-in.'
+    )
+
+  def create_users(self, count: int, run_id: str) -> List[Any]:
+    return [
+      User.objects.create_user(
+        email=f'media-bench-{run_id}-{i}@example.com',
+        password=uuid.uuid4().hex,
+        first_name='Media',
+        last_name=f'Bench{i}',
+        id_no=int(run_id[:5], 16) * 1000 + i,
+        security_question=User.SecurityQuestions.MAIDEN_NAME,
+        security_answer='bench',
+      )
+      for i in range(count)
+    ]
+
+  def wait_for_job(self, profile_id: str, after: float, timeout: float) -> UploadJob:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+      job = (
+        UploadJob.objects.filter(profile_id=profile_id, field=UploadJob.Field.PHOTO)
+        .order_by('-queued_at')
+        .first()
+      )
+      if job is not None and job.queued_at.timestamp() >= after and job.is_finished:
+        return job
+      time.sleep(0.05)
+    return None
+
+  def run_user(self, user: Any, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    client = Client(SERVER_NAME='localhost')
+    client.cookies[settings.COOKIE_NAME] = str(AccessToken.for_user(user))
+    profile_id = str(user.profile.id)
+    url = reverse('profile_detail')
+    samples = []
+
+    try:
+      for _ in range(options['uploads']):
+        image = io.BytesIO(random_jpeg(options['image_size']))
+        image.name = 'photo.jpg'
+        started_at = time.time()
+        start = time.perf_counter()
+        response = client.patch(
+          url,
+          data=encode_multipart(BOUNDARY, {'photo': image}),
+          content_type=MULTIPART_CONTENT,
+        )
+        patch_ms = (time.perf_counter() - start) * 1000
+
+        if response.status_code != 200:
+          samples.append({'patch_ms': patch_ms, 'status': f'http_{response.status_code}'})
+          continue
+
+        job = self.wait_for_job(profile_id, started_at - 1, options['timeout'])
+        total_ms = (time.perf_counter() - start) * 1000
+        if job is None:
+          samples.append({'patch_ms': patch_ms, 'status': 'timeout'})
+          continue
+
+        status = job.status
+        if status == UploadJob.Status.DONE:
+          if Profile.objects.filter(id=profile_id, photo_url=job.url).exclude(photo_url='').exists():
+            status = 'url_populated'
+          else:
+            status = 'url_missing'
+        samples.append({'patch_ms': patch_ms, 'total_ms': total_ms, 'status': status})
+    finally:
+      connection.close()
+    return samples
+
+  def report(self, samples: List[Dict[str, Any]], elapsed: float) -> None:
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+      statuses[sample['status']] = statuses.get(sample['status'], 0) + 1
+    patch_ms = [sample['patch_ms'] for sample in samples]
+    total_ms = [sample['total_ms'] for sample in samples if sample['status'] == 'url_populated']
+
+    self.stdout.write(f'{len(samples)} uploads in {elapsed:.2f}s ({len(samples) / elapsed:.1f}/s)')
+    for status, count in sorted(statuses.items()):
+      self.stdout.write(f'  {status:<14} {count:6d}')
+    for label, values in (('PATCH', patch_ms), ('end to end', total_ms)):
+      self.stdout.write(
+        f'{label:<11} p50 {percentile(values, 50):8.1f} ms  p95 {percentile(values, 95):8.1f} ms  '
+        f'p99 {percentile(values, 99):8.1f} ms  max {max(values, default=0):8.1f} ms'
+      )
+
+  def handle(self, *args: Any, **options: Any) -> None:
+    if options['workers'] and settings.MEDIA_STORAGE['BACKEND'] != LOCAL_BACKEND:
+      raise CommandError(f'Set MEDIA_STORAGE_BACKEND={LOCAL_BACKEND} for the web process and media workers.')
+
+    media_root = tempfile.mkdtemp(prefix='media-bench-')
+    run_id = uuid.uuid4().hex
+    always_eager = app.conf.task_always_eager
+    app.conf.task_always_eager = not options['workers']
+    users = []
+
+    storage = {'BACKEND': LOCAL_BACKEND, 'OPTIONS': {'root': media_root}}
+    simulation = {
+      'LATENCY_MS': options['latency_ms'],
+      'JITTER_MS': options['jitter_ms'],
+      'FAILURE_RATE': options['failure_rate'],
+    }
+
+    try:
+      with override_settings(MEDIA_STORAGE=storage, LOCAL_MEDIA_STORAGE=simulation):
+        users = self.create_users(options['users'], run_id)
+        mode = 'media workers' if options['workers'] else 'in-process tasks'
+        self.stdout.write(
+          f'{len(users)} users x {options["uploads"]} uploads via {mode}, '
+          f'latency {options["latency_ms"]}+{options["jitter_ms"]} ms, failure rate {options["failure_rate"]}'
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+          results = list(executor.map(lambda user: self.run_user(user, options), users))
+        elapsed = time.perf_counter() - start
+
+      self.report([sample for samples in results for sample in samples], elapsed)
+    finally:
+      app.conf.task_always_eager = always_eager
+      User.objects.filter(id__in=[user.id for user in users]).delete()
+      shutil.rmtree(media_root, ignore_errors=True)
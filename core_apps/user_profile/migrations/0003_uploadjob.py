@@ -0,0 +1,103 @@
+# Generated by Django 4.2.15 on 2026-10-19 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_profile", "0002_alter_profile_phone_number"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[
+                            ("photo", "Photo"),
+                            ("id_photo", "ID Photo"),
+                            ("signature_photo", "Signature Photo"),
+                        ],
+                        max_length=20,
+                        verbose_name="Field",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("processing", "Processing"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                            ("superseded", "Superseded"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(max_length=64, verbose_name="Content Hash"),
+                ),
+                (
+                    "url",
+                    models.URLField(blank=True, null=True, verbose_name="Url"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Error")),
+                (
+                    "queued_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Queued At"
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Started At"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Finished At"
+                    ),
+                ),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_jobs",
+                        to="user_profile.profile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-queued_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["profile", "field", "-queued_at"],
+                        name="upload_job_profile_field_idx",
+                    )
+                ],
+            },
+        ),
+    ]
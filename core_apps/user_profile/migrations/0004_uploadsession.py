@@ -0,0 +1,88 @@
+# Generated by Django 4.2.15 on 2026-10-19 10:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_profile", "0003_uploadjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[
+                            ("photo", "Photo"),
+                            ("id_photo", "ID Photo"),
+                            ("signature_photo", "Signature Photo"),
+                        ],
+                        max_length=20,
+                        verbose_name="Field",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "Open"), ("finalized", "Finalized")],
+                        default="open",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "total_size",
+                    models.PositiveBigIntegerField(verbose_name="Total Size"),
+                ),
+                (
+                    "received_size",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Received Size"
+                    ),
+                ),
+                (
+                    "path",
+                    models.CharField(max_length=255, verbose_name="Staging Path"),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="Expires At")),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="user_profile.profile",
+                    ),
+                ),
+                (
+                    "upload_job",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="user_profile.uploadjob",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.15 on 2026-10-19 11:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("user_profile", "0004_uploadsession"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="profile",
+            index=models.Index(fields=["-created_at"], name="profile_created_at_idx"),
+        ),
+    ]
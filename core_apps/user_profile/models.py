@@ -6,6 +6,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumberField
@@ -230,6 +231,11 @@ class Profile(TimeStampedModel):
   def __str__(self) -> str:
     return f"{self.title} {self.user.last_name}'s Profile"
 
+  class Meta:
+    indexes = [
+      models.Index(fields=['-created_at'], name='profile_created_at_idx'),
+    ]
+
 class NextOfKin(TimeStampedModel):
   class Salutation(models.TextChoices):
     MR = ('mr', _('Mr'),)
@@ -327,4 +333,120 @@ class NextOfKin(TimeStampedModel):
         condition=models.Q(is_primary=True),
         name='unique_primary_next_of_kin',
       )
-    ]
\ No newline at end of file
+    ]
+
+class UploadJob(TimeStampedModel):
+  class Field(models.TextChoices):
+    PHOTO = ('photo', _('Photo'),)
+    ID_PHOTO = ('id_photo', _('ID Photo'),)
+    SIGNATURE_PHOTO = ('signature_photo', _('Signature Photo'),)
+
+  class Status(models.TextChoices):
+    QUEUED = ('queued', _('Queued'),)
+    PROCESSING = ('processing', _('Processing'),)
+    DONE = ('done', _('Done'),)
+    FAILED = ('failed', _('Failed'),)
+    SUPERSEDED = ('superseded', _('Superseded'),)
+
+  profile = models.ForeignKey(
+    Profile,
+    on_delete=models.CASCADE,
+    related_name='upload_jobs'
+  )
+  field = models.CharField(
+    _('Field'),
+    max_length=20,
+    choices=Field.choices
+  )
+  status = models.CharField(
+    _('Status'),
+    max_length=20,
+    choices=Status.choices,
+    default=Status.QUEUED
+  )
+  content_hash = models.CharField(
+    _('Content Hash'),
+    max_length=64
+  )
+  url = models.URLField(
+    _('Url'),
+    blank=True,
+    null=True
+  )
+  error = models.TextField(
+    _('Error'),
+    blank=True
+  )
+  queued_at = models.DateTimeField(
+    _('Queued At'),
+    default=timezone.now
+  )
+  started_at = models.DateTimeField(
+    _('Started At'),
+    blank=True,
+    null=True
+  )
+  finished_at = models.DateTimeField(
+    _('Finished At'),
+    blank=True,
+    null=True
+  )
+
+  @property
+  def is_finished(self) -> bool:
+    return self.status in [self.Status.DONE, self.Status.FAILED, self.Status.SUPERSEDED]
+
+  def __str__(self) -> str:
+    return f"{self.field} upload for profile {self.profile_id} - {self.get_status_display()}"
+
+  class Meta:
+    ordering = ['-queued_at']
+    indexes = [
+      models.Index(fields=['profile', 'field', '-queued_at'], name='upload_job_profile_field_idx'),
+    ]
+
+class UploadSession(TimeStampedModel):
+  class Status(models.TextChoices):
+    OPEN = ('open', _('Open'),)
+    FINALIZED = ('finalized', _('Finalized'),)
+
+  profile = models.ForeignKey(
+    Profile,
+    on_delete=models.CASCADE,
+    related_name='upload_sessions'
+  )
+  field = models.CharField(
+    _('Field'),
+    max_length=20,
+    choices=UploadJob.Field.choices
+  )
+  status = models.CharField(
+    _('Status'),
+    max_length=20,
+    choices=Status.choices,
+    default=Status.OPEN
+  )
+  total_size = models.PositiveBigIntegerField(_('Total Size'))
+  received_size = models.PositiveBigIntegerField(
+    _('Received Size'),
+    default=0
+  )
+  path = models.CharField(
+    _('Staging Path'),
+    max_length=255
+  )
+  expires_at = models.DateTimeField(_('Expires At'))
+  upload_job = models.ForeignKey(
+    UploadJob,
+    on_delete=models.SET_NULL,
+    blank=True,
+    null=True,
+    related_name='+'
+  )
+
+  @property
+  def is_complete(self) -> bool:
+    return self.received_size == self.total_size
+
+  def __str__(self) -> str:
+    return f"{self.field} upload session for profile {self.profile_id} - {self.received_size}/{self.total_size}"
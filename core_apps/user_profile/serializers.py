@@ -1,11 +1,8 @@
-import base64
 from typing import Any, Dict
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
 
 from django_countries.serializer_fields import CountryField
 
@@ -14,8 +11,11 @@ from phonenumber_field.serializerfields import PhoneNumberField
 from rest_framework import serializers
 
 from core_apps.common.models import ContentView
-from .models import Profile, NextOfKin
-from .tasks import upload_photos_to_cloudinary
+from .models import Profile, NextOfKin, UploadJob, UploadSession
+from .staging import get_staging_area
+from .tasks import UploadQueueUnavailable, queue_photo_uploads
+from .upload_handlers import StagedUploadedFile
+from .uploads import UPLOAD_FIELDS, stage_uploaded_file, start_upload_job
 
 User = get_user_model()
 
@@ -32,7 +32,7 @@ class NextOfKinSerializer(serializers.ModelSerializer):
     model = NextOfKin
     exclude = ['profile']
   
-  def create(self, **validated_data: dict) -> NextOfKin:
+  def create(self, validated_data: dict) -> NextOfKin:
     profile = self.context.get('profile')
 
     if not profile:
@@ -128,15 +128,6 @@ class ProfileSerializer(serializers.ModelSerializer):
     
     return attrs
   
-  def to_representation(self, instance: Profile) -> dict:
-    representation = super().to_representation(instance)
-
-    representation['next_of_kin'] = NextOfKinSerializer(
-      instance.next_of_kin.all(), many=True
-    ).data
-
-    return representation
-  
   def update(self, instance: Profile, validated_data: dict) -> Profile:
     user_data = validated_data.pop('user', {})
 
@@ -146,35 +137,42 @@ class ProfileSerializer(serializers.ModelSerializer):
           setattr(instance.user, attr, value)
       instance.user.save()
     
-    photos_to_upload = {}
+    photos = {
+      field: validated_data.pop(field)
+      for field in UPLOAD_FIELDS
+      if field in validated_data
+    }
 
-    for field in ['photo', 'id_photo', 'signature_photo']:
-      if field in validated_data:
-        photo = validated_data.pop(field)
-        if photo.size > settings.MAX_UPLOAD_SIZE:
-          temp_file = default_storage.save(
-            f"temp_{instance.id}_{field}.jpg",
-            ContentFile(photo.read())
-          )
-          temp_file_path = default_storage.path(temp_file)
-          photos_to_upload[field] = {
-            'type': 'file',
-            'path': temp_file_path
-          }
-        else:
-          image_content = photo.read()
-          encoded_image = base64.b64encode(image_content).decode('utf-8')
-          photos_to_upload[field] = {
-            'type': 'base64',
-            'data': encoded_image
-          }
-    
     for attr, value in validated_data.items():
       setattr(instance, attr, value)
     instance.save()
 
+    photos_to_upload = {}
+
+    for field, photo in photos.items():
+      if isinstance(photo, StagedUploadedFile):
+        path, digest = photo.temporary_file_path(), photo.sha256
+        photo.close()
+      else:
+        path, digest = stage_uploaded_file(photo)
+      job = start_upload_job(str(instance.id), field, digest)
+      if job is None:
+        get_staging_area().release(path)
+        continue
+      photos_to_upload[field] = {
+        'type': 'file',
+        'path': path,
+        'hash': digest,
+        'job_id': str(job.id)
+      }
+
     if photos_to_upload:
-      upload_photos_to_cloudinary.delay(str(instance.id), photos_to_upload)
+      try:
+        queue_photo_uploads(str(instance.id), photos_to_upload)
+      except UploadQueueUnavailable:
+        for photo_data in photos_to_upload.values():
+          get_staging_area().release(photo_data['path'])
+        raise
     
     return instance
   
@@ -185,6 +183,55 @@ class ProfileSerializer(serializers.ModelSerializer):
       object_id=obj.id
     ).count()
   
+class UploadJobSerializer(serializers.ModelSerializer):
+  id = UUIDField(read_only=True)
+
+  class Meta:
+    model = UploadJob
+    fields = [
+      'id',
+      'field',
+      'status',
+      'url',
+      'error',
+      'queued_at',
+      'started_at',
+      'finished_at',
+    ]
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+  id = UUIDField(read_only=True)
+  upload_job = UUIDField(source='upload_job_id', read_only=True)
+  chunk_size = serializers.SerializerMethodField()
+
+  class Meta:
+    model = UploadSession
+    fields = [
+      'id',
+      'field',
+      'status',
+      'total_size',
+      'received_size',
+      'chunk_size',
+      'expires_at',
+      'upload_job',
+    ]
+    read_only_fields = [
+      'status',
+      'received_size',
+      'expires_at',
+    ]
+
+  def validate_total_size(self, value: int) -> int:
+    if value <= 0 or value > settings.UPLOAD_SESSION_MAX_SIZE:
+      raise serializers.ValidationError(
+        f'The file size must be between 1 and {settings.UPLOAD_SESSION_MAX_SIZE} bytes.'
+      )
+    return value
+
+  def get_chunk_size(self, obj: UploadSession) -> int:
+    return settings.UPLOAD_CHUNK_SIZE
+
 class ProfileListSerializer(serializers.ModelSerializer):
   full_name = serializers.ReadOnlyField(source='user.full_name')
   username = serializers.ReadOnlyField(source='user.username')
@@ -201,6 +248,7 @@ class ProfileListSerializer(serializers.ModelSerializer):
       'country_of_birth',
       'email',
       'phone_number',
+      'photo',
     ]
   
   def get_photo(self, obj: Profile) -> str | None:
@@ -0,0 +1,144 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from loguru import logger
+
+class StagingAreaFull(Exception):
+  pass
+
+class StagingArea:
+  # Files in the staging area are leased by modification time: a file is in
+  # use while it was written or renewed within the lease TTL of its kind.
+  # Writers renew implicitly, tasks renew with `renew()` before using a file,
+  # and the periodic sweeper removes anything whose lease expired, including
+  # files orphaned by workers killed mid-task.
+  def __init__(self, root: str, lease_ttls: Dict[str, float], default_ttl: float, max_bytes: int, min_free_bytes: int) -> None:
+    self.root = Path(root)
+    self.lease_ttls = lease_ttls
+    self.default_ttl = default_ttl
+    self.max_bytes = max_bytes
+    self.min_free_bytes = min_free_bytes
+    self._usage_bytes: Optional[int] = None
+    self._usage_checked_at = 0.0
+    self._lock = threading.Lock()
+
+  def lease_ttl(self, name: str) -> float:
+    return self.lease_ttls.get(name.split('_', 1)[0], self.default_ttl)
+
+  def has_capacity(self) -> bool:
+    # Directory scans are cached briefly so bursts do not rescan per upload.
+    now = time.monotonic()
+    with self._lock:
+      if self._usage_bytes is None or now - self._usage_checked_at > 5:
+        self._usage_bytes = self.usage()['bytes']
+        self._usage_checked_at = now
+      usage_bytes = self._usage_bytes
+    free_bytes = shutil.disk_usage(self.root).free
+    return usage_bytes < self.max_bytes and free_bytes > self.min_free_bytes
+
+  def allocate(self, kind: str, name: Optional[str]=None) -> str:
+    self.root.mkdir(parents=True, exist_ok=True)
+    if not self.has_capacity():
+      logger.warning(f'Upload staging area at {self.root} is full')
+      raise StagingAreaFull()
+    path = self.root / f'{kind}_{name or uuid.uuid4().hex}'
+    path.touch()
+    return str(path)
+
+  def renew(self, path: str) -> bool:
+    try:
+      os.utime(path)
+      return True
+    except FileNotFoundError:
+      return False
+
+  def release(self, path: str) -> None:
+    try:
+      os.remove(path)
+    except FileNotFoundError:
+      pass
+
+  def is_expired(self, entry: os.DirEntry, now: float) -> bool:
+    return entry.stat().st_mtime + self.lease_ttl(entry.name) < now
+
+  def sweep(self, batch_size: int) -> Dict[str, int]:
+    removed = removed_bytes = 0
+    if not self.root.exists():
+      return {'removed': 0, 'removed_bytes': 0}
+
+    now = time.time()
+    with os.scandir(self.root) as entries:
+      for entry in entries:
+        if removed >= batch_size:
+          break
+        try:
+          if entry.is_file() and self.is_expired(entry, now):
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            removed += 1
+            removed_bytes += size
+        except FileNotFoundError:
+          continue
+    return {'removed': removed, 'removed_bytes': removed_bytes}
+
+  def usage(self) -> Dict[str, Any]:
+    files = total_bytes = expired = 0
+    oldest_mtime = None
+    now = time.time()
+
+    if self.root.exists():
+      with os.scandir(self.root) as entries:
+        for entry in entries:
+          try:
+            if not entry.is_file():
+              continue
+            stat = entry.stat()
+          except FileNotFoundError:
+            continue
+          files += 1
+          total_bytes += stat.st_size
+          expired += stat.st_mtime + self.lease_ttl(entry.name) < now
+          oldest_mtime = stat.st_mtime if oldest_mtime is None else min(oldest_mtime, stat.st_mtime)
+
+    disk = shutil.disk_usage(self.root if self.root.exists() else self.root.parent)
+    return {
+      'files': files,
+      'bytes': total_bytes,
+      'expired_files': expired,
+      'oldest_age_seconds': round(now - oldest_mtime) if oldest_mtime else 0,
+      'disk_free_bytes': disk.free,
+      'disk_total_bytes': disk.total,
+    }
+
+_staging_area: Optional[StagingArea] = None
+
+def get_staging_area() -> StagingArea:
+  global _staging_area
+  if _staging_area is None:
+    _staging_area = StagingArea(
+      root=settings.UPLOAD_STAGING_ROOT,
+      lease_ttls={
+        'session': settings.UPLOAD_SESSION_TTL.total_seconds(),
+        'upload': settings.UPLOAD_STAGING_LEASE.total_seconds(),
+        'import': settings.CUSTOMER_IMPORT_STAGING_LEASE.total_seconds(),
+      },
+      default_ttl=settings.UPLOAD_STAGING_LEASE.total_seconds(),
+      max_bytes=settings.UPLOAD_STAGING_MAX_BYTES,
+      min_free_bytes=settings.UPLOAD_STAGING_MIN_FREE_BYTES,
+    )
+  return _staging_area
+
+@receiver(setting_changed)
+def reset_staging_area(setting: str, **kwargs) -> None:
+  global _staging_area
+  if setting.startswith('UPLOAD_STAGING_') or setting in ('UPLOAD_SESSION_TTL', 'CUSTOMER_IMPORT_STAGING_LEASE'):
+    _staging_area = None
@@ -1,38 +1,207 @@
 import base64
+import io
 from uuid import UUID
 
-import cloudinary.uploader
 from celery import shared_task
 
 from django.apps import apps
-from django.core.files.storage import default_storage
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from loguru import logger
 
-@shared_task(name='upload_photos_to_cloudinary')
-def upload_photos_to_cloudinary(profile_id: UUID, photos
+from core_apps.common.circuit_breaker import DependencyUnavailable, dependency_guard, retry_countdown
+from core_apps.common.media_storage import MediaStorageError, get_media_storage
+from core_apps.common.tracing import span
+
+from .staging import get_staging_area
+from .uploads import is_latest_upload, release_upload, renew_upload, update_upload_jobs
+
+STAGING_USAGE_KEY = 'upload:staging:usage'
+
+class UploadQueueUnavailable(Exception):
+  pass
+
+def discard_temp_file(photo_data: dict) -> None:
+  if photo_data['type'] == 'file':
+    get_staging_area().release(photo_data['path'])
+
+def fail_photo_uploads(profile_id: str, pending: dict, error: Exception) -> None:
+  logger.error(f"Failed to upload photos to profile {profile_id}: {str(error)}")
+
+  for field_name, photo_data in pending.items():
+    release_upload(profile_id, field_name, photo_data.get('hash'))
+    discard_temp_file(photo_data)
+  update_upload_jobs(
+    profile_id,
+    [photo_data.get('job_id') for photo_data in pending.values()],
+    status=apps.get_model('user_profile', 'UploadJob').Status.FAILED,
+    error=str(error),
+    finished_at=timezone.now(),
+  )
+
+@shared_task(bind=True, name='upload_photos_to_cloudinary', ignore_result=True, max_retries=settings.UPLOAD_TASK_MAX_RETRIES)
+def upload_photos_to_cloudinary(self, profile_id: UUID, photos
                                 : dict) -> None:
+  profile_id = str(profile_id)
+  upload_job_model = apps.get_model('user_profile', 'UploadJob')
+
+  # Drop uploads superseded by a newer submission for the same field before
+  # touching the network.
+  pending = {}
+  for field_name, photo_data in photos.items():
+    claim = renew_upload(profile_id, field_name, photo_data.get('hash'))
+    if claim == 'expired' or (photo_data['type'] == 'file' and not get_staging_area().renew(photo_data['path'])):
+      # The task was queued longer than the upload's lease: the sweeper
+      # removed the staged file, or its latest-upload claim ran out.
+      logger.warning(f"Staged {field_name} upload for profile {profile_id} expired before processing")
+      release_upload(profile_id, field_name, photo_data.get('hash'))
+      discard_temp_file(photo_data)
+      update_upload_jobs(
+        profile_id,
+        [photo_data.get('job_id')],
+        status=upload_job_model.Status.FAILED,
+        error='Staged file expired before processing.',
+        finished_at=timezone.now(),
+      )
+    elif claim == 'latest':
+      pending[field_name] = photo_data
+    else:
+      logger.info(f"Skipping stale {field_name} upload for profile {profile_id}")
+      discard_temp_file(photo_data)
+      update_upload_jobs(
+        profile_id,
+        [photo_data.get('job_id')],
+        status=upload_job_model.Status.SUPERSEDED,
+        finished_at=timezone.now(),
+      )
+
+  if not pending:
+    return
+
+  # Each photo is stored and its job finished as soon as it is uploaded, so
+  # a failure part way through only affects the photos not stored yet, and a
+  # retry only uploads those.
+  remaining = dict(pending)
   try:
-    profile_model = apps.get_model('user_profile', 'Profile')
-    profile = profile_model.objects.get(id=profile_id)
+    for field_name, photo_data in pending.items():
+      with dependency_guard('media'):
+        update_upload_jobs(
+          profile_id,
+          [photo_data.get('job_id')],
+          status=upload_job_model.Status.PROCESSING,
+          started_at=timezone.now(),
+        )
+        with span('media_upload', field=field_name):
+          if photo_data['type'] == 'base64':
+            image_content = base64.b64decode(photo_data['data'])
+            response = get_media_storage().upload(io.BytesIO(image_content))
+          else:
+            with open(photo_data['path'], 'rb') as image_file:
+              response = get_media_storage().upload(image_file)
+      store_uploaded_photo(profile_id, field_name, photo_data, response)
+      discard_temp_file(photo_data)
+      del remaining[field_name]
 
-    for field_name, photo_data in photos.items():
-      if photo_data['type'] == 'base64':
-        image_content = base64.b64decode(photo_data['data'])
-        response = cloudinary.uploader.upload(image_content)
-      else:
-        with open(photo_data['data'], 'rb') as image_file:
-          response = cloudinary.uploader.upload(image_file)
-        default_storage.delete(photo_data['path'])
+    logger.info(f"Photos for profile {profile_id} uploaded successfully.")
+
+  except (DependencyUnavailable, MediaStorageError) as e:
+    if self.request.retries < self.max_retries:
+      logger.warning(f"Deferring {len(remaining)} photo upload(s) for profile {profile_id}: {str(e)}")
+      raise self.retry(args=[profile_id, remaining], countdown=retry_countdown(self.request.retries, e))
+    fail_photo_uploads(profile_id, remaining, e)
+
+  except Exception as e:
+    fail_photo_uploads(profile_id, remaining, e)
+
+def store_uploaded_photo(profile_id: str, field_name: str, photo_data: dict, response: dict) -> None:
+  upload_job_model = apps.get_model('user_profile', 'UploadJob')
+
+  # A newer upload may have been claimed while this one was in flight.
+  # Re-check under the profile's row lock, so a stale task that finishes
+  # last cannot overwrite the newer photo.
+  with transaction.atomic():
+    profile = apps.get_model('user_profile', 'Profile').objects.select_for_update().get(id=profile_id)
+    is_latest = is_latest_upload(profile_id, field_name, photo_data.get('hash'))
+    if is_latest:
       setattr(profile, field_name, response['public_id'])
       setattr(profile, f'{field_name}_url', response['url'])
-    profile.save()
+      profile.save(update_fields=[field_name, f'{field_name}_url', 'updated_at'])
+
+  if is_latest:
+    update_upload_jobs(
+      profile_id,
+      [photo_data.get('job_id')],
+      status=upload_job_model.Status.DONE,
+      url=response['url'],
+      finished_at=timezone.now(),
+    )
+  else:
+    logger.info(f"Discarding stale {field_name} upload for profile {profile_id}")
+    update_upload_jobs(
+      profile_id,
+      [photo_data.get('job_id')],
+      status=upload_job_model.Status.SUPERSEDED,
+      finished_at=timezone.now(),
+    )
 
-    logger.info(f"Photos for {profile.user.email}'s profile uploaded successfully.")
-  
+def queue_photo_uploads(profile_id: str, photos: dict) -> None:
+  try:
+    upload_photos_to_cloudinary.delay(profile_id, photos)
   except Exception as e:
-    logger.error(f"Failed to upload photos to {profile.user.email}'s profile: {str(e)}")
+    for field_name, photo_data in photos.items():
+      release_upload(profile_id, field_name, photo_data.get('hash'))
+    update_upload_jobs(
+      profile_id,
+      [photo_data.get('job_id') for photo_data in photos.values()],
+      status=apps.get_model('user_profile', 'UploadJob').Status.FAILED,
+      error=str(e),
+      finished_at=timezone.now(),
+    )
+    raise UploadQueueUnavailable(str(e)) from e
+
+@shared_task(name='sweep_upload_staging', ignore_result=True)
+def sweep_upload_staging() -> None:
+  staging_area = get_staging_area()
+  batch_size = settings.UPLOAD_STAGING_SWEEP_BATCH_SIZE
+  upload_session_model = apps.get_model('user_profile', 'UploadSession')
+  upload_job_model = apps.get_model('user_profile', 'UploadJob')
+
+  # Open sessions are abandoned once they expire. Finalized ones are kept
+  # until they expire and their upload has finished, so clients can still
+  # look them up while the job runs.
+  expired_sessions = list(
+    upload_session_model.objects.filter(
+      Q(status=upload_session_model.Status.OPEN)
+      | Q(upload_job__isnull=True)
+      | Q(upload_job__status__in=[
+        upload_job_model.Status.DONE,
+        upload_job_model.Status.FAILED,
+        upload_job_model.Status.SUPERSEDED,
+      ]),
+      expires_at__lt=timezone.now(),
+    ).values_list('id', 'path')[:batch_size]
+  )
+  for _, path in expired_sessions:
+    staging_area.release(path)
+  upload_session_model.objects.filter(id__in=[session_id for session_id, _ in expired_sessions]).delete()
+
+  removed = removed_bytes = 0
+  for _ in range(settings.UPLOAD_STAGING_SWEEP_MAX_BATCHES):
+    result = staging_area.sweep(batch_size)
+    removed += result['removed']
+    removed_bytes += result['removed_bytes']
+    if result['removed'] < batch_size:
+      break
 
-    for photo_data in photos.values():
-      if photo_data['type'] == 'file' and default_storage.exists(photo_data['path']):
-        default_storage.delete(photo_data['path'])
\ No newline at end of file
+  usage = staging_area.usage()
+  cache.set(STAGING_USAGE_KEY, usage, timeout=None)
+  logger.info(
+    f"Staging sweep removed {removed} file(s), {removed_bytes} bytes and "
+    f"{len(expired_sessions)} expired upload session(s); {usage['files']} file(s), "
+    f"{usage['bytes']} bytes in use, oldest {usage['oldest_age_seconds']}s, "
+    f"{usage['disk_free_bytes']} bytes free"
+  )
@@ -0,0 +1,74 @@
+from django.urls import reverse
+
+from core_apps.common.testing import QueryBudgetTestCase, tiny_jpeg
+from core_apps.user_profile.models import UploadJob, UploadSession
+
+class ProfileQueryBudgetTests(QueryBudgetTestCase):
+  covered_urls = {
+    'all_profiles',
+    'profile_detail',
+    'next-of-kin-list',
+    'next-of-kin-detail',
+    'upload_status',
+    'upload_sessions',
+    'upload_session_detail',
+    'upload_session_finalize',
+  }
+
+  def test_all_profiles(self) -> None:
+    self.assertFlatQueryBudget(3, self.client_for(self.manager), reverse('all_profiles'))
+
+  def test_all_profiles_filtered(self) -> None:
+    self.assertFlatQueryBudget(3, self.client_for(self.manager), f"{reverse('all_profiles')}?user__last_name=Check")
+
+  def test_profile_detail(self) -> None:
+    self.assertFlatQueryBudget(9, self.client_for(self.customer), reverse('profile_detail'))
+
+  def test_profile_update(self) -> None:
+    self.assertQueryBudget(14, self.client_for(self.customer), 'patch', reverse('profile_detail'), {'city': 'Mombasa'})
+
+  def test_next_of_kin_list(self) -> None:
+    self.assertFlatQueryBudget(4, self.client_for(self.customer), reverse('next-of-kin-list'))
+
+  def test_next_of_kin_create(self) -> None:
+    self.assertQueryBudget(6, self.client_for(self.customer), 'post', reverse('next-of-kin-list'), {
+      'first_name': 'Kin',
+      'last_name': 'New',
+      'date_of_birth': '1985-05-05',
+      'relationship': 'Cousin',
+      'email_address': 'kin-new@example.com',
+      'phone_number': '+254700000001',
+      'address': '2 Budget Street',
+      'city': 'Nairobi',
+      'country': 'KE',
+      'is_primary': False,
+    }, status=201)
+
+  def test_next_of_kin_detail(self) -> None:
+    path = reverse('next-of-kin-detail', kwargs={'pk': self.kin[1].pk})
+    self.assertFlatQueryBudget(3, self.client_for(self.customer), path)
+
+  def test_next_of_kin_update(self) -> None:
+    path = reverse('next-of-kin-detail', kwargs={'pk': self.kin[1].pk})
+    self.assertQueryBudget(6, self.client_for(self.customer), 'patch', path, {'city': 'Kisumu'})
+
+  def test_next_of_kin_delete(self) -> None:
+    path = reverse('next-of-kin-detail', kwargs={'pk': self.kin[-1].pk})
+    self.assertQueryBudget(4, self.client_for(self.customer), 'delete', path, status=204)
+
+  def test_upload_status(self) -> None:
+    self.assertFlatQueryBudget(3, self.client_for(self.customer), reverse('upload_status'))
+
+  def test_upload_session(self) -> None:
+    client = self.client_for(self.customer)
+    image = tiny_jpeg()
+    self.assertQueryBudget(3, client, 'post', reverse('upload_sessions'), {'field': 'photo', 'total_size': len(image)}, status=201)
+    session = UploadSession.objects.get(profile=self.profile)
+
+    path = reverse('upload_session_detail', kwargs={'pk': session.pk})
+    self.assertQueryBudget(3, client, 'get', path)
+    self.assertQueryBudget(6, client, 'put', path, image, HTTP_CONTENT_RANGE=f'bytes 0-{len(image) - 1}/{len(image)}')
+    # Tasks run eagerly here, so this also counts storing the photo.
+    self.assertQueryBudget(18, client, 'post', reverse('upload_session_finalize', kwargs={'pk': session.pk}), {}, status=202)
+    session.refresh_from_db()
+    self.assertEqual(session.upload_job.status, UploadJob.Status.DONE)
@@ -0,0 +1,148 @@
+import hashlib
+import resource
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http import HttpRequest
+
+from loguru import logger
+from PIL import ImageFile
+
+from .staging import StagingAreaFull, get_staging_area
+
+# Image headers (including EXIF blocks) fit well within this; past it the
+# parser would only buffer data it cannot use.
+DIMENSION_PROBE_LIMIT = 256 * 1024
+
+class StagedUploadedFile(UploadedFile):
+  def __init__(
+    self,
+    path: str,
+    name: str,
+    content_type: str,
+    size: int,
+    charset: Optional[str],
+    content_type_extra: Optional[Dict[str, Any]],
+    sha256: str,
+    width: Optional[int],
+    height: Optional[int],
+  ) -> None:
+    super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+    self.path = path
+    self.sha256 = sha256
+    self.width = width
+    self.height = height
+
+  def temporary_file_path(self) -> str:
+    return self.path
+
+class StagingUploadHandler(FileUploadHandler):
+  # Streams each uploaded file straight into the staging area, hashing it and
+  # probing the image dimensions as chunks arrive, so the request never holds
+  # more than one chunk of the file in memory.
+  chunk_size = settings.UPLOAD_STREAM_BLOCK_SIZE
+
+  def __init__(self, request: Optional[HttpRequest]=None) -> None:
+    super().__init__(request)
+    self.staged = None
+    self.metrics = {
+      'files': 0,
+      'bytes': 0,
+      'peak_buffer_bytes': 0,
+      'maxrss_start_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+      'started_at': time.perf_counter(),
+    }
+    if request is not None:
+      request.upload_errors = {}
+      request.upload_metrics = self.metrics
+
+  def new_file(self, field_name: str, file_name: str, content_type: str, content_length: Optional[int], charset: Optional[str]=None, content_type_extra: Optional[Dict[str, Any]]=None) -> None:
+    super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+    try:
+      self.path = get_staging_area().allocate('upload')
+    except StagingAreaFull:
+      if self.request is not None:
+        self.request.upload_errors[field_name] = 'Uploads are temporarily unavailable, please retry later.'
+        self.request.upload_storage_full = True
+      raise SkipFile()
+    self.staged = open(self.path, 'wb')
+    self.digest = hashlib.sha256()
+    self.size = 0
+    self.parser = ImageFile.Parser()
+    self.probing = True
+    self.dimensions = None
+
+  def discard(self) -> None:
+    if self.staged is not None:
+      self.staged.close()
+      self.staged = None
+      get_staging_area().release(self.path)
+
+  def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+    self.size += len(raw_data)
+    if self.size > settings.MAX_UPLOAD_SIZE:
+      self.discard()
+      if self.request is not None:
+        self.request.upload_errors[self.field_name] = (
+          f'The file may not exceed {settings.MAX_UPLOAD_SIZE} bytes.'
+        )
+      raise SkipFile()
+
+    self.staged.write(raw_data)
+    self.digest.update(raw_data)
+
+    buffered = len(raw_data)
+    if self.probing:
+      try:
+        self.parser.feed(raw_data)
+      except Exception:
+        self.probing = False
+      if self.parser.image is not None:
+        self.dimensions = self.parser.image.size
+        self.probing = False
+      elif self.size > DIMENSION_PROBE_LIMIT:
+        self.probing = False
+      else:
+        buffered += len(self.parser.data or b'')
+    self.metrics['peak_buffer_bytes'] = max(self.metrics['peak_buffer_bytes'], buffered)
+
+  def file_complete(self, file_size: int) -> Optional[StagedUploadedFile]:
+    if self.staged is None:
+      return None
+
+    self.staged.close()
+    self.staged = None
+    self.metrics['files'] += 1
+    self.metrics['bytes'] += file_size
+    width, height = self.dimensions or (None, None)
+
+    return StagedUploadedFile(
+      path=self.path,
+      name=self.file_name,
+      content_type=self.content_type,
+      size=file_size,
+      charset=self.charset,
+      content_type_extra=self.content_type_extra,
+      sha256=self.digest.hexdigest(),
+      width=width,
+      height=height,
+    )
+
+  def upload_interrupted(self) -> None:
+    self.discard()
+
+  def upload_complete(self) -> None:
+    metrics = self.metrics
+    metrics['duration_ms'] = round((time.perf_counter() - metrics.pop('started_at')) * 1000, 2)
+    metrics['maxrss_growth_kb'] = (
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - metrics.pop('maxrss_start_kb')
+    )
+    if metrics['files']:
+      logger.info(
+        f"Streamed {metrics['files']} upload(s), {metrics['bytes']} bytes in "
+        f"{metrics['duration_ms']} ms, peak buffer {metrics['peak_buffer_bytes']} bytes, "
+        f"maxrss growth {metrics['maxrss_growth_kb']} KB"
+      )
@@ -0,0 +1,130 @@
+import hashlib
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import QuerySet
+from django_redis import get_redis_connection
+
+from .models import UploadJob
+from .staging import get_staging_area
+
+UPLOAD_FIELDS = ['photo', 'id_photo', 'signature_photo']
+
+# Deletes the key only while it still holds the caller's digest, so a failed
+# stale task cannot clear a newer pending upload.
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Refreshes the key's TTL only while it still holds the caller's digest.
+# Returns 1 for the latest upload, 0 when superseded and -1 when the key ran
+# out.
+RENEW_SCRIPT = """
+local latest = redis.call('get', KEYS[1])
+if not latest then
+  return -1
+end
+if latest == ARGV[1] then
+  redis.call('expire', KEYS[1], ARGV[2])
+  return 1
+end
+return 0
+"""
+
+def content_hash(chunks: Iterable[bytes]) -> str:
+  digest = hashlib.sha256()
+  for chunk in chunks:
+    digest.update(chunk)
+  return digest.hexdigest()
+
+def hash_file(path: str) -> str:
+  block_size = settings.UPLOAD_STREAM_BLOCK_SIZE
+  with open(path, 'rb') as staged:
+    return content_hash(iter(lambda: staged.read(block_size), b''))
+
+def stage_uploaded_file(uploaded_file: UploadedFile) -> Tuple[str, str]:
+  # Copies an upload that did not go through StagingUploadHandler into the
+  # staging area chunk by chunk, hashing on the way.
+  path = get_staging_area().allocate('upload')
+  digest = hashlib.sha256()
+  with open(path, 'wb') as staged:
+    for chunk in uploaded_file.chunks(settings.UPLOAD_STREAM_BLOCK_SIZE):
+      staged.write(chunk)
+      digest.update(chunk)
+  return path, digest.hexdigest()
+
+def latest_upload_key(profile_id: str, field: str) -> str:
+  return f'upload:latest:{profile_id}:{field}'
+
+def claim_upload(profile_id: str, field: str, digest: str) -> bool:
+  # Marks `digest` as the newest upload for the field. Returns False when the
+  # same content is already pending or was just uploaded, so retries and
+  # double submits do not enqueue duplicate uploads.
+  connection = get_redis_connection('default')
+  key = latest_upload_key(profile_id, field)
+  pipeline = connection.pipeline()
+  pipeline.getset(key, digest)
+  pipeline.expire(key, settings.UPLOAD_DEDUP_TTL)
+  previous, _ = pipeline.execute()
+  return previous is None or previous.decode() != digest
+
+def start_upload_job(profile_id: str, field: str, digest: str) -> Optional[UploadJob]:
+  if not claim_upload(profile_id, field, digest):
+    return None
+  try:
+    return UploadJob.objects.create(profile_id=profile_id, field=field, content_hash=digest)
+  except Exception:
+    # Without a job nothing would ever release the claim, and retries of the
+    # same content would be dropped as duplicates.
+    release_upload(profile_id, field, digest)
+    raise
+
+def renew_upload(profile_id: str, field: str, digest: Optional[str]) -> str:
+  # Called when a task picks the upload up, so the key lives as long as the
+  # task keeps being retried. A missing key means the upload outlived its
+  # TTL and can no longer be told apart from a stale one.
+  if digest is None:
+    return 'latest'
+  result = get_redis_connection('default').eval(
+    RENEW_SCRIPT, 1, latest_upload_key(profile_id, field), digest, settings.UPLOAD_DEDUP_TTL
+  )
+  return {1: 'latest', 0: 'superseded'}.get(result, 'expired')
+
+def is_latest_upload(profile_id: str, field: str, digest: Optional[str]) -> bool:
+  if digest is None:
+    return True
+  latest = get_redis_connection('default').get(latest_upload_key(profile_id, field))
+  return latest is not None and latest.decode() == digest
+
+def release_upload(profile_id: str, field: str, digest: Optional[str]) -> None:
+  if digest is not None:
+    get_redis_connection('default').eval(
+      RELEASE_SCRIPT, 1, latest_upload_key(profile_id, field), digest
+    )
+
+def upload_status_key(profile_id: str) -> str:
+  return f'upload:status:{profile_id}'
+
+def touch_upload_status(profile_id: str) -> None:
+  # Bumped on every job change so event streams only query the database
+  # when something actually happened.
+  cache.set(upload_status_key(profile_id), time.time(), timeout=settings.UPLOAD_DEDUP_TTL)
+
+def update_upload_jobs(profile_id: str, job_ids: List[str], **fields: Any) -> None:
+  job_ids = [job_id for job_id in job_ids if job_id]
+  if job_ids:
+    UploadJob.objects.filter(id__in=job_ids).update(**fields)
+    touch_upload_status(profile_id)
+
+def latest_upload_jobs(profile_id: str) -> QuerySet:
+  return (
+    UploadJob.objects.filter(profile_id=profile_id)
+    .order_by('field', '-queued_at')
+    .distinct('field')
+  )
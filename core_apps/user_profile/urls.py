@@ -4,7 +4,12 @@ from .views import (
   NextOfKinAPIView, 
   NextOfKinDetailAPIView,
   ProfileDetailAPIView,
-  ProfileListAPIView
+  ProfileListAPIView,
+  UploadEventStreamView,
+  UploadJobStatusAPIView,
+  UploadSessionAPIView,
+  UploadSessionDetailAPIView,
+  UploadSessionFinalizeAPIView
 )
 
 urlpatterns = [
@@ -12,4 +17,9 @@ urlpatterns = [
   path('my-profile/', ProfileDetailAPIView.as_view(), name='profile_detail'),
   path('my-profile/next-of-kin/', NextOfKinAPIView.as_view(), name='next-of-kin-list'),
   path('my-profile/next-of-kin/<uuid:pk>/', NextOfKinDetailAPIView.as_view(), name='next-of-kin-detail'),
+  path('my-profile/uploads/', UploadJobStatusAPIView.as_view(), name='upload_status'),
+  path('my-profile/uploads/events/', UploadEventStreamView.as_view(), name='upload_events'),
+  path('my-profile/uploads/sessions/', UploadSessionAPIView.as_view(), name='upload_sessions'),
+  path('my-profile/uploads/sessions/<uuid:pk>/', UploadSessionDetailAPIView.as_view(), name='upload_session_detail'),
+  path('my-profile/uploads/sessions/<uuid:pk>/finalize/', UploadSessionFinalizeAPIView.as_view(), name='upload_session_finalize'),
 ]
\ No newline at end of file
@@ -1,25 +1,60 @@
-from typing import Any, List
+import asyncio
+import hashlib
+import json
+import re
+import uuid
+from typing import Any, AsyncIterator, List
 
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.http import Http404
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.views import View
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from PIL import Image
+
+from loguru import logger
+
 from rest_framework import status, filters, generics
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.request import Request
+from rest_framework.views import APIView
 
+from core_apps.common.cookie_auth import CookieAuthentication
 from core_apps.common.models import ContentView
 from core_apps.common.permissions import IsBranchManager
 from core_apps.common.renderers import GenericJSONRenderer
 
-from .models import NextOfKin, Profile
-from .serializers import NextOfKinSerializer, ProfileListSerializer, ProfileSerializer
+from .models import NextOfKin, Profile, UploadJob, UploadSession
+from .serializers import (
+  NextOfKinSerializer,
+  ProfileListSerializer,
+  ProfileSerializer,
+  UploadJobSerializer,
+  UploadSessionSerializer
+)
+from .staging import StagingAreaFull, get_staging_area
+from .tasks import UploadQueueUnavailable, queue_photo_uploads
+from .upload_handlers import StagedUploadedFile, StagingUploadHandler
+from .uploads import (
+  hash_file,
+  latest_upload_jobs,
+  start_upload_job,
+  upload_status_key
+)
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
 
 class StandardResultsSetPagination(PageNumberPagination):
   page_size = 10
@@ -37,7 +72,11 @@ class ProfileListAPIView(generics.ListAPIView):
   filterset_fields = ['user__first_name', 'user__last_name', 'user__id_no']
 
   def get_queryset(self) -> List[Profile]:
-    return Profile.objects.exclude(user__is_staff=True).exclude(user__is_superuser=True)
+    return (
+      Profile.objects.select_related('user')
+      .filter(user__is_staff=False, user__is_superuser=False)
+      .order_by('-created_at')
+    )
   
 class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
   serializer_class = ProfileSerializer
@@ -45,9 +84,19 @@ class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
   renderer_classes = [GenericJSONRenderer]
   object_label = 'profile'
 
+  def initialize_request(self, request: HttpRequest, *args: Any, **kwargs: Any) -> Request:
+    request.upload_handlers = [StagingUploadHandler(request)]
+    return super().initialize_request(request, *args, **kwargs)
+
+  def discard_staged_files(self) -> None:
+    for uploaded_file in self.request.FILES.values():
+      if isinstance(uploaded_file, StagedUploadedFile):
+        uploaded_file.close()
+        get_staging_area().release(uploaded_file.path)
+
   def get_object(self) -> Profile:
     try:
-      profile = Profile.objects.get(user=self.request.user)
+      profile = Profile.objects.select_related('user').get(user=self.request.user)
       self.record_profile_view(profile)
       return profile
     except Profile.DoesNotExist:
@@ -86,13 +135,31 @@ class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
     instance = self.get_object()
     serializer = self.get_serializer(instance, data=request.data, partial=partial)
 
+    upload_errors = getattr(request, 'upload_errors', None)
+    if upload_errors:
+      self.discard_staged_files()
+      if getattr(request, 'upload_storage_full', False):
+        return Response(
+          {'errors': upload_errors},
+          status=status.HTTP_503_SERVICE_UNAVAILABLE,
+          headers={'Retry-After': '60'}
+        )
+      return Response({'errors': upload_errors}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
       serializer.is_valid(raise_exception=True)
       self.perform_update(serializer)
     except serializers.ValidationError as e:
+      self.discard_staged_files()
       return Response({'errors': e.detail}, status=status.HTTP_400_BAD_REQUEST)
-    except Exception as e:
-      return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except UploadQueueUnavailable as e:
+      logger.error(f'Failed to queue photo uploads for profile {instance.id}: {str(e)}')
+      self.discard_staged_files()
+      return Response(
+        {'error': 'Uploads are temporarily unavailable, please retry later.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '60'}
+      )
     return Response(serializer.data)
   
   def partial_update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
@@ -148,7 +215,7 @@ class NextOfKinDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
   
   def get_object(self) -> NextOfKin:
     queryset = self.get_queryset()
-    obj = get_object_or_404(queryset, pk-self.kwargs['pk'])
+    obj = get_object_or_404(queryset, pk=self.kwargs['pk'])
     self.check_object_permissions(self.request, obj)
     return obj
   
@@ -161,7 +228,7 @@ class NextOfKinDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     partial = kwargs.pop('partial', False)
     instance = self.get_object()
     serializer = self.get_serializer(instance, data=request.data, partial=partial)
-    serializer.is_valid(raise_exceptions=True)
+    serializer.is_valid(raise_exception=True)
     self.perform_update(serializer)
     return Response(serializer.data)
   
@@ -173,4 +240,245 @@ class NextOfKinDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         'message': 'Next of Kin deleted successfully'
       },
       status=status.HTTP_204_NO_CONTENT
-    )
\ No newline at end of file
+    )
+
+class UploadJobStatusAPIView(generics.ListAPIView):
+  serializer_class = UploadJobSerializer
+  renderer_classes = [GenericJSONRenderer]
+  pagination_class = None
+  object_label = 'uploads'
+
+  def get_queryset(self) -> List[UploadJob]:
+    return latest_upload_jobs(self.request.user.profile.id)
+
+  def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+    # GenericJSONRenderer expects a dict, not the bare list of an unpaginated
+    # ListAPIView.
+    serializer = self.get_serializer(self.get_queryset(), many=True)
+    return Response({'uploads': serializer.data})
+
+class UploadEventStreamView(View):
+  # Server-sent events for upload jobs. Served from the ASGI app, each open
+  # stream polls a single cache key and only hits the database when a job
+  # changed, instead of clients re-polling the full my-profile endpoint.
+  async def get(self, request: HttpRequest) -> HttpResponse:
+    try:
+      profile_id = await sync_to_async(self.get_profile_id)(request)
+    except AuthenticationFailed as e:
+      return JsonResponse({'error': e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+    if profile_id is None:
+      return JsonResponse(
+        {'error': 'Authentication credentials were not provided.'},
+        status=status.HTTP_401_UNAUTHORIZED
+      )
+
+    response = StreamingHttpResponse(
+      self.stream_events(profile_id),
+      content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+  def get_profile_id(self, request: HttpRequest) -> str | None:
+    authenticated = CookieAuthentication().authenticate(request)
+    if authenticated is None:
+      return None
+    profile = Profile.objects.filter(user=authenticated[0]).only('id').first()
+    return str(profile.id) if profile else None
+
+  def get_jobs(self, profile_id: str) -> list:
+    return UploadJobSerializer(latest_upload_jobs(profile_id), many=True).data
+
+  async def stream_events(self, profile_id: str) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.UPLOAD_EVENTS_TIMEOUT
+    next_keepalive = loop.time() + settings.UPLOAD_EVENTS_KEEPALIVE
+    last_version = None
+    first = True
+
+    while loop.time() < deadline:
+      version = await cache.aget(upload_status_key(profile_id))
+      if first or version != last_version:
+        first = False
+        last_version = version
+        jobs = await sync_to_async(self.get_jobs)(profile_id)
+        yield f'event: uploads\ndata: {json.dumps(jobs)}\n\n'
+        if all(job['status'] not in ['queued', 'processing'] for job in jobs):
+          yield 'event: done\ndata: {}\n\n'
+          return
+      elif loop.time() >= next_keepalive:
+        yield ': keepalive\n\n'
+        next_keepalive = loop.time() + settings.UPLOAD_EVENTS_KEEPALIVE
+      await asyncio.sleep(settings.UPLOAD_EVENTS_POLL_INTERVAL)
+
+    yield 'event: timeout\ndata: {}\n\n'
+
+class UploadSessionAPIView(APIView):
+  renderer_classes = [GenericJSONRenderer]
+  object_label = 'upload_session'
+
+  def post(self, request: Request) -> Response:
+    serializer = UploadSessionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    session_id = uuid.uuid4()
+    try:
+      path = get_staging_area().allocate('session', f'{session_id}.part')
+    except StagingAreaFull:
+      return Response(
+        {'error': 'Uploads are temporarily unavailable, please retry later.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '60'}
+      )
+
+    session = serializer.save(
+      id=session_id,
+      profile=request.user.profile,
+      path=path,
+      expires_at=timezone.now() + settings.UPLOAD_SESSION_TTL,
+    )
+    return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+class UploadSessionDetailAPIView(APIView):
+  # Chunks must arrive in order: PUT with `Content-Range: bytes start-end/total`
+  # where start is the session's received_size. An interrupted client GETs the
+  # session to learn the offset to resume from.
+  renderer_classes = [GenericJSONRenderer]
+  object_label = 'upload_session'
+
+  def get_session(self, pk: uuid.UUID, lock: bool=False) -> UploadSession:
+    sessions = UploadSession.objects.select_for_update() if lock else UploadSession.objects
+    return get_object_or_404(sessions, pk=pk, profile=self.request.user.profile)
+
+  def get(self, request: Request, pk: uuid.UUID) -> Response:
+    return Response(UploadSessionSerializer(self.get_session(pk)).data)
+
+  def put(self, request: Request, pk: uuid.UUID) -> Response:
+    # The session row stays locked while the chunk is written, so a retried
+    # chunk racing the original waits for it and then sees the new offset
+    # instead of writing over the same bytes.
+    with transaction.atomic():
+      session = self.get_session(pk, lock=True)
+
+      if session.status != UploadSession.Status.OPEN or session.expires_at <= timezone.now():
+        return Response(
+          {'error': 'This upload session is no longer accepting data.'},
+          status=status.HTTP_409_CONFLICT
+        )
+
+      match = CONTENT_RANGE_PATTERN.match(request.headers.get('Content-Range', ''))
+      if not match:
+        return Response(
+          {'error': 'A Content-Range header of the form "bytes start-end/total" is required.'},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      start, end, total = (int(value) for value in match.groups())
+      if total != session.total_size or start > end or end >= total:
+        return Response(
+          {'error': 'The Content-Range does not match this upload session.'},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      if start != session.received_size:
+        return Response(
+          {'error': 'Chunks must be sent in order.', 'offset': session.received_size},
+          status=status.HTTP_409_CONFLICT
+        )
+
+      length = end - start + 1
+      if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return Response(
+          {'error': f'Chunks may not exceed {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.'},
+          status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+      digest = hashlib.sha256()
+      written = 0
+      stream = request.stream
+
+      with open(session.path, 'r+b') as staged:
+        staged.seek(start)
+        while stream is not None and written < length:
+          block = stream.read(min(settings.UPLOAD_STREAM_BLOCK_SIZE, length - written))
+          if not block:
+            break
+          staged.write(block)
+          digest.update(block)
+          written += len(block)
+
+        expected_digest = request.headers.get('X-Chunk-SHA256')
+        if written != length or (expected_digest and expected_digest.lower() != digest.hexdigest()):
+          staged.truncate(start)
+          return Response(
+            {'error': 'The chunk was incomplete or failed its checksum.', 'offset': start},
+            status=status.HTTP_400_BAD_REQUEST
+          )
+
+      session.received_size = end + 1
+      session.save(update_fields=['received_size', 'updated_at'])
+
+    return Response({'offset': end + 1, 'chunk_sha256': digest.hexdigest()})
+
+class UploadSessionFinalizeAPIView(APIView):
+  renderer_classes = [GenericJSONRenderer]
+  object_label = 'upload_session'
+
+  def post(self, request: Request, pk: uuid.UUID) -> Response:
+    with transaction.atomic():
+      session = get_object_or_404(
+        UploadSession.objects.select_for_update(), pk=pk, profile=request.user.profile
+      )
+
+      if session.status == UploadSession.Status.FINALIZED:
+        return Response(UploadSessionSerializer(session).data)
+
+      if not session.is_complete:
+        return Response(
+          {'error': 'The upload is incomplete.', 'offset': session.received_size},
+          status=status.HTTP_409_CONFLICT
+        )
+
+      try:
+        with Image.open(session.path) as image:
+          image.verify()
+      except Exception:
+        return Response(
+          {'error': 'The uploaded file is not a valid image.'},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      profile_id = str(session.profile_id)
+      try:
+        # Hashing, claiming, finalizing and queueing succeed or roll back
+        # together, so a failure leaves the session open for the client to
+        # retry; the staged file lives as long as the session.
+        with transaction.atomic():
+          digest = hash_file(session.path)
+          job = start_upload_job(profile_id, session.field, digest)
+          session.status = UploadSession.Status.FINALIZED
+          session.upload_job = job
+          session.save(update_fields=['status', 'upload_job', 'updated_at'])
+          if job is not None:
+            queue_photo_uploads(profile_id, {
+              session.field: {
+                'type': 'file',
+                'path': session.path,
+                'hash': digest,
+                'job_id': str(job.id),
+              }
+            })
+      except Exception as e:
+        logger.error(f'Failed to queue upload session {session.pk}: {str(e)}')
+        return Response(
+          {'error': 'Uploads are temporarily unavailable, please retry later.'},
+          status=status.HTTP_503_SERVICE_UNAVAILABLE,
+          headers={'Retry-After': '60'}
+        )
+
+    if job is None:
+      get_staging_area().release(session.path)
+
+    session.refresh_from_db()
+    return Response(UploadSessionSerializer(session).data, status=status.HTTP_202_ACCEPTED)
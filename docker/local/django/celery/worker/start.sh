@@ -3,4 +3,35 @@
 set -o errexit
 set -o nounset
 
-exec watchfiles --filter python celery.__main__.main --args '-A config.celery_app worker -l INFO'
+# Worker profiles, one per queue in CELERY_TASK_QUEUES. Latency-sensitive
+# queues fetch one message at a time; bulk queues prefetch more.
+# auth-email and media tasks block on SMTP/Cloudinary, so they run on an I/O
+# pool: threads unless CELERY_WORKER_POOL=gevent is set, which also needs the
+# gevent and psycogreen packages installed (they are not in requirements).
+# CPU-bound work stays on the prefork pool of the default profile.
+io_pool="${CELERY_WORKER_POOL:-threads}"
+
+case "${CELERY_WORKER_PROFILE:-all}" in
+  auth-email)
+    export CELERY_WORKER_POOL="${io_pool}"
+    worker_args="-Q auth-email -n auth-email@%h -P ${io_pool} -c 16 --prefetch-multiplier 1"
+    ;;
+  media)
+    export CELERY_WORKER_POOL="${io_pool}"
+    worker_args="-Q media -n media@%h -P ${io_pool} -c 8 --prefetch-multiplier 1"
+    ;;
+  default)
+    export CELERY_WORKER_POOL=prefork
+    worker_args="-Q default,maintenance -n default@%h -P prefork -c 2 --prefetch-multiplier 4"
+    ;;
+  all)
+    export CELERY_WORKER_POOL=prefork
+    worker_args="-Q auth-email,default,media,maintenance -P prefork"
+    ;;
+  *)
+    echo >&2 "Unknown CELERY_WORKER_PROFILE: ${CELERY_WORKER_PROFILE}"
+    exit 1
+    ;;
+esac
+
+exec watchfiles --filter python celery.__main__.main --args "-A config.celery_app worker -l INFO ${worker_args}"
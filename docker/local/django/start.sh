@@ -9,5 +9,30 @@ set -o nounset
 python manage.py migrate --no-input
 python manage.py collectstatic --no-input
 
-exec python manage.py runserver 0.0.0.0:8000
+# Application servers. runserver is the development default; the others run
+# gunicorn with --preload, so the app is imported once and forked into
+# WEB_CONCURRENCY workers. Sync workers close every connection after one
+# response; gthread and uvicorn workers keep nginx's upstream connections
+# alive, so their keep-alive outlasts nginx's 60s upstream idle timeout.
+# Use DJANGO_SETTINGS_MODULE=config.settings.production with these.
+workers="${WEB_CONCURRENCY:-$(( $(nproc) * 2 + 1 ))}"
+gunicorn_args="--bind 0.0.0.0:8000 --preload --workers ${workers} --timeout 60 --graceful-timeout 30 --max-requests 1000 --max-requests-jitter 100"
 
+case "${DJANGO_SERVER:-runserver}" in
+  runserver)
+    exec python manage.py runserver 0.0.0.0:8000
+    ;;
+  gunicorn)
+    exec gunicorn config.wsgi:application ${gunicorn_args} --worker-class sync
+    ;;
+  gthread)
+    exec gunicorn config.wsgi:application ${gunicorn_args} --worker-class gthread --threads "${GUNICORN_THREADS:-4}" --keep-alive 75
+    ;;
+  uvicorn)
+    exec gunicorn config.asgi:application ${gunicorn_args} --worker-class uvicorn.workers.UvicornWorker --keep-alive 75
+    ;;
+  *)
+    echo >&2 "Unknown DJANGO_SERVER: ${DJANGO_SERVER}"
+    exit 1
+    ;;
+esac
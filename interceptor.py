@@ -1,20 +1,38 @@
 from loguru import logger
 import logging
+import threading
+
+# stdlib level name -> loguru level, resolved once per name.
+_levels = {}
+_origin = threading.local()
+
+def _apply_origin(record):
+  # Report the stdlib call site from the LogRecord instead of walking frames
+  # back from this handler.
+  origin = getattr(_origin, 'record', None)
+  if origin is not None:
+    record['name'] = origin.name
+    record['module'] = origin.module
+    record['function'] = origin.funcName
+    record['line'] = origin.lineno
+
+_bridge = logger.patch(_apply_origin)
 
 class InterceptHandler(logging.Handler):
   def emit(self, record):
-    try:
-      level = logger.level(record.levelname).name
-
-    except ValueError:
-      level = record.levelno
-    
-    frame, depth = logging.currentframe(), 2
+    level = _levels.get(record.levelname)
+    if level is None:
+      try:
+        level = logger.level(record.levelname).name
+      except ValueError:
+        level = record.levelno
+      _levels[record.levelname] = level
 
-    while frame.f_code.co_filename == logging.__file__:
-      frame = frame.f_back
-      depth += 1
-    
-    logger.opt(depth=depth, exception=record.exc_info).log(
-      level, record.getMessage()
-    )
\ No newline at end of file
+    _origin.record = record
+    try:
+      if record.exc_info:
+        _bridge.opt(exception=record.exc_info).log(level, record.getMessage())
+      else:
+        _bridge.log(level, record.getMessage())
+    finally:
+      _origin.record = None